@@ -7,11 +7,29 @@ logger = logging.getLogger(__name__)
 class BaseAgent:
     """Base class for all AI agents."""
 
+    # Opt in to the shared LLM response cache for deterministic prompts.
+    cache_responses = False
+    # Admission priority class for this agent's LLM calls (see utils.llm_scheduler).
+    priority = 'background'
+    # Task name used by the model router (see utils.model_router.DEFAULT_ROUTES).
+    task = None
+
     def __init__(self, model_manager, rag_system):
         self.model_manager = model_manager
         self.rag_system = rag_system
+        # Token report of the most recent budgeted prompt (utils.prompt_budget).
+        self.last_prompt_report = None
 
     @property
     def model(self):
-        """Always use the dynamically selected active model."""
-        return self.model_manager.active_model
+        """Model routed for this agent's task (the active model by default)."""
+        return self.model_manager.model_for(self.task)
+
+    def _llm_options(self):
+        """Keyword arguments for ModelManager.generate / generate_stream."""
+        return {
+            'model': self.model,
+            'priority': self.priority,
+            'profile': self.task,
+            'cache': self.cache_responses,
+        }
@@ -4,32 +4,77 @@ import json
 import logging
 from typing import Dict, Any
 from agents.base_agent import BaseAgent
+from utils.prompt_budget import PromptBudgeter, Section
 
 logger = logging.getLogger(__name__)
 
 
 class CodeGenerator(BaseAgent):
+    task = 'code_generation'
+
     def __init__(self, model_manager, rag_system, file_manager):
         super().__init__(model_manager, rag_system)
         self.file_manager = file_manager
 
     def generate(self, project_name, file_path, requirements):
         logger.info(f'Generating code for {file_path} in {project_name}')
+        prompt = self._build_prompt(project_name, file_path, requirements)
+        response = self.model_manager.generate(prompt=prompt, **self._llm_options())
+        return self._write_code(project_name, file_path, response)
+
+    def generate_files(self, project_name, file_paths, requirements, concurrency=None, cancel_event=None):
+        """Generate several files concurrently; returns {file_path: code or exception}.
+
+        Prompts are built up front and fanned out with
+        ModelManager.generate_many, so Ollama's parallel slots stay busy
+        instead of generating one file after another. RAG context for every
+        file is fetched with one RAGSystem.query_many call.
+        """
+        logger.info(f'Generating {len(file_paths)} files in {project_name}')
+        contexts = self.rag_system.query_many([(self._context_query(requirements, fp), 'code_examples', 5, None)
+                                               for fp in file_paths])
+        prompts = [self._build_prompt(project_name, fp, requirements, context)
+                   for fp, context in zip(file_paths, contexts)]
+        results = {}
+        for item in self.model_manager.generate_many(prompts, concurrency=concurrency,
+                                                     cancel_event=cancel_event, **self._llm_options()):
+            file_path = file_paths[item.index]
+            if item.error is not None:
+                logger.error(f'Code generation failed for {file_path}: {item.error}')
+                results[file_path] = item.error
+            else:
+                results[file_path] = self._write_code(project_name, file_path, item.response)
+        return results
+
+    @staticmethod
+    def _context_query(requirements, file_path):
         framework = requirements.get('suggested_frameworks', ['python'])[0]
-        context = self.rag_system.query(f'{framework} {os.path.basename(file_path)} implementation', 'code_examples')
+        return f'{framework} {os.path.basename(file_path)} implementation'
+
+    def _build_prompt(self, project_name, file_path, requirements, context=None):
+        framework = requirements.get('suggested_frameworks', ['python'])[0]
+        if context is None:
+            context = self.rag_system.query(self._context_query(requirements, file_path), 'code_examples')
         file_desc = self._get_file_description(file_path, requirements)
         project_files = self.file_manager.list_project_files(project_name)
         structure = '\n'.join([f['path'] for f in project_files])
         related = self._get_related_files_content(project_name, file_path)
+        sections, self.last_prompt_report = PromptBudgeter(self.task).fit([
+            Section('features', json.dumps(requirements.get('features', [])), weight=3),
+            Section('related', related, weight=3),
+            Section('structure', structure, weight=2),
+            Section('context', context, weight=1),
+        ])
 
-        prompt = f"""Generate production-ready code for {file_path} in a {framework} project.
+        return f"""Generate production-ready code for {file_path} in a {framework} project.
         Project: {project_name} | File: {file_desc} | Type: {requirements.get('project_type','')}
-        Features: {json.dumps(requirements.get('features', []))}
+        Features: {sections['features']}
         DB: {requirements.get('database_required', False)} ({requirements.get('database_type','none')})
         Frontend: {requirements.get('has_frontend', False)}
-        Structure:\n{structure}\nRelated:\n{related}\nContext:\n{context}
+        Structure:\n{sections['structure']}\nRelated:\n{sections['related']}\nContext:\n{sections['context']}
         Generate clean code with imports, docstrings, error handling, type hints."""
-        response = self.model_manager.generate(prompt=prompt, model=self.model)
+
+    def _write_code(self, project_name, file_path, response):
         ext = os.path.splitext(file_path)[1]
         cleaned = self._clean_code_response(response, ext)
         self.file_manager.write_file(project_name, file_path, cleaned)
@@ -56,8 +101,8 @@ class CodeGenerator(BaseAgent):
             content = self.file_manager.read_file(project_name, fp)
             if content:
                 related.append(f'=== {fp} ===\n{content}\n')
-        total = '\n'.join(related)
-        return 'Related files too large.' if len(total) > 5000 else total
+        # Trimmed to the token budget in _build_prompt().
+        return '\n'.join(related)
 
     def _clean_code_response(self, response, ext):
         if isinstance(response, dict):
@@ -69,6 +114,9 @@ class CodeGenerator(BaseAgent):
             if start != end:
                 start = code.find('\n', start) + 1
                 code = code[start:end].strip()
+            else:
+                # Output was cut off (num_predict) before the closing fence.
+                code = code[code.find('\n', start) + 1:].strip()
         lines = code.split('\n')
         cleaned = [l for l in lines if not (l.startswith(('Here', 'This', 'Now', 'Let', 'I', 'First', 'Next')) and not l.strip().startswith('#'))]
         return '\n'.join(cleaned)
@@ -3,27 +3,101 @@
 import os
 import logging
 from agents.base_agent import BaseAgent
+from utils.prompt_budget import PromptBudgeter, Section, count_tokens
+from utils.generation_options import PROFILES, DEFAULT_NUM_PREDICT, MAX_NUM_CTX
+from utils.conversation_context import ConversationStore, code_delta
 
 logger = logging.getLogger(__name__)
 
 
 class CodeCustomizer(BaseAgent):
+    priority = 'interactive'
+    task = 'customization'
+
     def __init__(self, model_manager, rag_system):
         super().__init__(model_manager, rag_system)
+        self.sessions = ConversationStore(redis_getter=lambda: model_manager.redis)
+
+    def customize(self, project_name='', file_path='', current_code='', customization_request='',
+                  on_chunk=None, session_key=None):
+        """Customize existing code. All params optional for backward compat.
+
+        When ``on_chunk`` is given the model output is streamed and each raw
+        chunk is passed to it as it arrives.
 
-    def customize(self, project_name='', file_path='', current_code='', customization_request=''):
-        """Customize existing code. All params optional for backward compat."""
+        With a ``session_key`` (see utils.conversation_context.session_key)
+        follow-up requests on the same file continue from the token context
+        Ollama returned for the previous turn and send only the new request
+        plus a diff of any edits made since, instead of the full prompt.
+        """
         logger.info(f'Customizing code for {file_path or "inline"} in {project_name or "unknown"}')
         base_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'projects')
+        target = self._resolve_target(base_dir, project_name, file_path) if project_name else None
+        model = self.model
+        session = self.sessions.get(session_key) if session_key else None
+        prompt = None
+        if session:
+            prompt = self._followup_prompt(session, model, current_code, customization_request)
+        followup = prompt is not None
+        if followup:
+            context = session['context']
+            frame_tokens = session['frame_tokens']
+        else:
+            context = None
+            prompt = self._full_prompt(base_dir, project_name, file_path, current_code, customization_request)
+            frame_tokens = max(0, count_tokens(prompt) - count_tokens(current_code)
+                               - count_tokens(customization_request))
+        meta = {}
+        if on_chunk:
+            response = self._generate_streaming(prompt, on_chunk, context, meta)
+        else:
+            response = self.model_manager.generate(prompt=prompt, context=context, meta=meta,
+                                                   **self._llm_options())
+        ext = os.path.splitext(file_path)[1] if file_path else '.py'
+        modified = self._clean_code_response(response, ext)
+        if not modified.strip():
+            raise RuntimeError('Model returned no code')
+        if session_key:
+            self._update_session(session_key, session if followup else None, model, meta, prompt,
+                                 frame_tokens, current_code, customization_request, modified, followup)
+        if target and file_path:
+            if os.path.isdir(os.path.dirname(target)):
+                try:
+                    with open(target, 'w') as f:
+                        f.write(modified)
+                except Exception as e:
+                    logger.error(f'Error writing customized code: {e}')
+        return modified
+
+    @staticmethod
+    def _resolve_target(base_dir, project_name, file_path):
+        """Real path of ``file_path`` in ``project_name``; ValueError if it leaves the project."""
+        root = os.path.realpath(base_dir)
+        project_path = os.path.realpath(os.path.join(root, project_name))
+        target = os.path.realpath(os.path.join(project_path, file_path or ''))
+        if os.path.dirname(project_path) != root or os.path.commonpath([project_path, target]) != project_path:
+            raise ValueError('Invalid project or file path')
+        return target
+
+    def _full_prompt(self, base_dir, project_name, file_path, current_code, customization_request):
         project_structure = ''
         if project_name:
-            project_path = os.path.join(base_dir, project_name)
+            project_path = os.path.realpath(os.path.join(base_dir, project_name))
             if os.path.isdir(project_path):
                 project_structure = self._get_project_structure(project_path)
         context = self.rag_system.query(
             f'{customization_request} {os.path.basename(file_path) if file_path else "code"}', 'code_examples',
         )
-        prompt = f"""Task: Customize the following code based on the user's request.
+        # The code being edited must reach the model whole; the tree and the
+        # reference snippets share whatever window is left.
+        sections, self.last_prompt_report = PromptBudgeter(self.task).fit([
+            Section('request', customization_request, required=True),
+            Section('code', current_code, required=True),
+            Section('context', context, weight=2),
+            Section('structure', project_structure, weight=1),
+        ])
+        project_structure, context = sections['structure'], sections['context']
+        return f"""Task: Customize the following code based on the user's request.
         File: {file_path or 'inline'}
         Project: {project_name or 'unknown'}
         User's Request: {customization_request}
@@ -40,18 +114,53 @@ class CodeCustomizer(BaseAgent):
         4. Update imports as needed
         5. Return complete modified code
         Modified Code:"""
-        response = self.model_manager.generate(prompt=prompt, model=self.model)
-        ext = os.path.splitext(file_path)[1] if file_path else '.py'
-        modified = self._clean_code_response(response, ext)
-        if project_name and file_path:
-            full_path = os.path.join(base_dir, project_name, file_path)
-            if os.path.isdir(os.path.dirname(full_path)):
-                try:
-                    with open(full_path, 'w') as f:
-                        f.write(modified)
-                except Exception as e:
-                    logger.error(f'Error writing customized code: {e}')
-        return modified
+
+    def _followup_prompt(self, session, model, current_code, customization_request):
+        """Delta prompt continuing ``session``, or None if it cannot be continued."""
+        if session.get('model') != model or not session.get('context'):
+            return None
+        delta = code_delta(session.get('code', ''), current_code)
+        if delta is None:
+            return None
+        edits = f'The code was edited since your last version:\n```diff\n{delta}\n```\n' if delta else ''
+        prompt = f"""Follow-up change to the same file.
+        {edits}User's Request: {customization_request}
+        Apply it to the current code and return the complete modified code.
+        Modified Code:"""
+        needed = len(session['context']) + count_tokens(prompt) + \
+            PROFILES.get(self.task, {}).get('num_predict', DEFAULT_NUM_PREDICT)
+        if needed > MAX_NUM_CTX:
+            logger.info('Customization session context full; starting a fresh prompt')
+            return None
+        return prompt
+
+    def _update_session(self, key, session, model, meta, prompt, frame_tokens, current_code,
+                        customization_request, modified, followup):
+        if not meta.get('context'):
+            # Failed turn: the stored context no longer matches the code.
+            self.sessions.drop(key)
+            return
+        session = dict(session or {}, model=model, frame_tokens=frame_tokens)
+        session.update(context=meta['context'], code=modified)
+        baseline = frame_tokens + count_tokens(current_code) + count_tokens(customization_request)
+        prefill = meta.get('prompt_eval_count') or count_tokens(prompt)
+        report = self.sessions.record_turn(session, prefill, baseline, followup)
+        self.sessions.save(key, session)
+        logger.info(f'Customization session {key}: {report}')
+
+    def session_report(self, key):
+        """Prefill accounting for session ``key``, or None if it has no turns."""
+        session = self.sessions.get(key)
+        return self.sessions.report(session) if session else None
+
+    def _generate_streaming(self, prompt, on_chunk, context=None, meta=None):
+        parts = []
+        stats = meta if meta is not None else {}
+        for chunk in self.model_manager.generate_stream(prompt=prompt, context=context, stats=stats,
+                                                        **self._llm_options()):
+            parts.append(chunk)
+            on_chunk(chunk)
+        return ''.join(parts)
 
     def _get_project_structure(self, project_path):
         structure = []
@@ -76,6 +185,9 @@ class CodeCustomizer(BaseAgent):
             if start != end:
                 start = code.find('\n', start) + 1
                 code = code[start:end].strip()
+            else:
+                # Output was cut off (num_predict) before the closing fence.
+                code = code[code.find('\n', start) + 1:].strip()
         lines = code.split('\n')
         cleaned = [l for l in lines if not (l.startswith(('Here', 'This', 'Now', 'Let', 'I', 'First', 'Next')) and not l.strip().startswith('#'))]
         return '\n'.join(cleaned)
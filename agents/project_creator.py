@@ -4,6 +4,8 @@ import json
 import logging
 from typing import Dict, Any, List
 from agents.base_agent import BaseAgent
+from utils.cancellation import GenerationCancelled
+from utils.generation_options import json_format
 
 logger = logging.getLogger(__name__)
 
@@ -155,6 +157,26 @@ DEFAULT_STRUCTURES: Dict[str, List[Dict]] = {
     ],
 }
 
+# Ollama structured-output schema for _generate_file_structure
+FILE_STRUCTURE_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'files': {
+            'type': 'array',
+            'items': {
+                'type': 'object',
+                'properties': {
+                    'path': {'type': 'string'},
+                    'type': {'type': 'string', 'enum': ['file', 'directory']},
+                    'description': {'type': 'string'},
+                },
+                'required': ['path', 'type'],
+            },
+        },
+    },
+    'required': ['files'],
+}
+
 # Default pip dependencies per framework
 PIP_DEPS: Dict[str, List[str]] = {
     'flask':   ['flask>=3.0', 'flask-cors', 'python-dotenv'],
@@ -219,6 +241,9 @@ NPM_DEPS: Dict[str, Dict] = {
 
 
 class ProjectCreator(BaseAgent):
+    cache_responses = True
+    task = 'file_structure'
+
     def __init__(self, model_manager, rag_system, file_manager):
         super().__init__(model_manager, rag_system)
         self.file_manager = file_manager
@@ -260,20 +285,29 @@ Features: {json.dumps(requirements.get('features', []))}
 Database: {requirements.get('database_required', False)}
 Frontend: {requirements.get('has_frontend', False)}
 Context: {context}
-Return JSON array: [{{"path": "path", "type": "file|directory", "description": "desc"}}]
+Return JSON object: {{"files": [{{"path": "path", "type": "file|directory", "description": "desc"}}]}}
 Return ONLY valid JSON."""
-        response = self.model_manager.generate(prompt=prompt, model=self.model)
         try:
-            text = str(response).strip().replace('```json', '').replace('```', '').strip()
-            file_structure = json.loads(text)
+            response = self.model_manager.generate_json(
+                prompt=prompt, format=json_format(FILE_STRUCTURE_SCHEMA), **self._llm_options()
+            )
+            file_structure = response.get('files') if isinstance(response, dict) else response
+            if not isinstance(file_structure, list) or not file_structure:
+                raise ValueError(f'Unexpected file structure: {response!r:.200}')
             for item in file_structure:
-                if 'path' not in item or 'type' not in item:
+                if not isinstance(item, dict) or 'path' not in item or 'type' not in item:
                     raise KeyError(f'Missing field: {item}')
                 item.setdefault('description', f"{item['type']} for the project")
             return file_structure
-        except (json.JSONDecodeError, KeyError) as e:
+        except GenerationCancelled:
+            raise
+        except (ValueError, KeyError) as e:
             logger.error(f'Error parsing LLM file structure: {e}')
             return self._get_default_file_structure(framework)
+        except RuntimeError as e:
+            # LLMStreamError, LLMBusyError: Ollama unavailable or saturated
+            logger.error(f'Error generating file structure, using default: {e}')
+            return self._get_default_file_structure(framework)
 
     def _get_default_file_structure(self, framework: str) -> List[Dict]:
         return DEFAULT_STRUCTURES.get(framework, DEFAULT_STRUCTURES['python'])
@@ -1,18 +1,62 @@
 #!/usr/bin/env python
-import json
 import logging
-import re
 from typing import Dict, Any
 from agents.base_agent import BaseAgent
+from utils.llm_scheduler import LLMBusyError
+from utils.cancellation import GenerationCancelled
+from utils.model_manager import LLMStreamError
+from utils.generation_options import json_format
 
 logger = logging.getLogger(__name__)
 
+REQUIREMENTS_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'project_type': {'type': 'string'},
+        'description': {'type': 'string'},
+        'features': {
+            'type': 'array',
+            'items': {
+                'type': 'object',
+                'properties': {
+                    'name': {'type': 'string'},
+                    'description': {'type': 'string'},
+                    'priority': {'type': 'string', 'enum': ['high', 'medium', 'low']},
+                },
+                'required': ['name'],
+            },
+        },
+        'database_required': {'type': 'boolean'},
+        'database_type': {'type': 'string', 'enum': ['sql', 'nosql', 'none']},
+        'has_frontend': {'type': 'boolean'},
+        'suggested_frameworks': {'type': 'array', 'items': {'type': 'string'}},
+        'suggested_packages': {'type': 'array', 'items': {'type': 'string'}},
+        'file_structure': {
+            'type': 'array',
+            'items': {
+                'type': 'object',
+                'properties': {
+                    'path': {'type': 'string'},
+                    'type': {'type': 'string', 'enum': ['file', 'directory']},
+                    'description': {'type': 'string'},
+                },
+                'required': ['path', 'type'],
+            },
+        },
+    },
+    'required': ['project_type', 'description', 'features'],
+}
+
 
 class RequirementAnalyzer(BaseAgent):
+    cache_responses = True
+    priority = 'analysis'
+    task = 'requirement_analysis'
+
     def __init__(self, model_manager, rag_system):
         super().__init__(model_manager, rag_system)
 
-    def analyze(self, user_prompt):
+    def analyze(self, user_prompt, on_chunk=None):
         logger.info(f'Analyzing requirements: {user_prompt[:100]}...')
         context = self.rag_system.query(f'project requirements for {user_prompt}', 'project_requirements')
         prompt = f"""
@@ -40,20 +84,18 @@ class RequirementAnalyzer(BaseAgent):
         Return only valid JSON, no other text.
         """
         try:
-            response = self.model_manager.generate(prompt=prompt, model=self.model)
-            if isinstance(response, str):
-                try:
-                    json_match = re.search(r'```json\n(.*?)\n```', response, re.DOTALL)
-                    if json_match:
-                        response = json_match.group(1)
-                    requirements = json.loads(response)
-                except json.JSONDecodeError:
-                    requirements = {'components': ['Task Manager'], 'structure': ['CRUD']}
-            elif isinstance(response, dict):
-                requirements = response
-            else:
+            requirements = self.model_manager.generate_json(
+                prompt=prompt, on_chunk=on_chunk,
+                format=json_format(REQUIREMENTS_SCHEMA), **self._llm_options()
+            )
+            if not isinstance(requirements, dict):
                 return self._get_default_requirements()
             return self._validate_requirements(requirements)
+        except ValueError as e:
+            logger.error(f'Unparseable requirements analysis: {e}')
+            return self._get_default_requirements()
+        except (LLMBusyError, GenerationCancelled, LLMStreamError):
+            raise
         except Exception as e:
             logger.error(f'Error analyzing requirements: {e}')
             return self._get_default_requirements()
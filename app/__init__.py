@@ -38,11 +38,22 @@ def create_app(config_name=None):
     # Register socket events
     _register_socket_events(app)
 
+    # Attribute LLM telemetry to the requesting user
+    _register_telemetry_tagging(app)
+
     # Create database tables
     with app.app_context():
         from app.models import user, project, task, chat_history  # noqa: F401
         db.create_all()
 
+    # Load the model into Ollama before the first user request needs it
+    if app.config.get('LLM_WARMUP_ON_START') and not app.config.get('TESTING'):
+        _start_model_warmup(app)
+
+    # Load the embedding model before workers fork (gunicorn --preload)
+    if app.config.get('RAG_PRELOAD_EMBEDDINGS') and not app.config.get('TESTING'):
+        _preload_embeddings(app)
+
     app.logger.info(f'LLM Code Assist started [{config_name}]')
     return app
 
@@ -66,8 +77,10 @@ def _register_blueprints(app):
     from app.api.analysis import analysis_bp
     from app.api.tasks import tasks_bp
     from app.api.main import main_bp
+    from app.api.metrics import metrics_bp
 
     app.register_blueprint(main_bp)
+    app.register_blueprint(metrics_bp)
     app.register_blueprint(auth_bp)
     app.register_blueprint(projects_bp)
     app.register_blueprint(files_bp)
@@ -75,5 +88,34 @@ def _register_blueprints(app):
     app.register_blueprint(tasks_bp)
 
 
+def _start_model_warmup(app):
+    try:
+        from app.services.agent_service import get_agent_container
+        get_agent_container(app).model_manager.warmer.warm_async()
+    except Exception as e:
+        app.logger.warning(f'Model warm-up not started: {e}')
+
+
+def _preload_embeddings(app):
+    try:
+        from utils.embeddings import preload
+        preload()
+    except Exception as e:
+        app.logger.warning(f'Embedding preload failed: {e}')
+
+
+def _register_telemetry_tagging(app):
+    from flask_login import current_user
+    from utils.llm_telemetry import set_user_tag
+
+    @app.before_request
+    def _tag_llm_user():
+        set_user_tag(current_user.id if current_user.is_authenticated else None)
+
+    @app.teardown_request
+    def _untag_llm_user(exc=None):
+        set_user_tag(None)
+
+
 def _register_socket_events(app):
     from app.sockets import execution, analysis  # noqa: F401
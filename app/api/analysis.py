@@ -3,6 +3,9 @@ from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
 from app.extensions import db
 from app.models.chat_history import ChatHistory
+from app.models.project import Project
+from utils.llm_scheduler import LLMBusyError
+from utils.conversation_context import session_key
 
 logger = logging.getLogger(__name__)
 
@@ -10,12 +13,8 @@ analysis_bp = Blueprint('analysis', __name__, url_prefix='/api')
 
 
 def _get_analyzer():
-    from utils.model_manager import ModelManager
-    from utils.rag_system import RAGSystem
-    from agents.requirement_analyzer import RequirementAnalyzer
-    mm = ModelManager()
-    rag = RAGSystem()
-    return RequirementAnalyzer(mm, rag)
+    from app.services.agent_service import get_agent_container
+    return get_agent_container().requirement_analyzer
 
 
 @analysis_bp.route('/analyze', methods=['POST'])
@@ -55,6 +54,9 @@ def analyze_requirements():
 
         return jsonify({'success': True, 'analysis': analysis})
 
+    except LLMBusyError as e:
+        logger.warning(f'Analysis rejected: {e}')
+        return jsonify({'success': False, 'error': str(e)}), 503
     except Exception as e:
         logger.error(f'Error analyzing requirements: {e}', exc_info=True)
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -76,23 +78,30 @@ def customize_code():
 
         if not all([current_code, customization_request]):
             return jsonify({'success': False, 'error': 'Missing fields'}), 400
+        if project_name and not Project.query.filter_by(name=project_name, user_id=current_user.id).first():
+            return jsonify({'success': False, 'error': 'Project not found'}), 404
 
-        from utils.model_manager import ModelManager
-        from utils.rag_system import RAGSystem
-        from agents.customizer import CodeCustomizer
+        from app.services.agent_service import get_agent_container
 
-        mm = ModelManager()
-        rag = RAGSystem()
-        customizer = CodeCustomizer(mm, rag)
+        customizer = get_agent_container().code_customizer
+        key = session_key(current_user.id, project_name, file_path)
+        if data.get('newSession'):
+            customizer.sessions.drop(key)
         customized_code = customizer.customize(
             project_name=project_name,
             file_path=file_path,
             current_code=current_code,
             customization_request=customization_request,
+            session_key=key,
         )
 
-        return jsonify({'success': True, 'code': customized_code})
+        return jsonify({'success': True, 'code': customized_code, 'session': customizer.session_report(key)})
 
+    except LLMBusyError as e:
+        logger.warning(f'Customization rejected: {e}')
+        return jsonify({'success': False, 'error': str(e)}), 503
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         logger.error(f'Error customizing code: {e}', exc_info=True)
         return jsonify({'success': False, 'error': str(e)}), 500
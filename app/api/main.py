@@ -1,5 +1,5 @@
 from flask import Blueprint, render_template, jsonify, current_app, redirect, url_for
-from flask_login import current_user
+from flask_login import current_user, login_required
 
 main_bp = Blueprint('main', __name__)
 
@@ -118,8 +118,22 @@ def get_frameworks():
 def get_active_model():
     """Get the currently active Ollama model."""
     try:
-        from utils.model_manager import ModelManager
-        mm = ModelManager()
-        return jsonify({'success': True, 'model': mm.active_model or 'Not loaded'})
+        from app.services.agent_service import get_agent_container
+        mm = get_agent_container().model_manager
+        return jsonify({'success': True, 'model': mm.active_model or 'Not loaded',
+                        'available': mm.catalog.names()})
     except Exception as e:
         return jsonify({'success': False, 'model': 'Unknown', 'error': str(e)})
+
+
+@main_bp.route('/api/system/hardware', methods=['GET'])
+@login_required
+def get_hardware():
+    """Get the cached hardware profile and the model tier it supports."""
+    try:
+        from utils.hardware_profile import get_hardware_profile, recommend_model
+        profile = dict(get_hardware_profile())
+        profile.pop('hostname', None)
+        return jsonify({'success': True, 'profile': profile, 'recommended_model': recommend_model(profile)})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
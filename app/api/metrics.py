@@ -0,0 +1,87 @@
+import hmac
+import logging
+from flask import Blueprint, jsonify, request, current_app, Response
+from utils.llm_telemetry import get_telemetry
+
+logger = logging.getLogger(__name__)
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+def _component_stats():
+    """stats() of every LLM-side component of this process's agent container."""
+    from app.services.agent_service import get_agent_container
+    from utils.cancellation import get_registry
+    from utils.json_repair import json_parse_stats
+    from utils.prompt_budget import prompt_token_stats
+
+    container = get_agent_container()
+    mm = container.model_manager
+    stats = {
+        'response_cache': mm.response_cache.stats(),
+        'single_flight': mm.single_flight.stats(),
+        'scheduler': mm.scheduler.stats(),
+        'catalog': mm.catalog.stats(),
+        'warmup': mm.warmer.stats(),
+        'backends': mm.pool.stats(),
+        'json_parse': json_parse_stats(),
+        'prompt_tokens': prompt_token_stats(),
+        'cancellation': get_registry().stats(),
+    }
+    if mm.recorder is not None:
+        stats['recorder'] = mm.recorder.stats()
+    rag = container.peek('rag_system')
+    if rag is not None:
+        try:
+            stats['rag'] = rag.stats()
+        except Exception as e:
+            stats['rag'] = {'error': str(e)}
+    customizer = container.peek('code_customizer')
+    if customizer is not None:
+        stats['customization_sessions'] = customizer.sessions.stats()
+    return stats
+
+
+def _require_metrics_token():
+    """Error response unless the request carries METRICS_TOKEN as a bearer token."""
+    token = current_app.config.get('METRICS_TOKEN')
+    if not token:
+        return jsonify({'success': False, 'error': 'Metrics disabled: METRICS_TOKEN is not set'}), 403
+    supplied = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+    if not hmac.compare_digest(supplied, token):
+        return jsonify({'success': False, 'error': 'Unauthorized'}), 401
+    return None
+
+
+@metrics_bp.route('/api/metrics/llm', methods=['GET'])
+def llm_metrics():
+    """Rolling per-model/agent LLM telemetry plus component stats.
+
+    Internal: includes every user's usage and the backend URLs, so it needs
+    METRICS_TOKEN like /metrics.
+    """
+    denied = _require_metrics_token()
+    if denied:
+        return denied
+    try:
+        data = get_telemetry().snapshot()
+        data['components'] = _component_stats()
+        return jsonify({'success': True, 'metrics': data})
+    except Exception as e:
+        logger.error(f'Error collecting LLM metrics: {e}', exc_info=True)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus scrape endpoint summed over every web and worker process.
+
+    Requires METRICS_TOKEN as a bearer token; disabled while it is unset.
+    """
+    denied = _require_metrics_token()
+    if denied:
+        return denied
+    from app.services.agent_service import get_agent_container
+    telemetry = get_telemetry()
+    merged = telemetry.collect(get_agent_container().model_manager.redis, telemetry.export())
+    return Response(telemetry.prometheus(merged), mimetype='text/plain; version=0.0.4')
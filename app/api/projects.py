@@ -12,25 +12,17 @@ projects_bp = Blueprint('projects', __name__, url_prefix='/api/project')
 
 
 def _get_agents():
-    """Lazy-load agents to avoid circular imports."""
-    from utils.model_manager import ModelManager
-    from utils.rag_system import RAGSystem
-    from utils.file_manager import FileManager
-    from agents.project_creator import ProjectCreator
-    from agents.code_generator import CodeGenerator
-    from agents.customizer import CodeCustomizer
-
-    base_dir = current_app.config['PROJECTS_DIR']
-    mm = ModelManager()
-    rag = RAGSystem()
-    fm = FileManager(base_dir)
+    """Shared agents for this app (built lazily, reused across requests)."""
+    from app.services.agent_service import get_agent_container
+
+    container = get_agent_container()
     return {
-        'model_manager': mm,
-        'rag_system': rag,
-        'file_manager': fm,
-        'project_creator': ProjectCreator(mm, rag, fm),
-        'code_generator': CodeGenerator(mm, rag, fm),
-        'code_customizer': CodeCustomizer(mm, rag),
+        'model_manager': container.model_manager,
+        'rag_system': container.rag_system,
+        'file_manager': container.file_manager,
+        'project_creator': container.project_creator,
+        'code_generator': container.code_generator,
+        'code_customizer': container.code_customizer,
     }
 
 
@@ -29,7 +29,12 @@ def cancel_task(task_id):
     if task.celery_task_id:
         try:
             from celery_app import celery_app
-            celery_app.control.revoke(task.celery_task_id, terminate=True)
+            from app.services.agent_service import get_agent_container
+            from utils.cancellation import get_registry
+            # Revoke stops a queued task; a running one is stopped cooperatively:
+            # its worker sees the Redis flag and closes its Ollama connections.
+            celery_app.control.revoke(task.celery_task_id)
+            get_registry().request_cancel(task.celery_task_id, get_agent_container().model_manager.redis, 'revoked')
             task.status = 'revoked'
             from app.extensions import db
             db.session.commit()
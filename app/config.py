@@ -47,6 +47,70 @@ class Config:
     # Ollama
     OLLAMA_BASE_URL = os.environ.get('OLLAMA_BASE_URL', 'http://localhost:11434')
     OLLAMA_API_KEY = os.environ.get('OLLAMA_API_KEY', '')
+    OLLAMA_POOL_SIZE = int(os.environ.get('OLLAMA_POOL_SIZE', '16'))
+    OLLAMA_MAX_RETRIES = int(os.environ.get('OLLAMA_MAX_RETRIES', '3'))
+    OLLAMA_CONNECT_TIMEOUT = float(os.environ.get('OLLAMA_CONNECT_TIMEOUT', '5'))
+    OLLAMA_READ_TIMEOUT = float(os.environ.get('OLLAMA_READ_TIMEOUT', '300'))
+
+    # LLM response cache
+    LLM_CACHE_TTL = int(os.environ.get('LLM_CACHE_TTL', '86400'))
+    LLM_CACHE_MAX_ENTRIES = int(os.environ.get('LLM_CACHE_MAX_ENTRIES', '256'))
+    LLM_COALESCE = os.environ.get('LLM_COALESCE', 'true').lower() == 'true'
+
+    # LLM admission control (per process, per model)
+    LLM_MAX_CONCURRENCY = int(os.environ.get('LLM_MAX_CONCURRENCY', '2'))
+    LLM_DEADLINE_INTERACTIVE = float(os.environ.get('LLM_DEADLINE_INTERACTIVE', '90'))
+    LLM_DEADLINE_ANALYSIS = float(os.environ.get('LLM_DEADLINE_ANALYSIS', '180'))
+    LLM_DEADLINE_BACKGROUND = float(os.environ.get('LLM_DEADLINE_BACKGROUND', '540'))
+
+    # Task -> model overrides for the model router, as JSON
+    # e.g. {"requirement_analysis": "qwen2.5-coder:7b"}
+    LLM_MODEL_ROUTES = os.environ.get('LLM_MODEL_ROUTES', '')
+
+    # Upper bound for the per-request context window (num_ctx)
+    LLM_MAX_NUM_CTX = int(os.environ.get('LLM_MAX_NUM_CTX', '32768'))
+
+    # Send JSON schemas as Ollama `format` (requires Ollama >= 0.5), else 'json'
+    LLM_JSON_SCHEMA = os.environ.get('LLM_JSON_SCHEMA', 'false').lower() == 'true'
+    # Token window (prompt + output) the agent prompt budgeter fits into
+    LLM_PROMPT_WINDOW = int(os.environ.get('LLM_PROMPT_WINDOW', '16384'))
+    # Model catalog: revalidate from Redis every TTL, ask Ollama once the snapshot is STALE_TTL old (seconds)
+    MODEL_CATALOG_TTL = int(os.environ.get('MODEL_CATALOG_TTL', '60'))
+    MODEL_CATALOG_STALE_TTL = int(os.environ.get('MODEL_CATALOG_STALE_TTL', '900'))
+    # Hardware profile (RAM/VRAM/CPU benchmark) is re-detected per host after this many seconds
+    HARDWARE_PROFILE_TTL = int(os.environ.get('HARDWARE_PROFILE_TTL', '86400'))
+    # Model warm-up: preload at startup, keep_alive bounds (seconds), models kept resident together
+    LLM_WARMUP_ON_START = os.environ.get('LLM_WARMUP_ON_START', 'true').lower() == 'true'
+    LLM_KEEP_ALIVE_MIN = int(os.environ.get('LLM_KEEP_ALIVE_MIN', '300'))
+    LLM_KEEP_ALIVE_MAX = int(os.environ.get('LLM_KEEP_ALIVE_MAX', '3600'))
+    LLM_RESIDENT_MODELS = os.environ.get('LLM_RESIDENT_MODELS', '')  # e.g. qwen2.5-coder:3b,qwen2.5-coder:14b
+    # Ollama backend pool: comma-separated node URLs (defaults to OLLAMA_BASE_URL), health checks, ejection
+    OLLAMA_BASE_URLS = os.environ.get('OLLAMA_BASE_URLS', '')
+    OLLAMA_HEALTH_INTERVAL = float(os.environ.get('OLLAMA_HEALTH_INTERVAL', '15'))
+    OLLAMA_EJECT_AFTER = int(os.environ.get('OLLAMA_EJECT_AFTER', '3'))
+    OLLAMA_EJECT_SECONDS = float(os.environ.get('OLLAMA_EJECT_SECONDS', '30'))
+    OLLAMA_EJECT_RESET_SECONDS = float(os.environ.get('OLLAMA_EJECT_RESET_SECONDS', '3600'))
+    # Customization sessions reuse Ollama token context between follow-up edits
+    CUSTOMIZE_SESSION_TTL = int(os.environ.get('CUSTOMIZE_SESSION_TTL', '1800'))
+    CUSTOMIZE_MAX_SESSIONS = int(os.environ.get('CUSTOMIZE_MAX_SESSIONS', '128'))
+    # LLM telemetry: rolling percentile window (seconds); bearer token required by /metrics and /api/metrics/llm (unset = disabled)
+    LLM_TELEMETRY_WINDOW = int(os.environ.get('LLM_TELEMETRY_WINDOW', '900'))
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+    # Record/replay of Ollama calls: 'record' or 'replay' (unset = live); replay speed 1.0 = original timing, 0 = instant
+    LLM_RECORD_MODE = os.environ.get('LLM_RECORD_MODE', '')
+    LLM_RECORD_PATH = os.environ.get('LLM_RECORD_PATH', 'recordings/llm.jsonl.gz')
+    LLM_REPLAY_SPEED = float(os.environ.get('LLM_REPLAY_SPEED', '1.0'))
+    # RAG embeddings load on first query; preload loads them in the master (gunicorn --preload, Celery worker_init)
+    RAG_EMBEDDING_MODEL = os.environ.get('RAG_EMBEDDING_MODEL', 'all-MiniLM-L6-v2')
+    RAG_EMBEDDING_DEVICE = os.environ.get('RAG_EMBEDDING_DEVICE', 'cpu')
+    RAG_PRELOAD_EMBEDDINGS = os.environ.get('RAG_PRELOAD_EMBEDDINGS', 'false').lower() == 'true'
+    # Embedding cache: float16 vectors by content hash in SQLite (empty path = memory only) behind an LRU of this size
+    RAG_EMBEDDING_CACHE_PATH = os.environ.get('RAG_EMBEDDING_CACHE_PATH', 'data/embedding_cache.sqlite3')
+    RAG_EMBEDDING_CACHE_SIZE = int(os.environ.get('RAG_EMBEDDING_CACHE_SIZE', '10000'))
+    # RAG answer cache TTL (seconds); entries are invalidated by per-collection generations on add/delete
+    RAG_CACHE_TTL = int(os.environ.get('RAG_CACHE_TTL', '86400'))
+    # Shared retrieval sidecar (python -m utils.retrieval_service); when set, processes query it instead of loading RAG
+    RAG_SERVICE_SOCKET = os.environ.get('RAG_SERVICE_SOCKET', '')
 
     # Google OAuth
     GOOGLE_CLIENT_ID = os.environ.get('GOOGLE_CLIENT_ID', '')
@@ -0,0 +1,20 @@
+"""Access to the shared agent container for the current Flask app."""
+import os
+import threading
+from flask import current_app
+from utils.agent_container import AgentContainer
+
+_lock = threading.Lock()
+
+
+def get_agent_container(app=None):
+    """Return the app-scoped AgentContainer, creating it on first use."""
+    app = app or current_app._get_current_object()
+    container = app.extensions.get('agent_container')
+    if container is None or container.pid != os.getpid():
+        with _lock:
+            container = app.extensions.get('agent_container')
+            if container is None or container.pid != os.getpid():
+                container = AgentContainer(app.config['PROJECTS_DIR'])
+                app.extensions['agent_container'] = container
+    return container
@@ -1,5 +1,8 @@
 import logging
 from flask import request
+from flask_login import current_user
+from utils.llm_telemetry import set_user_tag
+from utils.cancellation import GenerationCancelled, get_registry
 from app.extensions import socketio
 
 logger = logging.getLogger(__name__)
@@ -19,23 +22,89 @@ def handle_analyze_requirements(data):
         if not all([name, requirements, framework]):
             raise ValueError('Missing required fields: name, requirements, or framework')
 
-        from utils.model_manager import ModelManager
-        from utils.rag_system import RAGSystem
-        from agents.requirement_analyzer import RequirementAnalyzer
+        from app.services.agent_service import get_agent_container
 
-        mm = ModelManager()
-        rag = RAGSystem()
-        analyzer = RequirementAnalyzer(mm, rag)
-        analysis = analyzer.analyze(requirements)
+        analyzer = get_agent_container().requirement_analyzer
+        sid = request.sid
+        set_user_tag(current_user.id if current_user.is_authenticated else None)
+
+        def on_chunk(chunk):
+            socketio.emit('analysis_progress', {'chunk': chunk}, room=sid)
+
+        # Disconnecting cancels the analysis (see handle_disconnect).
+        with get_registry().scope(sid):
+            analysis = analyzer.analyze(requirements, on_chunk=on_chunk)
 
         socketio.emit('analysis_result', {
             'success': True,
             'analysis': analysis,
         }, room=request.sid)
 
+    except GenerationCancelled:
+        logger.info(f'Analysis for {request.sid} cancelled')
     except Exception as e:
         logger.error(f'Analysis error: {e}', exc_info=True)
         socketio.emit('analysis_error', {
             'success': False,
             'error': str(e),
         }, room=request.sid)
+
+
+@socketio.on('customize_code')
+def handle_customize_code(data):
+    """Handle code customization via WebSocket, streaming partial output."""
+    try:
+        if not current_user.is_authenticated:
+            raise PermissionError('Authentication required')
+        if not data:
+            raise ValueError('No data provided')
+
+        current_code = data.get('currentCode')
+        customization_request = data.get('customizationRequest')
+
+        if not all([current_code, customization_request]):
+            raise ValueError('Missing required fields: currentCode or customizationRequest')
+
+        from app.models.project import Project
+        from app.services.agent_service import get_agent_container
+        from utils.conversation_context import session_key
+
+        project_name = data.get('projectName', '')
+        file_path = data.get('filePath', '')
+        if project_name and not Project.query.filter_by(name=project_name, user_id=current_user.id).first():
+            raise PermissionError('Project not found')
+
+        customizer = get_agent_container().code_customizer
+        sid = request.sid
+        set_user_tag(current_user.id)
+        key = session_key(current_user.id, project_name, file_path)
+        if data.get('newSession'):
+            customizer.sessions.drop(key)
+
+        def on_chunk(chunk):
+            socketio.emit('customization_progress', {'chunk': chunk}, room=sid)
+
+        with get_registry().scope(sid):
+            code = customizer.customize(
+                project_name=project_name,
+                file_path=file_path,
+                current_code=current_code,
+                customization_request=customization_request,
+                on_chunk=on_chunk,
+                session_key=key,
+            )
+
+        socketio.emit('customization_result', {
+            'success': True,
+            'code': code,
+            'session': customizer.session_report(key),
+        }, room=sid)
+
+    except GenerationCancelled:
+        logger.info(f'Customization for {request.sid} cancelled')
+    except Exception as e:
+        logger.error(f'Customization error: {e}', exc_info=True)
+        socketio.emit('customization_error', {
+            'success': False,
+            'error': str(e),
+        }, room=request.sid)
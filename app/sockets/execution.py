@@ -18,10 +18,14 @@ def handle_connect():
 @socketio.on('disconnect')
 def handle_disconnect():
     """Clean up on client disconnect."""
+    from utils.cancellation import get_registry
+
     session_id = request.sid
     if session_id in active_sessions:
         active_sessions[session_id]['stop_event'].set()
         del active_sessions[session_id]
+    # Stop any LLM generation still running for this client.
+    get_registry().cancel(session_id, 'client disconnected')
     logger.info(f'Client disconnected: {session_id}')
 
 
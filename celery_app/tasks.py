@@ -1,23 +1,70 @@
 """Celery task definitions."""
+import os
+import inspect
 import logging
 from datetime import datetime, timedelta
+from celery.signals import worker_init, worker_process_init, worker_ready, task_prerun
 from celery_app import celery_app
 
 logger = logging.getLogger(__name__)
 
+# Source files generate_project_code fills in; other files keep their scaffold.
+CODE_EXTENSIONS = ('.py', '.js', '.jsx', '.ts', '.tsx')
+
+
+@worker_init.connect
+def _preload_embeddings(**kwargs):
+    """Load the embedding model in the worker master so prefork children share it."""
+    if os.environ.get('RAG_PRELOAD_EMBEDDINGS', 'false').lower() == 'true':
+        from utils.embeddings import preload
+        try:
+            preload()
+        except Exception as e:
+            logger.warning(f'Embedding preload failed: {e}')
+
+
+@worker_process_init.connect
+def _reset_agent_container(**kwargs):
+    """Give each prefork child its own agent container instead of the parent's."""
+    from utils.agent_container import reset_process_container
+    reset_process_container()
+
+
+@worker_ready.connect
+def _warm_models(**kwargs):
+    """Preload the active and resident models when a worker comes up."""
+    if os.environ.get('LLM_WARMUP_ON_START', 'true').lower() == 'true':
+        from utils.agent_container import get_process_container
+        get_process_container().model_manager.warmer.warm_async()
+
+
+@task_prerun.connect
+def _tag_llm_user(task=None, args=None, kwargs=None, **extra):
+    """Attribute LLM telemetry recorded by the task to its ``user_id`` argument."""
+    from utils.llm_telemetry import set_user_tag
+    try:
+        bound = inspect.signature(task.run).bind_partial(*(args or ()), **(kwargs or {}))
+        set_user_tag(bound.arguments.get('user_id'))
+    except (TypeError, ValueError):
+        set_user_tag(None)
+
+
+def _cancellable(task, container):
+    """Cancel scope for ``task``: /api/tasks/<id>/cancel stops its LLM calls."""
+    from utils.cancellation import get_registry
+    return get_registry().scope(task.request.id, redis=container.model_manager.redis)
+
 
 @celery_app.task(bind=True, max_retries=2, name='celery_app.tasks.analyze_requirements')
 def analyze_requirements(self, requirements_text, user_id, socket_sid=None):
     """Analyze project requirements in background."""
+    from utils.cancellation import GenerationCancelled
     try:
-        from utils.model_manager import ModelManager
-        from utils.rag_system import RAGSystem
-        from agents.requirement_analyzer import RequirementAnalyzer
+        from utils.agent_container import get_process_container
 
-        mm = ModelManager()
-        rag = RAGSystem()
-        analyzer = RequirementAnalyzer(mm, rag)
-        result = analyzer.analyze(requirements_text)
+        container = get_process_container()
+        with _cancellable(self, container):
+            result = container.requirement_analyzer.analyze(requirements_text)
 
         # Emit via SocketIO if sid provided
         if socket_sid:
@@ -31,6 +78,9 @@ def analyze_requirements(self, requirements_text, user_id, socket_sid=None):
 
         return result
 
+    except GenerationCancelled:
+        logger.info(f'Analysis task {self.request.id} cancelled')
+        return None
     except Exception as exc:
         logger.error(f'Analysis task failed: {exc}')
         raise self.retry(exc=exc, countdown=5)
@@ -39,30 +89,30 @@ def analyze_requirements(self, requirements_text, user_id, socket_sid=None):
 @celery_app.task(bind=True, max_retries=1, name='celery_app.tasks.generate_project_code')
 def generate_project_code(self, project_name, analysis_data, framework, user_id):
     """Generate project code in background."""
+    from utils.cancellation import GenerationCancelled
     try:
-        from utils.model_manager import ModelManager
-        from utils.rag_system import RAGSystem
-        from utils.file_manager import FileManager
-        from agents.project_creator import ProjectCreator
-        from agents.code_generator import CodeGenerator
-        import os
-
-        base_dir = os.environ.get('PROJECTS_DIR', os.path.join(
-            os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'projects'))
-
-        mm = ModelManager()
-        rag = RAGSystem()
-        fm = FileManager(base_dir)
-
-        creator = ProjectCreator(mm, rag, fm)
-        project_path = creator.create_project(analysis_data, framework, project_name)
-
-        main_file = 'app.py' if framework in ('flask', 'gradio', 'streamlit') else 'main.py'
-        generator = CodeGenerator(mm, rag, fm)
-        generator.generate(project_name, main_file, analysis_data)
-
-        return {'success': True, 'project_path': project_path, 'project_name': project_name}
-
+        from utils.agent_container import get_process_container
+
+        container = get_process_container()
+        with _cancellable(self, container) as token:
+            project_path = container.project_creator.create_project(analysis_data, framework, project_name)
+
+            main_file = 'app.py' if framework in ('flask', 'gradio', 'streamlit') else 'main.py'
+            files = [main_file] + [
+                item['path'] for item in analysis_data.get('file_structure', [])
+                if isinstance(item, dict) and item.get('type') == 'file' and item.get('path') != main_file
+                and os.path.splitext(item.get('path', ''))[1] in CODE_EXTENSIONS
+            ]
+            results = container.code_generator.generate_files(project_name, files, analysis_data)
+            token.raise_if_cancelled()
+        failed = [path for path, result in results.items() if isinstance(result, Exception)]
+
+        return {'success': True, 'project_path': project_path, 'project_name': project_name,
+                'generated': [path for path in results if path not in failed], 'failed': failed}
+
+    except GenerationCancelled:
+        logger.info(f'Code generation task {self.request.id} cancelled')
+        return {'success': False, 'cancelled': True, 'project_name': project_name}
     except Exception as exc:
         logger.error(f'Code generation task failed: {exc}')
         raise self.retry(exc=exc, countdown=10)
@@ -72,19 +122,16 @@ def generate_project_code(self, project_name, analysis_data, framework, user_id)
 def customize_code(self, project_name, file_path, current_code, request_text, user_id):
     """Customize code in background."""
     try:
-        from utils.model_manager import ModelManager
-        from utils.rag_system import RAGSystem
-        from agents.customizer import CodeCustomizer
-
-        mm = ModelManager()
-        rag = RAGSystem()
-        customizer = CodeCustomizer(mm, rag)
-        result = customizer.customize(
-            project_name=project_name,
-            file_path=file_path,
-            current_code=current_code,
-            customization_request=request_text,
-        )
+        from utils.agent_container import get_process_container
+
+        container = get_process_container()
+        with _cancellable(self, container):
+            result = container.code_customizer.customize(
+                project_name=project_name,
+                file_path=file_path,
+                current_code=current_code,
+                customization_request=request_text,
+            )
         return {'success': True, 'code': result}
 
     except Exception as exc:
@@ -120,14 +167,14 @@ def cleanup_stale_tasks():
 
 @celery_app.task(name='celery_app.tasks.refresh_model_cache')
 def refresh_model_cache():
-    """Refresh available models in Redis cache."""
+    """Refresh the model catalog snapshot and keep resident/recent models loaded."""
     try:
-        from utils.model_manager import ModelManager
-        mm = ModelManager()
-        models = mm.list_models()
-        if mm.redis and models.get('models'):
-            import json
-            mm.redis.setex('cache:models', 300, json.dumps(models))
-            logger.info(f'Refreshed model cache: {len(models.get("models", []))} models')
+        from utils.agent_container import get_process_container
+        mm = get_process_container().model_manager
+        models = mm.catalog.refresh()
+        logger.info(f'Refreshed model cache: {len(models)} models')
+        warmed = mm.warmer.keep_warm()
+        if warmed:
+            logger.info(f'Keep-warm pings: {warmed}')
     except Exception as e:
         logger.error(f'Model cache refresh error: {e}')
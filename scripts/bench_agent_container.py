@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+"""Benchmark per-request agent construction against the shared AgentContainer.
+
+Simulates N requests that each need a RequirementAnalyzer and CodeCustomizer,
+first building fresh ModelManager/RAGSystem instances per request (the old
+behaviour) and then resolving them from a process-wide container. Reports
+per-request latency and resident memory growth for both strategies.
+
+Usage: python scripts/bench_agent_container.py [--requests 20]
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault('TOKENIZERS_PARALLELISM', 'false')
+
+
+def _rss_mb():
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 ** 2)
+    except ImportError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _per_request():
+    from utils.model_manager import ModelManager
+    from utils.rag_system import RAGSystem
+    from agents.requirement_analyzer import RequirementAnalyzer
+    from agents.customizer import CodeCustomizer
+    mm = ModelManager()
+    rag = RAGSystem()
+    return RequirementAnalyzer(mm, rag), CodeCustomizer(mm, rag)
+
+
+def _shared(container):
+    return container.requirement_analyzer, container.code_customizer
+
+
+def _run(label, fn, n):
+    rss_before = _rss_mb()
+    timings = []
+    for _ in range(n):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    rss_after = _rss_mb()
+    print(f'{label:<14} first={timings[0]:9.1f}ms  '
+          f'median={statistics.median(timings):9.2f}ms  '
+          f'mean={statistics.mean(timings):9.2f}ms  '
+          f'rss +{rss_after - rss_before:7.1f}MB')
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=20)
+    args = parser.parse_args()
+
+    from utils.agent_container import AgentContainer
+
+    print(f'Simulating {args.requests} requests (pid {os.getpid()}, rss {_rss_mb():.1f}MB)')
+    container = AgentContainer()
+    _run('shared', lambda: _shared(container), args.requests)
+    _run('per-request', _per_request, args.requests)
+
+
+if __name__ == '__main__':
+    main()
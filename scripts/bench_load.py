@@ -0,0 +1,219 @@
+#!/usr/bin/env python
+"""End-to-end load benchmark for the web app (pair with scripts/mock_ollama.py).
+
+Each virtual user logs in through the dev login (the app must run with
+SKIP_AUTH=true), then loops over the selected scenarios:
+
+    analyze    POST /api/analyze
+    create     POST /api/project/create (project deleted afterwards)
+    customize  POST /api/customize-code
+    socket     'customize_code' over Socket.IO, waits for customization_result
+    execute    'execute' over Socket.IO on the user's project, waits for execution_finished
+
+Reports per-scenario p50/p95/p99 latency, throughput and errors.
+
+Usage:
+    python scripts/mock_ollama.py --port 11435 &
+    SKIP_AUTH=true OLLAMA_BASE_URL=http://localhost:11435 python run.py &
+    python scripts/bench_load.py --url http://localhost:8001 --users 8 --iterations 5
+"""
+import sys
+import time
+import uuid
+import argparse
+import threading
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+SCENARIOS = ('analyze', 'create', 'customize', 'socket', 'execute')
+
+REQUIREMENTS = 'A small Flask REST API to manage a todo list with SQLite storage and user login.'
+CODE = 'def add(a, b):\n    return a + b\n'
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+
+    def timed(self, name, fn):
+        start = time.perf_counter()
+        try:
+            fn()
+        except Exception as e:
+            with self._lock:
+                self.errors.setdefault(name, []).append(str(e)[:200])
+            return False
+        with self._lock:
+            self.latencies.setdefault(name, []).append(time.perf_counter() - start)
+        return True
+
+
+class VirtualUser:
+    def __init__(self, base_url, timeout):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.http = requests.Session()
+        self.project = f'bench-{uuid.uuid4().hex[:8]}'
+        self.analysis = None
+        self._sio = None
+        self._exec_project = None
+
+    def login(self):
+        resp = self.http.get(f'{self.base_url}/auth/google', timeout=self.timeout)
+        resp.raise_for_status()
+        if self.http.get(f'{self.base_url}/auth/me', timeout=self.timeout).status_code != 200:
+            raise RuntimeError('dev login failed; is the app running with SKIP_AUTH=true?')
+
+    def _post(self, path, body):
+        resp = self.http.post(f'{self.base_url}{path}', json=body, timeout=self.timeout)
+        data = resp.json()
+        if resp.status_code != 200 or not data.get('success'):
+            raise RuntimeError(f'{path}: {resp.status_code} {data.get("error")}')
+        return data
+
+    def analyze(self):
+        self.analysis = self._post('/api/analyze', {'requirements': REQUIREMENTS})['analysis']
+
+    def create(self):
+        if self.analysis is None:
+            self.analyze()
+        name = f'{self.project}-{uuid.uuid4().hex[:4]}'
+        self._post('/api/project/create', {
+            'projectName': name, 'framework': 'flask',
+            'analysis': self.analysis, 'requirements': REQUIREMENTS,
+        })
+        self.http.delete(f'{self.base_url}/api/project/{name}', timeout=self.timeout)
+
+    def customize(self):
+        self._post('/api/customize-code', {
+            'currentCode': CODE, 'customizationRequest': 'Add type hints and a docstring',
+            'projectName': self.project, 'filePath': 'main.py',
+        })
+
+    def _socket(self):
+        if self._sio is None:
+            import socketio
+            sio = socketio.Client(reconnection=False)
+            cookie = '; '.join(f'{k}={v}' for k, v in self.http.cookies.items())
+            sio.connect(self.base_url, headers={'Cookie': cookie}, wait_timeout=self.timeout)
+            self._sio = sio
+        return self._sio
+
+    def _emit_and_wait(self, event, payload, done, failed):
+        sio = self._socket()
+        finished = threading.Event()
+        outcome = {}
+
+        def on_done(data=None):
+            outcome['ok'] = True
+            finished.set()
+
+        def on_failed(data=None):
+            outcome['error'] = (data or {}).get('error', failed)
+            finished.set()
+
+        sio.on(done, on_done)
+        sio.on(failed, on_failed)
+        sio.emit(event, payload)
+        if not finished.wait(self.timeout):
+            raise TimeoutError(f'no {done} within {self.timeout}s')
+        if 'error' in outcome:
+            raise RuntimeError(outcome['error'])
+
+    def socket_customize(self):
+        self._emit_and_wait('customize_code', {
+            'currentCode': CODE, 'customizationRequest': 'Add input validation',
+            'projectName': self.project, 'filePath': 'main.py', 'newSession': True,
+        }, 'customization_result', 'customization_error')
+
+    def execute(self):
+        if not self._exec_project:
+            if self.analysis is None:
+                self.analyze()
+            self._post('/api/project/create', {
+                'projectName': self.project, 'framework': 'fastapi',
+                'analysis': self.analysis, 'requirements': REQUIREMENTS,
+            })
+            self._exec_project = self.project
+        self._emit_and_wait('execute', {'projectName': self.project, 'command': 'test'},
+                            'execution_finished', 'execution_error')
+
+    def close(self):
+        if self._exec_project:
+            try:
+                self.http.delete(f'{self.base_url}/api/project/{self._exec_project}', timeout=self.timeout)
+            except requests.RequestException:
+                pass
+        if self._sio is not None:
+            self._sio.disconnect()
+
+
+def _run_user(args, scenarios, recorder):
+    user = VirtualUser(args.url, args.timeout)
+    if not recorder.timed('login', user.login):
+        return
+    actions = {
+        'analyze': user.analyze, 'create': user.create, 'customize': user.customize,
+        'socket': user.socket_customize, 'execute': user.execute,
+    }
+    try:
+        for _ in range(args.iterations):
+            for name in scenarios:
+                recorder.timed(name, actions[name])
+    finally:
+        user.close()
+
+
+def _percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p * len(values)))]
+
+
+def _report(recorder, elapsed):
+    print(f'\n{"scenario":<10} {"ok":>5} {"err":>5} {"p50":>8} {"p95":>8} {"p99":>8} {"mean":>8} {"req/s":>7}')
+    names = sorted(set(recorder.latencies) | set(recorder.errors))
+    for name in names:
+        lat = recorder.latencies.get(name, [])
+        errors = len(recorder.errors.get(name, []))
+        if lat:
+            stats = ' '.join(f'{_percentile(lat, p):8.3f}' for p in (0.5, 0.95, 0.99))
+            stats += f' {statistics.mean(lat):8.3f}'
+        else:
+            stats = ' '.join(f'{"-":>8}' for _ in range(4))
+        print(f'{name:<10} {len(lat):>5} {errors:>5} {stats} {len(lat) / elapsed:7.2f}')
+    total = sum(len(v) for v in recorder.latencies.values())
+    print(f'\n{total} requests in {elapsed:.1f}s ({total / elapsed:.2f} req/s)')
+    for name, errors in recorder.errors.items():
+        print(f'  {name} first error: {errors[0]}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://localhost:8001')
+    parser.add_argument('--users', type=int, default=4, help='concurrent virtual users')
+    parser.add_argument('--iterations', type=int, default=3, help='scenario loops per user')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='comma-separated subset of ' + ', '.join(SCENARIOS))
+    parser.add_argument('--timeout', type=float, default=300.0, help='per-request timeout in seconds')
+    args = parser.parse_args()
+
+    scenarios = [s for s in args.scenarios.split(',') if s]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f'unknown scenarios: {", ".join(sorted(unknown))}')
+
+    recorder = Recorder()
+    print(f'{args.users} users x {args.iterations} iterations of {", ".join(scenarios)} against {args.url}')
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.users) as pool:
+        for future in [pool.submit(_run_user, args, scenarios, recorder) for _ in range(args.users)]:
+            future.result()
+    _report(recorder, time.perf_counter() - start)
+    return 1 if recorder.errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+"""Benchmark process startup: create_app(), legacy app.py import and Celery worker boot.
+
+Each measurement runs in a fresh interpreter so import caches do not carry
+over. For each scenario it reports wall time (mean/min/max) and resident
+memory at the end. ``first_query`` times the first RAGSystem query, which
+is where the embedding model is now loaded. ``--preload`` repeats every
+scenario with RAG_PRELOAD_EMBEDDINGS=true for comparison.
+
+Usage: python scripts/bench_startup.py [--repeat 3] [--config testing] [--preload] [--real-worker]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PRELUDE = '''
+import os, sys, time, json, resource
+sys.path.insert(0, {root!r})
+os.chdir({root!r})
+start = time.perf_counter()
+'''
+
+EPILOGUE = '''
+elapsed = time.perf_counter() - start
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print('BENCH ' + json.dumps({{'seconds': elapsed, 'rss_mb': rss}}))
+'''
+
+SCENARIOS = {
+    'create_app': '''
+from app import create_app
+create_app({config!r})
+''',
+    'legacy_app': '''
+import importlib.util
+spec = importlib.util.spec_from_file_location('legacy_app', os.path.join({root!r}, 'app.py'))
+spec.loader.exec_module(importlib.util.module_from_spec(spec))
+''',
+    'celery_worker': '''
+from celery.signals import worker_init
+from celery_app import celery_app
+celery_app.loader.import_default_modules()
+import celery_app.tasks  # noqa: F401
+worker_init.send(sender=None)
+''',
+    'first_query': '''
+from utils.rag_system import RAGSystem
+RAGSystem().query('flask app.py implementation', 'code_examples')
+''',
+}
+
+
+def _run_script(body, env, timeout):
+    code = PRELUDE.format(root=ROOT) + body + EPILOGUE.format()
+    proc = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True, timeout=timeout)
+    for line in proc.stdout.splitlines():
+        if line.startswith('BENCH '):
+            return json.loads(line[6:])
+    raise RuntimeError((proc.stderr or proc.stdout).strip().splitlines()[-1] if (proc.stderr or proc.stdout) else
+                       f'exit code {proc.returncode}')
+
+
+def _run_real_worker(env, timeout):
+    """Start an actual solo-pool worker and time it until it reports ready."""
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'celery', '-A', 'celery_app', 'worker', '--pool=solo',
+         '--loglevel=info', '-Q', 'bench-startup', '-n', f'bench-{os.getpid()}@%h'],
+        cwd=ROOT, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+    )
+    try:
+        deadline = start + timeout
+        for line in proc.stdout:
+            if 'ready.' in line:
+                return {'seconds': time.perf_counter() - start, 'rss_mb': None}
+            if time.perf_counter() > deadline:
+                break
+        raise RuntimeError('worker did not report ready')
+    finally:
+        proc.terminate()
+        proc.wait(10)
+
+
+def _measure(name, body, env, repeat, timeout, real_worker=False):
+    runs, error = [], None
+    for _ in range(repeat):
+        try:
+            runs.append(_run_real_worker(env, timeout) if real_worker else _run_script(body, env, timeout))
+        except Exception as e:
+            error = str(e)
+            break
+    if not runs:
+        print(f'{name:<24} failed: {error}')
+        return
+    seconds = [r['seconds'] for r in runs]
+    rss = runs[-1]['rss_mb']
+    rss_text = f'{rss:8.0f}' if rss is not None else f'{"-":>8}'
+    print(f'{name:<24} {statistics.mean(seconds):8.2f} {min(seconds):8.2f} {max(seconds):8.2f} {rss_text}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--config', default='testing', help='create_app config name')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--preload', action='store_true', help='also run with RAG_PRELOAD_EMBEDDINGS=true')
+    parser.add_argument('--real-worker', action='store_true', help='boot a real Celery worker (needs the broker)')
+    parser.add_argument('--timeout', type=float, default=300.0)
+    args = parser.parse_args()
+
+    base_env = dict(os.environ, TOKENIZERS_PARALLELISM='false', LLM_WARMUP_ON_START='false')
+    variants = [('', dict(base_env, RAG_PRELOAD_EMBEDDINGS='false'))]
+    if args.preload:
+        variants.append((' +preload', dict(base_env, RAG_PRELOAD_EMBEDDINGS='true')))
+
+    print(f'{"scenario":<24} {"mean s":>8} {"min s":>8} {"max s":>8} {"rss MB":>8}')
+    for suffix, env in variants:
+        for name in [s for s in args.scenarios.split(',') if s]:
+            body = SCENARIOS[name].format(root=ROOT, config=args.config)
+            _measure(name + suffix, body, env, args.repeat, args.timeout)
+        if args.real_worker:
+            _measure('celery_worker_real' + suffix, None, env, args.repeat, args.timeout, real_worker=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,250 @@
+#!/usr/bin/env python
+"""Local stand-in for the Ollama HTTP API, for load tests without a real LLM.
+
+Implements /api/tags, /api/pull, /api/generate and /api/chat (streaming and
+non-streaming) with a simulated model: a one-off load delay per model,
+prefill time proportional to the prompt, a fixed token rate and a cap on
+parallel requests (like OLLAMA_NUM_PARALLEL). Responses are canned: JSON
+mode returns a requirements analysis or a file structure, everything else a
+small code block. ``--responses`` points to a JSON object mapping prompt
+substrings to replacement responses.
+
+Usage:
+    python scripts/mock_ollama.py --port 11435 --tokens-per-second 40
+    OLLAMA_BASE_URL=http://localhost:11435 python run.py
+"""
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_MODELS = ['qwen2.5-coder:7b', 'qwen2.5-coder:3b']
+
+ANALYSIS = {
+    'project_type': 'web application',
+    'description': 'Mock project generated by the mock Ollama server',
+    'features': [{'name': 'CRUD API', 'description': 'Create, read, update, delete items', 'priority': 'high'}],
+    'database_required': True,
+    'database_type': 'sql',
+    'has_frontend': False,
+    'suggested_frameworks': ['flask'],
+    'suggested_packages': ['flask'],
+    'file_structure': [
+        {'path': 'app.py', 'type': 'file', 'description': 'Main application'},
+        {'path': 'models.py', 'type': 'file', 'description': 'Data models'},
+    ],
+}
+FILE_STRUCTURE = {'files': ANALYSIS['file_structure']}
+CODE = '```python\nimport logging\n\nlogger = logging.getLogger(__name__)\n\n\ndef main():\n    ' \
+       'logger.info("mock")\n    print("hello from the mock model")\n\n\nif __name__ == "__main__":\n    main()\n```\n'
+
+
+class MockModel:
+    """Latency model shared by all handler threads."""
+
+    def __init__(self, models=None, tokens_per_second=40.0, prefill_tokens_per_second=800.0,
+                 load_seconds=2.0, latency=0.0, parallel=4, responses=None):
+        self.models = models or DEFAULT_MODELS
+        self.tokens_per_second = tokens_per_second
+        self.prefill_tokens_per_second = prefill_tokens_per_second
+        self.load_seconds = load_seconds
+        self.latency = latency
+        self.responses = responses or {}
+        self._slots = threading.BoundedSemaphore(max(1, parallel))
+        self._loaded = set()
+        self._lock = threading.Lock()
+        self.requests = 0
+
+    def respond_to(self, prompt, fmt):
+        for needle, response in self.responses.items():
+            if needle in prompt:
+                return response if isinstance(response, str) else json.dumps(response)
+        if fmt:
+            return json.dumps(FILE_STRUCTURE if 'file structure' in prompt.lower() else ANALYSIS)
+        return CODE
+
+    def load(self, model):
+        """Seconds of load time this request pays (first use of a model only)."""
+        with self._lock:
+            self.requests += 1
+            if model in self._loaded:
+                return 0.0
+            self._loaded.add(model)
+        return self.load_seconds
+
+
+def _tokens(text):
+    # Roughly one token per 4 characters, split on whitespace boundaries.
+    words = text.split(' ')
+    chunk = max(1, len(words) // max(1, len(text) // 4 or 1))
+    return [' '.join(words[i:i + chunk]) + (' ' if i + chunk < len(words) else '')
+            for i in range(0, len(words), chunk)]
+
+
+def make_handler(model_state):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def _json(self, body, status=200):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _start_stream(self):
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/x-ndjson')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+
+        def _chunk(self, obj):
+            data = (json.dumps(obj) + '\n').encode()
+            self.wfile.write(f'{len(data):x}\r\n'.encode() + data + b'\r\n')
+            self.wfile.flush()
+
+        def _end_stream(self):
+            self.wfile.write(b'0\r\n\r\n')
+            self.wfile.flush()
+
+        def _body(self):
+            length = int(self.headers.get('Content-Length', 0))
+            try:
+                return json.loads(self.rfile.read(length) or b'{}')
+            except ValueError:
+                return {}
+
+        def do_GET(self):
+            if self.path.rstrip('/') == '/api/tags':
+                return self._json({'models': [{'name': m, 'model': m, 'size': 0} for m in model_state.models]})
+            if self.path.rstrip('/') == '/api/ps':
+                return self._json({'models': [{'name': m} for m in sorted(model_state._loaded)]})
+            self._json({'error': 'not found'}, 404)
+
+        def do_POST(self):
+            payload = self._body()
+            path = self.path.rstrip('/')
+            if path == '/api/pull':
+                name = payload.get('name') or payload.get('model')
+                if name and name not in model_state.models:
+                    model_state.models.append(name)
+                if payload.get('stream', True):
+                    self._start_stream()
+                    for status in ('pulling manifest', 'verifying sha256 digest', 'success'):
+                        self._chunk({'status': status})
+                    return self._end_stream()
+                return self._json({'status': 'success'})
+            if path == '/api/generate':
+                return self._generate(payload, payload.get('prompt', ''), chat=False)
+            if path == '/api/chat':
+                prompt = '\n'.join(m.get('content', '') for m in payload.get('messages', []))
+                return self._generate(payload, prompt, chat=True)
+            self._json({'error': 'not found'}, 404)
+
+        def _generate(self, payload, prompt, chat):
+            model = payload.get('model', '')
+            if model not in model_state.models:
+                return self._json({'error': f"model '{model}' not found, try pulling it first"}, 404)
+            started = time.monotonic()
+            with model_state._slots:
+                queued = time.monotonic() - started
+                load = model_state.load(model)
+                context = payload.get('context') or []
+                prompt_tokens = len(prompt) // 4 + 1
+                prefill = prompt_tokens / model_state.prefill_tokens_per_second
+                time.sleep(model_state.latency + load + prefill)
+                if not prompt and not chat:
+                    # Empty prompt: Ollama just loads the model.
+                    return self._json({'model': model, 'response': '', 'done': True,
+                                       'load_duration': int(load * 1e9), 'total_duration': int(load * 1e9)})
+                text = model_state.respond_to(prompt, payload.get('format'))
+                tokens = _tokens(text)
+                per_token = 1.0 / model_state.tokens_per_second
+                num_predict = (payload.get('options') or {}).get('num_predict')
+                if num_predict:
+                    tokens = tokens[:num_predict]
+                eval_duration = len(tokens) * per_token
+                final = {
+                    'model': model, 'done': True, 'done_reason': 'stop',
+                    'context': list(context) + list(range(prompt_tokens + len(tokens))),
+                    'prompt_eval_count': prompt_tokens, 'prompt_eval_duration': int(prefill * 1e9),
+                    'eval_count': len(tokens), 'eval_duration': int(eval_duration * 1e9),
+                    'load_duration': int(load * 1e9),
+                    'total_duration': int((queued + load + prefill + eval_duration + model_state.latency) * 1e9),
+                }
+                if not payload.get('stream', True):
+                    time.sleep(eval_duration)
+                    body = {'message': {'role': 'assistant', 'content': ''.join(tokens)}} if chat \
+                        else {'response': ''.join(tokens)}
+                    return self._json(dict(final, **body))
+                self._start_stream()
+                try:
+                    for token in tokens:
+                        time.sleep(per_token)
+                        part = {'message': {'role': 'assistant', 'content': token}} if chat else {'response': token}
+                        self._chunk(dict(part, model=model, done=False))
+                    done = dict(final, message={'role': 'assistant', 'content': ''}) if chat \
+                        else dict(final, response='')
+                    self._chunk(done)
+                    self._end_stream()
+                except (BrokenPipeError, ConnectionResetError):
+                    # Client closed the stream early (e.g. JSON completed).
+                    pass
+
+    return Handler
+
+
+def create_server(host='127.0.0.1', port=0, **model_kwargs):
+    """Build (but do not start) a mock server; port 0 picks a free port."""
+    server = ThreadingHTTPServer((host, port), make_handler(MockModel(**model_kwargs)))
+    server.daemon_threads = True
+    return server
+
+
+def start_in_thread(**kwargs):
+    """Start a mock server in a daemon thread; returns (server, base_url)."""
+    server = create_server(**kwargs)
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f'http://{host}:{port}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=11435)
+    parser.add_argument('--models', default=','.join(DEFAULT_MODELS), help='comma-separated model names')
+    parser.add_argument('--tokens-per-second', type=float, default=40.0)
+    parser.add_argument('--prefill-tokens-per-second', type=float, default=800.0)
+    parser.add_argument('--load-seconds', type=float, default=2.0, help='first-use load time per model')
+    parser.add_argument('--latency', type=float, default=0.0, help='fixed extra latency per request')
+    parser.add_argument('--parallel', type=int, default=4, help='concurrent requests served (others queue)')
+    parser.add_argument('--responses', help='JSON file mapping prompt substrings to canned responses')
+    args = parser.parse_args()
+
+    responses = None
+    if args.responses:
+        with open(args.responses) as f:
+            responses = json.load(f)
+    server = create_server(
+        args.host, args.port,
+        models=[m for m in args.models.split(',') if m],
+        tokens_per_second=args.tokens_per_second,
+        prefill_tokens_per_second=args.prefill_tokens_per_second,
+        load_seconds=args.load_seconds, latency=args.latency,
+        parallel=args.parallel, responses=responses,
+    )
+    print(f'Mock Ollama listening on http://{args.host}:{server.server_address[1]}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
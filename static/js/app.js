@@ -519,7 +519,11 @@ const App = {
 
         this._showLoading('Analyzing requirements with AI...');
         try {
-            const data = await API.analyzeRequirements(requirements);
+            // Stream over the socket when connected so the analysis appears as it is generated
+            const data = Socket.isConnected()
+                ? await Socket.analyze({ name, requirements, framework: this.selectedFramework },
+                                       (chunk) => this._appendLoadingStream(chunk))
+                : await API.analyzeRequirements(requirements);
             if (data.success) {
                 this.analysis = data.analysis;
                 this._renderAnalysis(data.analysis);
@@ -696,11 +700,29 @@ const App = {
         }
 
         this._showTyping(true);
+        // Streamed code is shown in a temporary chat bubble until the final result arrives
+        let bubble = null;
+        const onChunk = (chunk) => {
+            if (!bubble) {
+                this._showTyping(false);
+                bubble = this._addChatMessage('', 'ai');
+                if (bubble) bubble.classList.add('streaming');
+            }
+            if (bubble) {
+                bubble.textContent += chunk;
+                bubble.scrollTop = bubble.scrollHeight;
+                bubble.parentElement.scrollTop = bubble.parentElement.scrollHeight;
+            }
+        };
         try {
-            const data = await API.customizeCode(
-                this.currentProject, this.currentFile, Editor.getValue(), msg
-            );
+            const data = Socket.isConnected()
+                ? await Socket.customize({
+                    projectName: this.currentProject, filePath: this.currentFile,
+                    currentCode: Editor.getValue(), customizationRequest: msg
+                }, onChunk)
+                : await API.customizeCode(this.currentProject, this.currentFile, Editor.getValue(), msg);
             this._showTyping(false);
+            if (bubble) bubble.remove();
             if (data.success && data.code) {
                 Editor.setValue(data.code);
                 this.markTabModified(this.currentFile, true);
@@ -711,6 +733,7 @@ const App = {
             }
         } catch(e) {
             this._showTyping(false);
+            if (bubble) bubble.remove();
             this._addChatMessage(`Error: ${e.message}`, 'ai');
             Notify.error('AI customization failed');
         }
@@ -746,6 +769,7 @@ const App = {
         div.textContent = text;
         container.appendChild(div);
         container.scrollTop = container.scrollHeight;
+        return div;
     },
 
     // ─── Settings ─────────────────────────────────────────────────────────────
@@ -865,7 +889,20 @@ const App = {
 
     _hideLoading() {
         const overlay = document.getElementById('loading-overlay');
+        const stream = document.getElementById('loading-stream');
         if (overlay) overlay.classList.add('hidden');
+        if (stream) {
+            stream.textContent = '';
+            stream.classList.add('hidden');
+        }
+    },
+
+    _appendLoadingStream(chunk) {
+        const stream = document.getElementById('loading-stream');
+        if (!stream) return;
+        stream.classList.remove('hidden');
+        stream.textContent += chunk;
+        stream.scrollTop = stream.scrollHeight;
     },
 
     _setText(id, text) {
@@ -76,6 +76,11 @@ const Socket = {
         this.io.on('analysis_result', (data) => { this._emit('analysis_result', data); });
         this.io.on('analysis_progress', (data) => { this._emit('analysis_progress', data); });
         this.io.on('analysis_error', (data) => { this._emit('analysis_error', data); });
+
+        // Customization events (streamed)
+        this.io.on('customization_progress', (data) => { this._emit('customization_progress', data); });
+        this.io.on('customization_result', (data) => { this._emit('customization_result', data); });
+        this.io.on('customization_error', (data) => { this._emit('customization_error', data); });
     },
 
     execute(projectName, fileName) {
@@ -87,6 +92,37 @@ const Socket = {
         return true;
     },
 
+    /**
+     * Emit `event` and resolve with the `<prefix>_result` payload, passing
+     * each streamed `<prefix>_progress` chunk to `onChunk` as it arrives.
+     * Rejects on `<prefix>_error` or if the connection drops.
+     */
+    stream(event, payload, prefix, onChunk) {
+        return new Promise((resolve, reject) => {
+            if (!this.io || !this.connected) {
+                reject(new Error('Not connected to server'));
+                return;
+            }
+            const handlers = {
+                [`${prefix}_progress`]: (data) => { if (onChunk && data && data.chunk) onChunk(data.chunk); },
+                [`${prefix}_result`]: (data) => { cleanup(); resolve(data); },
+                [`${prefix}_error`]: (data) => { cleanup(); reject(new Error((data && data.error) || 'Request failed')); },
+                disconnected: () => { cleanup(); reject(new Error('Connection lost')); }
+            };
+            const cleanup = () => Object.entries(handlers).forEach(([e, h]) => this.off(e, h));
+            Object.entries(handlers).forEach(([e, h]) => this.on(e, h));
+            this.io.emit(event, payload);
+        });
+    },
+
+    analyze(payload, onChunk) {
+        return this.stream('analyze_requirements', payload, 'analysis', onChunk);
+    },
+
+    customize(payload, onChunk) {
+        return this.stream('customize_code', payload, 'customization', onChunk);
+    },
+
     stop() {
         if (!this.io) return;
         this.io.emit('stop_execution');
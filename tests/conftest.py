@@ -1,8 +1,11 @@
 import os
 import sys
+import time
 import shutil
+import fnmatch
 import pytest
 import tempfile
+import threading
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -10,6 +13,83 @@ from app import create_app
 from app.extensions import db as _db
 
 
+class FakeRedis(dict):
+    """In-memory stand-in for the subset of the redis-py API the utils use.
+
+    Keys live in the dict itself; ``ex``/``setex``/``expire`` TTLs are
+    honoured on read. ``writes`` counts set/setex calls.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.expires = {}
+        self.writes = 0
+        self._lock = threading.Lock()
+
+    def __bool__(self):
+        # A client is truthy even when empty; the utils test ``if redis:``.
+        return True
+
+    def _purge(self):
+        now = time.monotonic()
+        with self._lock:
+            for key in [k for k, at in self.expires.items() if at <= now]:
+                self.pop(key, None)
+                del self.expires[key]
+
+    def _store(self, key, value, ttl):
+        with self._lock:
+            self[key] = value
+            self.writes += 1
+            if ttl is None:
+                self.expires.pop(key, None)
+            else:
+                self.expires[key] = time.monotonic() + ttl
+
+    def get(self, key, default=None):
+        self._purge()
+        return super().get(key, default)
+
+    def mget(self, keys):
+        return [self.get(k) for k in keys]
+
+    def set(self, key, value, nx=False, ex=None):
+        self._purge()
+        if nx and key in self:
+            return None
+        self._store(key, value, ex)
+        return True
+
+    def setex(self, key, ttl, value):
+        self._store(key, value, ttl)
+        return True
+
+    def expire(self, key, ttl):
+        with self._lock:
+            if key not in self:
+                return False
+            self.expires[key] = time.monotonic() + ttl
+            return True
+
+    def exists(self, key):
+        self._purge()
+        return int(key in self)
+
+    def delete(self, key):
+        with self._lock:
+            self.expires.pop(key, None)
+            return int(self.pop(key, None) is not None)
+
+    def scan_iter(self, pattern='*'):
+        self._purge()
+        return [k for k in list(self) if fnmatch.fnmatchcase(k, pattern)]
+
+
+@pytest.fixture
+def fake_redis():
+    return FakeRedis()
+
+
 @pytest.fixture(scope='session')
 def app():
     test_app = create_app('testing')
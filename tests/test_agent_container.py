@@ -0,0 +1,58 @@
+"""Tests for the shared agent container."""
+import threading
+
+from utils.agent_container import AgentContainer, get_process_container, reset_process_container
+
+
+class TestAgentContainer:
+    def test_components_are_reused(self, tmp_path):
+        container = AgentContainer(str(tmp_path))
+        assert container.model_manager is container.model_manager
+        assert container.file_manager is container.file_manager
+        assert container.file_manager.base_dir == str(tmp_path)
+
+    def test_concurrent_access_builds_once(self, tmp_path):
+        container = AgentContainer(str(tmp_path))
+        built = []
+
+        def factory():
+            built.append(1)
+            return object()
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(container._get('thing', factory)))
+                   for _ in range(10)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(built) == 1
+        assert all(r is results[0] for r in results)
+
+    def test_failed_construction_is_retried(self, tmp_path):
+        container = AgentContainer(str(tmp_path))
+        calls = []
+
+        def factory():
+            calls.append(1)
+            if len(calls) == 1:
+                raise RuntimeError('boom')
+            return 'ok'
+
+        try:
+            container._get('flaky', factory)
+        except RuntimeError:
+            pass
+        assert container._get('flaky', factory) == 'ok'
+
+    def test_process_container_is_singleton(self):
+        reset_process_container()
+        assert get_process_container() is get_process_container()
+        reset_process_container()
+
+    def test_app_container_is_scoped_per_app(self, app):
+        from app.services.agent_service import get_agent_container
+        with app.app_context():
+            container = get_agent_container()
+            assert container is get_agent_container()
+            assert container.projects_dir == app.config['PROJECTS_DIR']
@@ -0,0 +1,107 @@
+"""Tests for cancelling in-flight LLM generations."""
+import threading
+import time
+
+import pytest
+
+from scripts.mock_ollama import start_in_thread
+from utils.cancellation import CancelToken, CancellationRegistry, GenerationCancelled, cancellation_scope
+from utils.llm_scheduler import AdmissionScheduler
+from utils.model_manager import ModelManager
+from utils.single_flight import SingleFlight
+
+
+@pytest.fixture
+def slow_ollama(monkeypatch):
+    """Mock server with a 5 s prefill and 5 tokens/s, so calls outlive the test."""
+    server, url = start_in_thread(latency=5, tokens_per_second=5, load_seconds=0)
+    monkeypatch.setenv('OLLAMA_BASE_URL', url)
+    monkeypatch.delenv('OLLAMA_BASE_URLS', raising=False)
+    mm = ModelManager()
+    mm._redis = False
+    yield mm
+    server.shutdown()
+    server.server_close()
+
+
+def _cancel_after(token, delay):
+    threading.Timer(delay, token.cancel, args=('test',)).start()
+
+
+class TestModelManagerCancellation:
+    def test_generate_cancelled_during_prefill(self, slow_ollama):
+        token = CancelToken()
+        _cancel_after(token, 0.3)
+        start = time.monotonic()
+        with pytest.raises(GenerationCancelled):
+            slow_ollama.generate(prompt='hi', model='qwen2.5-coder:7b', coalesce=False,
+                                 fallback=False, cancel_token=token)
+        assert time.monotonic() - start < 1.5
+        assert slow_ollama.scheduler.stats()['qwen2.5-coder:7b']['active'] == 0
+
+    def test_stream_cancelled_via_scope(self, slow_ollama):
+        token = CancelToken()
+        _cancel_after(token, 0.3)
+        start = time.monotonic()
+        with cancellation_scope(token), pytest.raises(GenerationCancelled):
+            list(slow_ollama.generate_stream(prompt='hi', model='qwen2.5-coder:7b'))
+        assert time.monotonic() - start < 1.5
+        assert slow_ollama.scheduler.stats()['qwen2.5-coder:7b']['active'] == 0
+
+
+class TestSchedulerCancellation:
+    def test_queued_waiter_leaves_queue(self):
+        scheduler = AdmissionScheduler(max_concurrency=1)
+        held = scheduler.acquire('m', 'interactive')
+        token = CancelToken()
+        _cancel_after(token, 0.1)
+        with pytest.raises(GenerationCancelled):
+            scheduler.acquire('m', 'interactive', cancel_token=token)
+        scheduler.release('m', held)
+        assert scheduler.stats()['m']['active'] == 0
+
+
+class TestSingleFlightCancellation:
+    def test_shared_call_cancelled_only_when_all_callers_cancel(self):
+        sf = SingleFlight()
+        started, shared = threading.Event(), []
+        tokens = [CancelToken(), CancelToken()]
+        errors = []
+
+        def work():
+            from utils.cancellation import current_token
+            shared.append(current_token())
+            started.set()
+            current_token().wait(5)
+            current_token().raise_if_cancelled()
+            return 'done'
+
+        def caller(token):
+            try:
+                sf.do('k', work, cancel_token=token)
+            except GenerationCancelled as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=caller, args=(t,)) for t in tokens]
+        threads[0].start()
+        started.wait(1)
+        threads[1].start()
+        time.sleep(0.05)
+        tokens[0].cancel()
+        time.sleep(0.1)
+        assert not shared[0].cancelled
+        tokens[1].cancel()
+        for t in threads:
+            t.join(1)
+        assert shared[0].cancelled and len(errors) == 2
+
+
+class TestCancellationRegistry:
+    def test_redis_flag_cancels_other_process(self, fake_redis):
+        redis = fake_redis
+        registry = CancellationRegistry(poll_interval=0.05)
+        with registry.scope('task-1', redis=redis) as token:
+            CancellationRegistry().request_cancel('task-1', redis, 'revoked')
+            assert token.wait(1)
+            assert token.reason == 'revoked'
+        assert registry.stats() == {'active': 0, 'cancelled': 1}
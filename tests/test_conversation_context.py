@@ -0,0 +1,100 @@
+"""Tests for context reuse across customization turns."""
+import pytest
+
+from agents.customizer import CodeCustomizer
+from utils.conversation_context import ConversationStore, code_delta, session_key
+from utils.model_manager import ModelManager
+
+
+class _FakeRAG:
+    def query(self, text, collection):
+        return 'reference snippet ' * 50
+
+
+def _customizer(monkeypatch):
+    mm = ModelManager()
+    mm._redis = False
+    mm._active_model = 'qwen2.5-coder:7b'
+    monkeypatch.setattr(mm, 'model_for', lambda task=None: 'qwen2.5-coder:7b')
+    sent = []
+
+    def fake_request(endpoint, method='POST', payload=None):
+        sent.append(payload)
+        turn = len(sent)
+        return {'response': f'```\nprint({turn})\n```', 'context': list(range(100 * turn)),
+                'prompt_eval_count': len(payload['prompt']) // 3}
+
+    monkeypatch.setattr(mm, '_make_request', fake_request)
+    return CodeCustomizer(mm, _FakeRAG()), sent
+
+
+class TestCodeDelta:
+    def test_unchanged_and_small_edit(self):
+        code = '\n'.join(f'line {i}' for i in range(50))
+        assert code_delta(code, code) == ''
+        edited = code.replace('line 10', 'line ten')
+        assert '+line ten' in code_delta(code, edited)
+
+    def test_large_rewrite_not_worth_a_diff(self):
+        assert code_delta('a\nb\nc', 'x\ny\nz') is None
+
+
+class TestCustomizationSessions:
+    def test_followup_sends_only_delta_with_context(self, monkeypatch):
+        customizer, sent = _customizer(monkeypatch)
+        key = session_key(1, '', 'app.py')
+        code = '\n'.join(f'value_{i} = {i}' for i in range(200))
+        first = customizer.customize(file_path='app.py', current_code=code,
+                                     customization_request='add logging', session_key=key)
+        assert 'context' not in sent[0]
+        customizer.customize(file_path='app.py', current_code=first,
+                             customization_request='rename x', session_key=key)
+        assert sent[1]['context'] == list(range(100))
+        assert 'value_199' not in sent[1]['prompt']
+        assert sent[1]['options']['num_ctx'] >= 100
+        report = customizer.session_report(key)
+        assert report['turns'] == 2
+        assert 0 < report['prefill_saved'] < 1
+
+    def test_model_change_restarts_session(self, monkeypatch):
+        customizer, sent = _customizer(monkeypatch)
+        key = session_key(1, '', 'app.py')
+        out = customizer.customize(file_path='app.py', current_code='x = 1',
+                                   customization_request='a', session_key=key)
+        session = customizer.sessions.get(key)
+        session['model'] = 'other:1b'
+        customizer.customize(file_path='app.py', current_code=out, customization_request='b', session_key=key)
+        assert 'context' not in sent[1]
+
+    def test_no_session_key_keeps_stateless_behaviour(self, monkeypatch):
+        customizer, sent = _customizer(monkeypatch)
+        customizer.customize(current_code='x = 1', customization_request='a')
+        customizer.customize(current_code='x = 1', customization_request='a')
+        assert all('context' not in p for p in sent)
+        assert customizer.sessions.stats()['turns'] == 0
+
+
+class TestCustomizerSafety:
+    def test_paths_outside_the_project_rejected_before_generating(self, monkeypatch):
+        customizer, sent = _customizer(monkeypatch)
+        for project, path in (('..', 'app.py'), ('demo', '../other/app.py'), ('demo', '/etc/passwd')):
+            with pytest.raises(ValueError):
+                customizer.customize(project_name=project, file_path=path, current_code='x = 1',
+                                     customization_request='a')
+        assert sent == []
+
+    def test_empty_output_raises_and_writes_nothing(self, monkeypatch):
+        customizer, _ = _customizer(monkeypatch)
+        monkeypatch.setattr(customizer.model_manager, '_make_request',
+                            lambda endpoint, method='POST', payload=None: {'response': '```\n```'})
+        with pytest.raises(RuntimeError):
+            customizer.customize(file_path='app.py', current_code='x = 1', customization_request='a')
+
+
+class TestConversationStore:
+    def test_lru_bound(self):
+        store = ConversationStore(max_sessions=2)
+        for i in range(3):
+            store.save(str(i), {'turns': i})
+        assert store.get('0') is None
+        assert store.get('2') == {'turns': 2}
@@ -400,6 +400,32 @@ class TestProjectEdgeCases:
 
             shutil.rmtree(proj_path, ignore_errors=True)
 
+    @pytest.mark.parametrize('error', ['stream', 'busy'])
+    def test_structure_falls_back_when_ollama_fails(self, tmp_path, monkeypatch, error):
+        from agents.project_creator import DEFAULT_STRUCTURES, ProjectCreator
+        from utils.file_manager import FileManager
+        from utils.llm_scheduler import LLMBusyError
+        from utils.model_manager import LLMStreamError, ModelManager
+
+        def down(**kwargs):
+            if error == 'busy':
+                raise LLMBusyError('queue full')
+            raise LLMStreamError('connection refused')
+
+        mm = ModelManager()
+        mm._redis = False
+        monkeypatch.setattr(mm, 'model_for', lambda task=None: 'qwen2.5-coder:7b')
+        monkeypatch.setattr(mm, 'generate_json', down)
+
+        class _RAG:
+            def query(self, text, collection):
+                return ''
+
+        creator = ProjectCreator(mm, _RAG(), FileManager(str(tmp_path)))
+        creator.create_project({'project_type': 'web app', 'features': []}, 'flask', 'offline')
+        for item in DEFAULT_STRUCTURES['flask']:
+            assert (tmp_path / 'offline' / item['path']).exists()
+
 
 # ══════════════════════════════════════════════════════════════════════════════
 # API response shapes
@@ -0,0 +1,82 @@
+"""Tests for the lazily loaded, process-shared embedding model."""
+import pytest
+
+from utils import embeddings
+from utils.embeddings import EmbeddingCache, LazyEmbeddingFunction, get_embedding_function
+from utils.rag_system import RAGSystem
+
+
+class _Vectors(list):
+    def tolist(self):
+        return list(self)
+
+
+class _FakeModel:
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, texts, **kwargs):
+        self.calls += 1
+        return _Vectors([1.0] * 3 for _ in texts)
+
+
+class TestLazyEmbeddings:
+    def test_rag_system_construction_loads_nothing(self):
+        rag = RAGSystem()
+        assert rag._client is None and rag._collections is None
+        assert not rag.embedding_function.loaded
+        assert RAGSystem().embedding_function is rag.embedding_function
+
+    def test_model_loaded_once_on_first_call(self, monkeypatch):
+        function = LazyEmbeddingFunction(cache=EmbeddingCache('test', path=''))
+        model = _FakeModel()
+        loads = []
+
+        def fake_load(self=function):
+            if self._model is None:
+                loads.append(1)
+                self._model = model
+            return self._model
+
+        monkeypatch.setattr(function, 'load', fake_load)
+        assert function(['a', 'b']) == [[1.0] * 3, [1.0] * 3]
+        function(['c'])
+        assert loads == [1] and model.calls == 2
+
+    def test_cpu_model_inherited_across_fork(self, monkeypatch):
+        monkeypatch.setattr(embeddings, '_shared', None)
+        parent = get_embedding_function()
+        parent._model = _FakeModel()
+        monkeypatch.setattr(embeddings.os, 'getpid', lambda: -1)
+        assert get_embedding_function() is parent
+        parent.device = 'cuda'
+        assert get_embedding_function() is not parent
+
+
+class TestEmbeddingCache:
+    def _function(self, path):
+        function = LazyEmbeddingFunction(cache=EmbeddingCache('test', path=path))
+        function._model = _FakeModel()
+        return function
+
+    def test_each_text_embedded_once(self):
+        function = self._function('')
+        assert function(['a', 'b']) == [[1.0] * 3, [1.0] * 3]
+        assert function(['b', 'a']) == [[1.0] * 3, [1.0] * 3]
+        function(['a', 'c'])
+        assert function._model.calls == 2
+        assert function.stats()['cache']['hits'] == 3
+
+    def test_disk_store_shared_across_instances(self, tmp_path):
+        path = str(tmp_path / 'embeddings.sqlite3')
+        self._function(path)(['flask app.py implementation'])
+        function = self._function(path)
+        assert function(['flask app.py implementation']) == [[1.0] * 3]
+        assert function._model.calls == 0
+        assert function.cache.stats()['disk_hits'] == 1
+
+    def test_vectors_round_trip_as_float16(self):
+        cache = EmbeddingCache('test', path='', max_entries=1)
+        stored = cache.put_many({'k1': [0.1, -2.5], 'k2': [1.0, 0.0]})
+        assert stored['k1'] == [pytest.approx(0.1, abs=1e-3), -2.5]
+        assert list(cache.get_many(['k1', 'k2'])) == ['k2']
@@ -0,0 +1,69 @@
+"""Tests for incremental LLM JSON parsing and repair."""
+import pytest
+
+from utils.json_repair import IncrementalJSONParser, repair_json, parse_llm_json, json_parse_stats
+from utils.model_manager import ModelManager
+
+
+class TestIncrementalJSONParser:
+    def test_detects_close_across_chunks(self):
+        parser = IncrementalJSONParser()
+        assert not parser.feed('Sure! {"a": "x}')
+        assert not parser.feed('", "b": [1, {"c": 2}')
+        assert parser.feed(']} trailing prose')
+        assert parser.text == '{"a": "x}", "b": [1, {"c": 2}]}'
+
+    def test_escaped_quotes_in_strings(self):
+        parser = IncrementalJSONParser()
+        assert parser.feed('{"a": "say \\"}\\" now"}')
+
+
+class TestRepair:
+    def test_truncated_string_and_brackets(self):
+        assert repair_json('{"a": [1, 2], "b": "hel') == {'a': [1, 2], 'b': 'hel'}
+
+    def test_dangling_key_is_dropped(self):
+        assert repair_json('{"a": 1, "b"') == {'a': 1}
+
+    def test_trailing_comma(self):
+        assert repair_json('[1, 2,]') == [1, 2]
+
+    def test_unrepairable(self):
+        with pytest.raises(ValueError):
+            repair_json('not json at all')
+
+
+class TestParseLLMJson:
+    def test_fenced_output(self):
+        assert parse_llm_json('```json\n{"x": 1}\n```') == {'x': 1}
+
+    def test_counts_repairs_and_failures(self):
+        before = json_parse_stats()
+        parse_llm_json('{"x": [1, 2')
+        with pytest.raises(ValueError):
+            parse_llm_json('')
+        after = json_parse_stats()
+        assert after['repaired'] == before['repaired'] + 1
+        assert after['failed'] == before['failed'] + 1
+
+
+class TestGenerateJson:
+    def test_stops_stream_once_object_closes(self, monkeypatch):
+        mm = ModelManager()
+        mm._redis = False
+        closed = []
+        payloads = []
+
+        def fake_stream(endpoint, payload=None, cancel_token=None):
+            payloads.append(payload)
+            try:
+                for piece in ['{"files": [', '{"path": "a.py", "type": "file"}', ']}', ' extra', ' more']:
+                    yield {'response': piece, 'done': False}
+            finally:
+                closed.append(True)
+
+        monkeypatch.setattr(mm, '_stream_request', fake_stream)
+        result = mm.generate_json(prompt='structure', model='m')
+        assert result == {'files': [{'path': 'a.py', 'type': 'file'}]}
+        assert payloads[0]['format'] == 'json'
+        assert closed == [True]
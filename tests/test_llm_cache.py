@@ -0,0 +1,66 @@
+"""Tests for the LLM response cache."""
+from utils.llm_cache import LLMResponseCache, make_cache_key
+from utils.model_manager import ModelManager
+
+
+class TestCacheKey:
+    def test_key_depends_on_sampling_options(self):
+        base = make_cache_key('m', 'p', None, 0.2, 100)
+        assert base == make_cache_key('m', 'p', None, 0.2, 100)
+        assert base != make_cache_key('m', 'p', None, 0.3, 100)
+        assert base != make_cache_key('m', 'p', None, 0.2, 200)
+        assert base != make_cache_key('m', 'p', 'sys', 0.2, 100)
+        assert base != make_cache_key('other', 'p', None, 0.2, 100)
+
+
+class TestLLMResponseCache:
+    def test_lru_eviction(self):
+        cache = LLMResponseCache(max_entries=2)
+        cache.set('a', '1')
+        cache.set('b', '2')
+        assert cache.get('a') == '1'
+        cache.set('c', '3')
+        assert cache.get('b') is None
+        assert cache.get('a') == '1'
+        assert cache.stats()['evictions'] == 1
+
+    def test_ttl_expiry(self):
+        cache = LLMResponseCache(ttl=-1)
+        cache.set('a', '1')
+        assert cache.get('a') is None
+
+    def test_redis_tier_and_counters(self, fake_redis):
+        redis = fake_redis
+        writer = LLMResponseCache(redis_getter=lambda: redis)
+        writer.set('k', 'value')
+        reader = LLMResponseCache(redis_getter=lambda: redis)
+        assert reader.get('k') == 'value'
+        assert reader.get('k') == 'value'
+        assert reader.get('missing') is None
+        stats = reader.stats()
+        assert stats['redis_hits'] == 1
+        assert stats['memory_hits'] == 1
+        assert stats['misses'] == 1
+
+    def test_oversized_values_not_stored(self):
+        cache = LLMResponseCache(max_value_bytes=4)
+        cache.set('k', 'too long')
+        assert cache.get('k') is None
+
+
+class TestModelManagerCaching:
+    def test_generate_uses_cache_when_opted_in(self, monkeypatch):
+        mm = ModelManager()
+        mm._redis = False
+        calls = []
+
+        def fake_request(endpoint, method='POST', payload=None):
+            calls.append(payload)
+            return {'response': 'answer'}
+
+        monkeypatch.setattr(mm, '_make_request', fake_request)
+        assert mm.generate(prompt='q', model='m', cache=True) == 'answer'
+        assert mm.generate(prompt='q', model='m', cache=True) == 'answer'
+        assert len(calls) == 1
+        mm.generate(prompt='q', model='m')
+        assert len(calls) == 2
@@ -0,0 +1,88 @@
+"""Tests for recording and replaying Ollama interactions."""
+import time
+
+import pytest
+
+from agents.code_generator import CodeGenerator
+from agents.project_creator import ProjectCreator
+from agents.requirement_analyzer import RequirementAnalyzer
+from scripts.mock_ollama import start_in_thread
+from utils.file_manager import FileManager
+from utils.llm_recorder import LLMRecorder, ReplayMissError
+from utils.model_manager import ModelManager
+
+
+class _FakeRAG:
+    def query(self, text, collection):
+        return f'reference for {collection}'
+
+
+def _pipeline(mm, projects_dir):
+    """RequirementAnalyzer -> ProjectCreator -> CodeGenerator, as in the create flow."""
+    rag, files = _FakeRAG(), FileManager(str(projects_dir))
+    analysis = RequirementAnalyzer(mm, rag).analyze('A todo list REST API with SQLite')
+    analysis.pop('file_structure', None)
+    ProjectCreator(mm, rag, files).create_project(analysis, 'flask', 'demo')
+    code = CodeGenerator(mm, rag, files).generate('demo', 'app.py', analysis)
+    return analysis, code
+
+
+def _manager(monkeypatch, base_url, recorder):
+    monkeypatch.setenv('OLLAMA_BASE_URL', base_url)
+    monkeypatch.delenv('OLLAMA_BASE_URLS', raising=False)
+    mm = ModelManager()
+    mm._redis = False
+    mm._active_model = 'qwen2.5-coder:7b'
+    mm.recorder = recorder
+    return mm
+
+
+class TestLLMRecorder:
+    def test_call_round_trip_and_miss(self, tmp_path):
+        path = str(tmp_path / 'calls.jsonl.gz')
+        recorder = LLMRecorder(path, mode='record')
+        recorder.call('generate', 'POST', {'prompt': 'a', 'keep_alive': 10}, lambda: {'response': 'one'})
+        recorder.call('generate', 'POST', {'prompt': 'a', 'keep_alive': 99}, lambda: {'response': 'two'})
+
+        replay = LLMRecorder(path, mode='replay', speed=0)
+        send = pytest.fail
+        assert replay.call('generate', 'POST', {'prompt': 'a', 'keep_alive': 5}, send) == {'response': 'one'}
+        assert replay.call('generate', 'POST', {'prompt': 'a'}, send) == {'response': 'two'}
+        assert replay.call('generate', 'POST', {'prompt': 'a'}, send) == {'response': 'two'}
+        with pytest.raises(ReplayMissError):
+            replay.call('generate', 'POST', {'prompt': 'b'}, send)
+        assert replay.stats()['misses'] == 1 and replay.stats()['replayed'] == 3
+
+    def test_stream_replays_original_timing(self, tmp_path):
+        path = str(tmp_path / 'stream.jsonl.gz')
+
+        def slow_stream():
+            for i in range(3):
+                time.sleep(0.05)
+                yield {'response': str(i)}
+
+        recorder = LLMRecorder(path, mode='record')
+        stream = recorder.stream('generate', {'prompt': 'p'}, slow_stream)
+        assert next(stream) == {'response': '0'}
+        stream.close()
+
+        start = time.monotonic()
+        replayed = list(LLMRecorder(path, mode='replay', speed=1.0).stream('generate', {'prompt': 'p'}, None))
+        assert replayed == [{'response': '0'}]
+        assert time.monotonic() - start >= 0.04
+
+    def test_agent_pipeline_replays_offline(self, monkeypatch, tmp_path):
+        path = str(tmp_path / 'pipeline.jsonl.gz')
+        server, url = start_in_thread(tokens_per_second=2000, load_seconds=0)
+        try:
+            live = _pipeline(_manager(monkeypatch, url, LLMRecorder(path, mode='record')), tmp_path / 'live')
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        replay = LLMRecorder(path, mode='replay', speed=0)
+        mm = _manager(monkeypatch, url, replay)
+        assert _pipeline(mm, tmp_path / 'replay') == live
+        assert live[0]['description'].startswith('Mock') and 'hello from the mock model' in live[1]
+        assert replay.stats()['misses'] == 0
+        assert (tmp_path / 'replay' / 'demo' / 'models.py').exists()
@@ -0,0 +1,85 @@
+"""Tests for Ollama response telemetry."""
+import json
+import time
+
+from utils.llm_telemetry import LLMTelemetry, get_telemetry, tagged_user
+
+RESULT = {
+    'eval_count': 200, 'eval_duration': 10e9,
+    'prompt_eval_count': 1000, 'prompt_eval_duration': 2e9,
+    'load_duration': 1e9, 'total_duration': 13e9,
+}
+
+
+class TestLLMTelemetry:
+    def test_derives_rates_per_model_and_agent(self):
+        telemetry = LLMTelemetry()
+        telemetry.record(RESULT, model='m', agent='code_generation', user=7)
+        entry = telemetry.snapshot()['models']['m']['code_generation']
+        assert entry['tokens_per_second']['p50'] == 20
+        assert entry['prefill_tokens_per_second']['p50'] == 500
+        assert entry['time_to_first_token_seconds']['p50'] == 3
+        assert entry['requests'] == 1 and entry['prompt_tokens'] == 1000
+        assert telemetry.snapshot()['users']['7']['eval_tokens'] == 200
+
+    def test_thread_user_tag(self):
+        telemetry = LLMTelemetry()
+        with tagged_user(None):
+            with tagged_user(42):
+                telemetry.record(RESULT, model='m')
+            telemetry.record(RESULT, model='m')
+        assert telemetry.snapshot()['users'] == {'42': {'requests': 1, 'prompt_tokens': 1000, 'eval_tokens': 200}}
+
+    def test_prometheus_sums_published_processes(self, fake_redis):
+        redis = fake_redis
+        worker = LLMTelemetry()
+        worker.record(RESULT, model='m', agent='x')
+        redis['telemetry:llm:worker-host:1'] = json.dumps(worker.export())
+        web = LLMTelemetry()
+        web.record(RESULT, model='m', agent='x')
+        text = web.prometheus(LLMTelemetry.collect(redis, web.export()))
+        assert 'llm_tokens_per_second_bucket{model="m",agent="x",le="20"} 2' in text
+        assert 'llm_requests_total{model="m",agent="x"} 2' in text
+
+    def test_idle_process_keeps_republishing(self, fake_redis):
+        redis = fake_redis
+        telemetry = LLMTelemetry()
+        telemetry.maybe_publish(redis, interval=0.02)
+        for _ in range(100):
+            if redis.writes >= 3:
+                break
+            time.sleep(0.01)
+        assert redis.writes >= 3
+
+    def test_generate_records_telemetry(self, monkeypatch):
+        from utils.model_manager import ModelManager
+        mm = ModelManager()
+        mm._redis = False
+        monkeypatch.setattr(mm, '_make_request', lambda *a, **k: dict(RESULT, response='ok'))
+        get_telemetry().reset()
+        mm.generate(prompt='hi', model='tele:1b', profile='code_generation', coalesce=False)
+        assert get_telemetry().snapshot()['models']['tele:1b']['code_generation']['requests'] == 1
+
+
+class TestMetricsEndpoints:
+    def test_prometheus_endpoint(self, app, client):
+        app.config['METRICS_TOKEN'] = 'scrape-secret'
+        resp = client.get('/metrics', headers={'Authorization': 'Bearer scrape-secret'})
+        assert resp.status_code == 200
+        assert b'# TYPE llm_tokens_per_second histogram' in resp.data
+        assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+
+    def test_prometheus_endpoint_disabled_without_token(self, app, client):
+        app.config['METRICS_TOKEN'] = ''
+        assert client.get('/metrics').status_code == 403
+
+    def test_internal_api_requires_token(self, app, auth_client):
+        app.config['METRICS_TOKEN'] = 'scrape-secret'
+        assert auth_client.get('/api/metrics/llm').status_code == 401
+        app.config['METRICS_TOKEN'] = ''
+        assert auth_client.get('/api/metrics/llm').status_code == 403
+
+    def test_internal_api(self, app, client):
+        app.config['METRICS_TOKEN'] = 'scrape-secret'
+        data = client.get('/api/metrics/llm', headers={'Authorization': 'Bearer scrape-secret'}).get_json()
+        assert data['success'] and 'components' in data['metrics']
@@ -19,6 +19,17 @@ class TestMainRoutes:
             assert 'python' in ids
             assert 'flask' in ids
 
+    def test_hardware_requires_login(self, client):
+        assert client.get('/api/system/hardware').status_code in (302, 401)
+
+    def test_hardware_omits_hostname(self, auth_client, monkeypatch):
+        from utils import hardware_profile
+        monkeypatch.setattr(hardware_profile, 'get_hardware_profile',
+                            lambda: {'hostname': 'build-01', 'ram_gb': 16.0, 'vram_gb': 0.0})
+        data = auth_client.get('/api/system/hardware').get_json()
+        assert data['success'] and data['profile']['ram_gb'] == 16.0
+        assert 'hostname' not in data['profile']
+
     def test_index_with_skip_auth(self, client, app):
         with app.app_context():
             response = client.get('/')
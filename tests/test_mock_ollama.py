@@ -0,0 +1,43 @@
+"""Tests for the mock Ollama server used by the load benchmark."""
+import json
+
+import pytest
+import requests
+
+from scripts.mock_ollama import start_in_thread
+from utils.model_manager import ModelManager
+
+
+@pytest.fixture
+def mock_ollama(monkeypatch):
+    server, url = start_in_thread(tokens_per_second=2000, load_seconds=0.05, parallel=2)
+    monkeypatch.setenv('OLLAMA_BASE_URL', url)
+    monkeypatch.delenv('OLLAMA_BASE_URLS', raising=False)
+    yield url
+    server.shutdown()
+    server.server_close()
+
+
+class TestMockOllama:
+    def test_tags_and_pull(self, mock_ollama):
+        assert 'qwen2.5-coder:7b' in [m['name'] for m in requests.get(f'{mock_ollama}/api/tags').json()['models']]
+        requests.post(f'{mock_ollama}/api/pull', json={'name': 'extra:1b', 'stream': False})
+        assert 'extra:1b' in [m['name'] for m in requests.get(f'{mock_ollama}/api/tags').json()['models']]
+
+    def test_model_manager_generate_and_stream(self, mock_ollama):
+        mm = ModelManager()
+        mm._redis = False
+        meta = {}
+        text = mm.generate(prompt='Analyze these requirements', model='qwen2.5-coder:7b',
+                           format='json', meta=meta, fallback=False)
+        assert json.loads(text)['project_type']
+        assert meta['eval_count'] > 0 and meta['context']
+        chunks = list(mm.generate_stream(prompt='Write code', model='qwen2.5-coder:7b'))
+        assert '```python' in ''.join(chunks)
+
+    def test_chat(self, mock_ollama):
+        resp = requests.post(f'{mock_ollama}/api/chat', json={
+            'model': 'qwen2.5-coder:3b', 'stream': False,
+            'messages': [{'role': 'user', 'content': 'hi'}],
+        }).json()
+        assert resp['done'] and resp['message']['content']
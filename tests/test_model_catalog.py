@@ -0,0 +1,98 @@
+"""Tests for the stale-while-revalidate model catalog."""
+import json
+import time
+
+from utils.model_catalog import ModelCatalog, REDIS_KEY
+
+
+def _fetcher(names, calls):
+    def fetch():
+        calls.append(1)
+        return {'models': [{'name': n} for n in names]}
+    return fetch
+
+
+class TestModelCatalog:
+    def test_reads_are_served_from_memory(self):
+        calls = []
+        catalog = ModelCatalog(_fetcher(['a'], calls), fresh_ttl=60)
+        assert catalog.names() == ['a']
+        assert catalog.has('a')
+        assert len(calls) == 1
+
+    def test_uses_redis_snapshot_before_ollama(self, fake_redis):
+        calls, redis = [], fake_redis
+        redis[REDIS_KEY] = json.dumps({'models': [{'name': 'r'}], 'fetched_at': time.time()})
+        catalog = ModelCatalog(_fetcher(['a'], calls), redis_getter=lambda: redis)
+        assert catalog.names() == ['r']
+        assert calls == []
+
+    def test_refresh_publishes_to_redis(self, fake_redis):
+        redis = fake_redis
+        catalog = ModelCatalog(_fetcher(['a'], []), redis_getter=lambda: redis)
+        catalog.refresh()
+        assert json.loads(redis[REDIS_KEY])['models'] == [{'name': 'a'}]
+
+    def test_stale_snapshot_served_while_revalidating(self):
+        names, calls = ['a'], []
+        catalog = ModelCatalog(lambda: _fetcher(names, calls)(), fresh_ttl=0, stale_ttl=60)
+        catalog.names()
+        names[:] = ['b']
+        assert catalog.names() == ['a']
+        for _ in range(50):
+            if catalog.names() == ['b']:
+                break
+            time.sleep(0.01)
+        assert catalog.names() == ['b']
+
+    def test_change_notification(self):
+        names, seen = ['a'], []
+        catalog = ModelCatalog(lambda: {'models': [{'name': n} for n in names]})
+        catalog.subscribe(lambda added, removed: seen.append((added, removed)))
+        catalog.refresh()
+        names[:] = ['b']
+        catalog.refresh()
+        assert seen == [({'b'}, {'a'})]
+
+    def test_removed_active_model_is_reselected(self, monkeypatch):
+        from utils.model_manager import ModelManager
+        mm = ModelManager()
+        mm._redis = False
+        mm._active_model = 'gone:7b'
+        mm.catalog._models = [{'name': 'gone:7b'}]
+        monkeypatch.setattr(mm, 'fetch_models', lambda: {'models': [{'name': 'other'}]})
+        mm.catalog._fetch = mm.fetch_models
+        mm.catalog.refresh()
+        assert mm._active_model is None
+
+    def test_empty_fetch_keeps_previous_snapshot(self):
+        names, seen = ['a'], []
+        catalog = ModelCatalog(lambda: {'models': [{'name': n} for n in names]})
+        catalog.subscribe(lambda added, removed: seen.append((added, removed)))
+        catalog.refresh()
+        names[:] = []
+        assert catalog.refresh() == [{'name': 'a'}]
+        assert catalog.names() == ['a'] and seen == []
+
+    def test_redis_snapshot_keeps_its_age(self, fake_redis):
+        redis = fake_redis
+        fetched_at = time.time() - 300
+        redis[REDIS_KEY] = json.dumps({'models': [{'name': 'r'}], 'fetched_at': fetched_at})
+        catalog = ModelCatalog(_fetcher(['a'], []), redis_getter=lambda: redis, fresh_ttl=600)
+        assert catalog.names() == ['r']
+        assert catalog.stats()['age_seconds'] >= 300
+
+    def test_revalidation_uses_redis_until_stale(self, fake_redis):
+        calls, redis = [], fake_redis
+        redis[REDIS_KEY] = json.dumps({'models': [{'name': 'r'}], 'fetched_at': time.time() - 500})
+        catalog = ModelCatalog(_fetcher(['a'], calls), redis_getter=lambda: redis, fresh_ttl=0, stale_ttl=900)
+        for _ in range(20):
+            assert catalog.names() == ['r']
+            time.sleep(0.005)
+        assert calls == [] and catalog.background_refreshes > 1
+
+    def test_stale_redis_snapshot_falls_through_to_ollama(self, fake_redis):
+        calls, redis = [], fake_redis
+        redis[REDIS_KEY] = json.dumps({'models': [{'name': 'r'}], 'fetched_at': time.time() - 1000})
+        catalog = ModelCatalog(_fetcher(['a'], calls), redis_getter=lambda: redis, stale_ttl=900)
+        assert catalog.names() == ['a'] and len(calls) == 1
@@ -0,0 +1,366 @@
+"""Tests for the Ollama model manager."""
+import json
+import time
+import pytest
+
+from utils.model_manager import LLMStreamError, ModelManager
+
+
+class _FakeStreamResponse:
+    def __init__(self, lines, status_code=200):
+        self._lines = lines
+        self.status_code = status_code
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_lines(self):
+        for line in self._lines:
+            yield line.encode()
+
+
+@pytest.fixture
+def mm(monkeypatch):
+    manager = ModelManager()
+    manager._redis = False
+    manager._active_model = 'qwen2.5-coder:7b'
+    return manager
+
+
+class TestGenerateStream:
+    def test_yields_chunks_in_order(self, mm, monkeypatch):
+        lines = [
+            json.dumps({'response': 'def ', 'done': False}),
+            '',
+            json.dumps({'response': 'add():', 'done': False}),
+            json.dumps({'response': '', 'done': True}),
+        ]
+        captured = {}
+
+        def fake_post(url, **kwargs):
+            captured['payload'] = kwargs['json']
+            return _FakeStreamResponse(lines)
+
+        monkeypatch.setattr(mm.session, 'post', fake_post)
+        stats = {}
+        chunks = list(mm.generate_stream(prompt='write add', stats=stats))
+        assert chunks == ['def ', 'add():']
+        assert captured['payload']['stream'] is True
+        assert stats['chunks'] == 2
+        assert stats['time_to_first_token'] is not None
+        assert stats['total_time'] >= stats['time_to_first_token']
+
+    def test_empty_prompt_yields_nothing(self, mm):
+        assert list(mm.generate_stream(prompt='')) == []
+
+    def test_server_error_line_raises_after_partial_output(self, mm, monkeypatch):
+        lines = [
+            json.dumps({'response': 'partial', 'done': False}),
+            json.dumps({'error': 'model not found'}),
+        ]
+        monkeypatch.setattr(mm.session, 'post', lambda url, **kw: _FakeStreamResponse(lines))
+        chunks = []
+        with pytest.raises(LLMStreamError, match='model not found'):
+            for chunk in mm.generate_stream(prompt='x'):
+                chunks.append(chunk)
+        assert chunks == ['partial']
+
+    def test_stream_without_done_raises(self, mm, monkeypatch):
+        lines = [json.dumps({'response': 'partial', 'done': False})]
+        monkeypatch.setattr(mm.session, 'post', lambda url, **kw: _FakeStreamResponse(lines))
+        with pytest.raises(LLMStreamError):
+            list(mm.generate_stream(prompt='x'))
+
+
+class TestTransport:
+    def test_session_is_shared(self):
+        a, b = ModelManager(), ModelManager()
+        assert a.session is b.session
+
+    def test_session_pool_and_retry_config(self):
+        from utils.ollama_transport import build_session
+        session = build_session(pool_size=4, max_retries=2, api_key='k')
+        adapter = session.get_adapter('http://localhost:11434')
+        assert adapter._pool_maxsize == 4
+        assert adapter.max_retries.connect == 2
+        assert adapter.max_retries.read == 0
+        assert session.headers['Authorization'] == 'Bearer k'
+
+    def test_request_uses_split_timeouts(self, mm, monkeypatch):
+        captured = {}
+
+        class _Resp:
+            def raise_for_status(self):
+                pass
+
+            def json(self):
+                return {'models': []}
+
+        def fake_request(method, url, **kwargs):
+            captured.update(kwargs)
+            return _Resp()
+
+        monkeypatch.setattr(mm.session, 'request', fake_request)
+        assert mm._make_request('tags', method='GET') == {'models': []}
+        connect, read = captured['timeout']
+        assert connect < read
+
+    def test_https_requests_are_tracked(self, tmp_path):
+        import shutil
+        import ssl
+        import subprocess
+        import threading
+        from scripts.mock_ollama import create_server
+        from utils.ollama_transport import _TrackedHTTPSConnection, capture_connections, get_session
+
+        if not shutil.which('openssl'):
+            pytest.skip('openssl not available')
+        cert, key = tmp_path / 'cert.pem', tmp_path / 'key.pem'
+        subprocess.run(['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+                        '-subj', '/CN=localhost', '-addext', 'subjectAltName=IP:127.0.0.1',
+                        '-keyout', str(key), '-out', str(cert)], check=True, capture_output=True)
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(cert, key)
+        server = create_server(load_seconds=0)
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+        threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+        host, port = server.server_address[:2]
+        try:
+            with capture_connections([]) as sink:
+                resp = get_session().get(f'https://{host}:{port}/api/tags', verify=str(cert), timeout=5)
+            assert resp.status_code == 200 and resp.json()['models']
+            assert sink and isinstance(sink[0], _TrackedHTTPSConnection)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+class TestAdmissionScheduler:
+    def test_slot_handoff_prefers_higher_priority(self):
+        import threading
+        import time
+        from utils.llm_scheduler import AdmissionScheduler
+
+        sched = AdmissionScheduler(max_concurrency=1)
+        order = []
+        first = sched.acquire('m', 'background')
+
+        def worker(priority):
+            with sched.slot('m', priority):
+                order.append(priority)
+
+        bg = threading.Thread(target=worker, args=('background',))
+        bg.start()
+        time.sleep(0.05)
+        ia = threading.Thread(target=worker, args=('interactive',))
+        ia.start()
+        time.sleep(0.05)
+        assert sched.stats()['m']['queue_depth'] == {'interactive': 1, 'analysis': 0, 'background': 1}
+        sched.release('m', first)
+        bg.join()
+        ia.join()
+        assert order == ['interactive', 'background']
+        assert sched.stats()['m']['active'] == 0
+
+    def test_rejects_when_deadline_cannot_be_met(self):
+        import time
+        from utils.llm_scheduler import AdmissionScheduler, LLMBusyError
+
+        sched = AdmissionScheduler(max_concurrency=1)
+        sched._queue('m').avg_service = 30.0
+        sched.acquire('m')
+        with pytest.raises(LLMBusyError):
+            sched.acquire('m', 'interactive', deadline=time.monotonic() + 5)
+        assert sched.stats()['m']['rejected'] == 1
+
+    def test_times_out_waiting(self):
+        import time
+        from utils.llm_scheduler import AdmissionScheduler, LLMBusyError
+
+        sched = AdmissionScheduler(max_concurrency=1)
+        sched.acquire('m')
+        with pytest.raises(LLMBusyError):
+            sched.acquire('m', deadline=time.monotonic() + 0.05)
+        assert sched.stats()['m']['queue_depth']['background'] == 0
+
+
+class TestModelRouter:
+    def _router(self, mm, installed, **kwargs):
+        from utils.model_router import ModelRouter
+        mm.list_models = lambda: {'models': [{'name': n} for n in installed]}
+        return ModelRouter(mm, overrides=kwargs.pop('overrides', {}), **kwargs)
+
+    def test_cheap_task_uses_small_model(self, mm):
+        mm._active_model = 'qwen2.5-coder:32b'
+        router = self._router(mm, ['qwen2.5-coder:32b', 'qwen2.5-coder:3b'])
+        assert router.route('requirement_analysis') == 'qwen2.5-coder:3b'
+        assert router.route('code_generation') == 'qwen2.5-coder:32b'
+
+    def test_missing_tier_falls_back_up_the_ladder(self, mm):
+        mm._active_model = 'qwen2.5-coder:32b'
+        router = self._router(mm, ['qwen2.5-coder:32b', 'qwen2.5-coder:7b'])
+        assert router.route('file_structure') == 'qwen2.5-coder:7b'
+
+    def test_never_exceeds_active_model(self, mm):
+        mm._active_model = 'qwen2.5-coder:1.5b'
+        router = self._router(mm, ['qwen2.5-coder:1.5b', 'qwen2.5-coder:3b'])
+        assert router.route('requirement_analysis') == 'qwen2.5-coder:1.5b'
+
+    def test_override_wins(self, mm):
+        router = self._router(mm, [], overrides={'customization': 'custom:latest'})
+        assert router.route('customization') == 'custom:latest'
+
+    def test_agent_model_uses_route(self, mm):
+        from agents.requirement_analyzer import RequirementAnalyzer
+        mm._active_model = 'qwen2.5-coder:14b'
+        mm._router = self._router(mm, ['qwen2.5-coder:14b', 'qwen2.5-coder:3b'])
+        assert RequirementAnalyzer(mm, None).model == 'qwen2.5-coder:3b'
+
+
+class TestGenerationOptions:
+    def test_options_sent_inside_options_object(self, mm, monkeypatch):
+        captured = {}
+
+        def fake_request(endpoint, method='POST', payload=None):
+            captured.update(payload)
+            return {'response': 'ok'}
+
+        monkeypatch.setattr(mm, '_make_request', fake_request)
+        mm.generate(prompt='write code', model='m', profile='code_generation', coalesce=False)
+        assert 'temperature' not in captured and 'max_tokens' not in captured
+        options = captured['options']
+        assert options['num_predict'] == 4096
+        assert 'stop' not in options
+        assert options['num_ctx'] >= 4096
+
+    def test_explicit_arguments_override_profile(self):
+        from utils.generation_options import build_options
+        options = build_options('requirement_analysis', 'p', temperature=0.7, max_tokens=50)
+        assert options['temperature'] == 0.7
+        assert options['num_predict'] == 50
+        assert 'stop' not in options
+
+    def test_num_ctx_grows_with_prompt(self):
+        from utils.generation_options import size_num_ctx
+        small = size_num_ctx('x' * 100, num_predict=1024)
+        large = size_num_ctx('x' * 60000, num_predict=1024)
+        assert small == 4096
+        assert large > small
+
+    def test_code_cleanup_skips_preface_before_bare_fence(self):
+        from agents.code_generator import CodeGenerator
+        gen = CodeGenerator(None, None, None)
+        assert gen._clean_code_response('Sure, the code:\n```\nprint(1)\n```\nDone.', '.py') == 'print(1)'
+
+    def test_code_cleanup_handles_truncated_fence(self):
+        from agents.code_generator import CodeGenerator
+        gen = CodeGenerator(None, None, None)
+        assert gen._clean_code_response('```python\nprint(1)', '.py') == 'print(1)'
+
+
+class TestHardwareProfile:
+    def test_profile_detected_once_and_persisted(self, tmp_path, monkeypatch):
+        from utils import hardware_profile
+        calls = []
+
+        def fake_detect():
+            calls.append(1)
+            return {'ram_gb': 16.0, 'gpu_vram_gb': 0, 'cpu_gflops': 80.0, 'detected_at': time.time()}
+
+        monkeypatch.setattr(hardware_profile, 'detect_profile', fake_detect)
+        monkeypatch.setattr(hardware_profile, '_profile', None)
+        path = str(tmp_path / 'hw.json')
+        hardware_profile.get_hardware_profile(path=path)
+        hardware_profile.get_hardware_profile(path=path)
+        monkeypatch.setattr(hardware_profile, '_profile', None)
+        assert hardware_profile.get_hardware_profile(path=path)['ram_gb'] == 16.0
+        assert len(calls) == 1
+
+    def test_cpu_throughput_caps_tier(self):
+        from utils.hardware_profile import recommend_model
+        assert recommend_model({'ram_gb': 64, 'gpu_vram_gb': 0, 'cpu_gflops': 500}) == 'qwen2.5-coder:32b'
+        assert recommend_model({'ram_gb': 64, 'gpu_vram_gb': 0, 'cpu_gflops': 60}) == 'qwen2.5-coder:7b'
+        assert recommend_model({'ram_gb': 64, 'gpu_vram_gb': 0, 'cpu_gflops': 5}) == 'qwen2.5-coder:3b'
+        assert recommend_model({'ram_gb': 8, 'gpu_vram_gb': 24, 'cpu_gflops': 5}) == 'qwen2.5-coder:32b'
+
+    def test_benchmark_returns_positive_throughput(self):
+        from utils.hardware_profile import cpu_benchmark
+        assert cpu_benchmark(duration=0.02) > 0
+
+
+class TestGenerateMany:
+    def _fake_generate(self, mm, monkeypatch, delays=None, fail=()):
+        def fake(prompt='', fallback=True, **kwargs):
+            time.sleep((delays or {}).get(prompt, 0))
+            if prompt in fail:
+                raise RuntimeError(f'boom {prompt}')
+            return prompt.upper()
+        monkeypatch.setattr(mm, 'generate', fake)
+
+    def test_results_carry_index_and_errors(self, mm, monkeypatch):
+        self._fake_generate(mm, monkeypatch, fail={'b'})
+        results = sorted(mm.generate_many(['a', 'b', 'c'], concurrency=3))
+        assert [r.index for r in results] == [0, 1, 2]
+        assert results[0].response == 'A' and results[2].response == 'C'
+        assert isinstance(results[1].error, RuntimeError)
+
+    def test_as_completed_vs_ordered(self, mm, monkeypatch):
+        self._fake_generate(mm, monkeypatch, delays={'slow': 0.2})
+        completed = [r.index for r in mm.generate_many(['slow', 'fast'], concurrency=2)]
+        assert completed == [1, 0]
+        ordered = [r.index for r in mm.generate_many(['slow', 'fast'], concurrency=2, ordered=True)]
+        assert ordered == [0, 1]
+
+    def test_cancellation_skips_unstarted_items(self, mm, monkeypatch):
+        import threading
+        from utils.model_manager import BatchCancelledError
+        self._fake_generate(mm, monkeypatch, delays={'a': 0.1, 'b': 0.2})
+        cancel = threading.Event()
+        results = []
+        for r in mm.generate_many(['a', 'b', 'c'], concurrency=1, ordered=True, cancel_event=cancel):
+            results.append(r)
+            cancel.set()
+        # 'b' was already running when the event was set; 'c' never started.
+        assert results[0].response == 'A' and results[1].response == 'B'
+        assert isinstance(results[2].error, BatchCancelledError)
+
+
+class TestModelWarmer:
+    def test_keep_alive_tracks_request_gaps(self, mm, monkeypatch):
+        from utils import model_warmup
+        clock = [1000.0]
+        monkeypatch.setattr(model_warmup.time, 'monotonic', lambda: clock[0])
+        warmer = model_warmup.ModelWarmer(mm, resident_models=['small'])
+        assert warmer.keep_alive_for('m') == model_warmup.KEEP_ALIVE_MIN
+        clock[0] += 1000
+        assert warmer.keep_alive_for('m') == 2000
+        assert warmer.keep_alive_for('small') == model_warmup.KEEP_ALIVE_MAX
+
+    def test_records_cold_and_warm_latency(self, mm):
+        from utils.model_warmup import ModelWarmer
+        warmer = ModelWarmer(mm, resident_models=[])
+        warmer.record({'total_duration': 9e9, 'load_duration': 6e9})
+        warmer.record({'total_duration': 2e9, 'load_duration': 1e6})
+        stats = warmer.stats()
+        assert stats['cold_start'] == {'requests': 1, 'avg_seconds': 9.0}
+        assert stats['warm']['requests'] == 1
+
+    def test_warm_and_generate_send_keep_alive(self, mm, monkeypatch):
+        sent = []
+
+        def fake_request(endpoint, method='POST', payload=None):
+            sent.append(payload)
+            return {'response': 'ok', 'total_duration': 1e9, 'load_duration': 0}
+
+        monkeypatch.setattr(mm, '_make_request', fake_request)
+        assert mm.warmer.warm('qwen2.5-coder:7b')
+        mm.generate(prompt='hi', model='qwen2.5-coder:7b', coalesce=False)
+        assert sent[0]['prompt'] == '' and sent[0]['keep_alive'] > 0
+        assert sent[1]['keep_alive'] > 0
+        assert mm.warmer.stats()['warm']['requests'] == 1
@@ -0,0 +1,134 @@
+"""Tests for the multi-backend Ollama pool against local stand-in servers."""
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from utils import ollama_pool
+from utils.ollama_pool import BackendPool
+from utils.model_manager import ModelManager
+
+
+def _start_backend(name, models):
+    hits = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _reply(self, body, status=200):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            self._reply({'models': [{'name': m} for m in models]})
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            payload = json.loads(self.rfile.read(length) or b'{}')
+            hits.append(payload)
+            self._reply({'response': name, 'done': True})
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}', hits
+
+
+def _start_resetting_backend():
+    """Accepts the request, then drops the connection without answering."""
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    listener.listen()
+
+    def serve():
+        while True:
+            try:
+                conn, _ = listener.accept()
+            except OSError:
+                return
+            conn.recv(65536)
+            conn.close()
+
+    threading.Thread(target=serve, daemon=True).start()
+    return listener, f'http://127.0.0.1:{listener.getsockname()[1]}'
+
+
+@pytest.fixture
+def backends():
+    started = [_start_backend('a', ['small']), _start_backend('b', ['small', 'large'])]
+    yield started
+    for server, _, _ in started:
+        server.shutdown()
+        server.server_close()
+
+
+def _manager(urls):
+    mm = ModelManager()
+    mm._redis = False
+    mm.pool = BackendPool(urls, session_getter=requests.Session, health_interval=0, eject_after=1)
+    return mm
+
+
+class TestBackendPool:
+    def test_inventory_is_union_of_nodes(self, backends):
+        mm = _manager([url for _, url, _ in backends])
+        names = {m['name'] for m in mm.fetch_models()['models']}
+        assert names == {'small', 'large'}
+
+    def test_routes_to_node_with_model(self, backends):
+        mm = _manager([url for _, url, _ in backends])
+        mm.pool.check_all()
+        result = mm._make_request('generate', payload={'model': 'large', 'prompt': 'x'})
+        assert result['response'] == 'b'
+
+    def test_least_outstanding_wins(self, backends):
+        pool = BackendPool([url for _, url, _ in backends], health_interval=0)
+        with pool.lease() as first:
+            with pool.lease() as second:
+                assert first is not second
+
+    def test_dead_node_ejected_and_request_retried(self, backends):
+        _, live_url, hits = backends[0]
+        mm = _manager(['http://127.0.0.1:9', live_url])
+        dead = mm.pool.backends[0]
+        dead.outstanding = -100  # force the first pick onto the dead node
+        assert mm._make_request('generate', payload={'model': 'small', 'prompt': 'x'})['response'] == 'a'
+        assert dead.ejected
+        assert len(hits) == 1
+
+    def test_ejected_node_readmitted_after_health_check(self, backends):
+        _, url, _ = backends[0]
+        pool = BackendPool([url], health_interval=0, eject_after=1, eject_seconds=60)
+        pool.mark_failure(pool.backends[0], 'test')
+        assert pool.healthy() == []
+        assert pool.check(pool.backends[0])
+        assert pool.healthy() == pool.backends
+
+    def test_reset_after_send_is_not_replayed(self, backends):
+        _, live_url, hits = backends[0]
+        listener, reset_url = _start_resetting_backend()
+        try:
+            mm = _manager([reset_url, live_url])
+            mm.pool.backends[0].outstanding = -100
+            with pytest.raises(RuntimeError):
+                mm._make_request('generate', payload={'model': 'small', 'prompt': 'x'})
+            assert hits == []
+        finally:
+            listener.close()
+
+    def test_ejection_backoff_resets_after_healthy_period(self, monkeypatch):
+        pool = BackendPool(['http://127.0.0.1:9'], health_interval=0, eject_after=1, eject_seconds=10)
+        backend = pool.backends[0]
+        backend.ejections = 5
+        backend.last_ejected_at = 0.0
+        monkeypatch.setattr(ollama_pool, 'EJECT_RESET_SECONDS', 0.0)
+        pool.mark_failure(backend, 'test')
+        assert backend.ejections == 1
+        assert backend.ejected_until - backend.last_ejected_at == 10
@@ -0,0 +1,50 @@
+"""Tests for the agent prompt token budgeter."""
+from utils.prompt_budget import PromptBudgeter, Section, count_tokens, trim_to_tokens, prompt_token_stats
+
+
+class TestTrim:
+    def test_short_text_untouched(self):
+        assert trim_to_tokens('a\nb', 100) == 'a\nb'
+
+    def test_keeps_leading_lines_and_marks_omission(self):
+        text = '\n'.join(f'line {i} ' * 10 for i in range(200))
+        trimmed = trim_to_tokens(text, 100)
+        assert trimmed.startswith('line 0')
+        assert trimmed.endswith('more lines omitted)')
+        assert count_tokens(trimmed) <= 120
+
+
+class TestPromptBudgeter:
+    def test_everything_fits(self):
+        texts, report = PromptBudgeter('test', window=4096, reserve=512).fit([
+            Section('a', 'short'), Section('b', 'also short'),
+        ])
+        assert texts == {'a': 'short', 'b': 'also short'}
+        assert report['trimmed'] == []
+
+    def test_required_kept_and_low_weight_trimmed_first(self):
+        code = '\n'.join('c' * 60 for _ in range(100))
+        big = '\n'.join('x' * 60 for _ in range(400))
+        small = '\n'.join('y' * 60 for _ in range(40))
+        texts, report = PromptBudgeter('test', window=8192, reserve=1024).fit([
+            Section('code', code, required=True),
+            Section('high', small, weight=3),
+            Section('low', big, weight=1),
+        ])
+        assert texts['code'] == code
+        assert texts['high'] == small
+        assert report['trimmed'] == ['low']
+
+    def test_surplus_redistributed(self):
+        big = '\n'.join('z' * 60 for _ in range(1000))
+        _, report = PromptBudgeter('test', window=8192, reserve=1024).fit([
+            Section('tiny', 'ok', weight=10),
+            Section('big', big, weight=1),
+        ])
+        # The tiny section's unused share goes to the big one.
+        assert report['sections']['big'] > 5000
+        assert report['total'] <= 8192 - 1024
+
+    def test_records_stats(self):
+        PromptBudgeter('stats_task', window=4096, reserve=0).fit([Section('a', 'hello')])
+        assert prompt_token_stats()['stats_task']['prompts'] >= 1
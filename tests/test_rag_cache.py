@@ -0,0 +1,68 @@
+"""Tests for generation-versioned RAG answer caching."""
+from utils.rag_system import RAGSystem
+
+
+class _FakeCollection:
+    name = 'code_examples'
+
+    def __init__(self):
+        self.documents = ['first']
+        self.searches = 0
+
+    def query(self, query_embeddings, n_results, where=None):
+        self.searches += 1
+        return {'documents': [list(self.documents) for _ in query_embeddings],
+                'metadatas': [[{'source': 'test'}] * len(self.documents) for _ in query_embeddings]}
+
+    def add(self, documents, metadatas, ids):
+        self.documents.extend(documents)
+
+    def delete(self, ids):
+        self.documents.pop()
+
+
+def _rag(redis):
+    rag = RAGSystem()
+    rag._redis = redis
+    rag._collections = {'code_examples': _FakeCollection()}
+    rag.embedding_function = lambda texts: [[0.0]] * len(texts)
+    return rag
+
+
+class TestVersionedCache:
+    def test_repeat_query_served_from_cache(self, fake_redis):
+        rag = _rag(fake_redis)
+        assert rag.query('flask', 'code_examples') == rag.query('flask', 'code_examples')
+        assert rag.collections['code_examples'].searches == 1
+
+    def test_add_and_delete_invalidate_cached_answers(self, fake_redis):
+        rag = _rag(fake_redis)
+        assert 'second' not in rag.query('flask', 'code_examples')
+        assert rag.add_document('second', 'code_examples', {'source': 'test'})
+        assert 'second' in rag.query('flask', 'code_examples')
+        assert rag.delete_document('ignored', 'code_examples')
+        assert 'second' not in rag.query('flask', 'code_examples')
+        assert rag.collections['code_examples'].searches == 3
+
+    def test_result_count_and_filter_are_part_of_the_key(self, fake_redis):
+        rag = _rag(fake_redis)
+        rag.query('flask', 'code_examples', n_results=5)
+        rag.query('flask', 'code_examples', n_results=2)
+        rag.query('flask', 'code_examples', n_results=2, filter_metadata={'framework': 'flask'})
+        assert rag.collections['code_examples'].searches == 3
+
+    def test_evicted_generation_never_revives_old_entries(self, fake_redis):
+        rag = _rag(fake_redis)
+        rag.query('flask', 'code_examples')
+        for key in fake_redis.scan_iter('rag:generation:*'):
+            fake_redis.delete(key)
+        rag.query('flask', 'code_examples')
+        assert rag.collections['code_examples'].searches == 2
+
+    def test_no_generation_means_no_cache(self, fake_redis):
+        rag = _rag(fake_redis)
+        rag._generations = lambda names: dict.fromkeys(names)
+        rag.query('flask', 'code_examples')
+        rag.query('flask', 'code_examples')
+        assert rag.collections['code_examples'].searches == 2
+        assert not any(k.startswith('cache:rag:') for k in fake_redis)
@@ -0,0 +1,110 @@
+"""Tests for the unix-socket retrieval sidecar and its RAGSystem-compatible client."""
+import os
+import tempfile
+import threading
+
+import pytest
+
+from utils.rag_system import RAGSystem
+from utils.retrieval_service import RetrievalClient, RetrievalService
+
+
+class _FakeRAG:
+    def __init__(self):
+        self.batches = []
+        self.documents = {}
+
+    def query_many(self, queries):
+        self.batches.append(list(queries))
+        return [f'{collection}:{text}' for text, collection, _, _ in queries]
+
+    def add_document(self, content, collection_name, metadata):
+        self.documents[content] = (collection_name, metadata)
+        return True
+
+    def delete_document(self, doc_id, collection_name):
+        return self.documents.pop(doc_id, None) is not None
+
+    def stats(self):
+        return {'documents': len(self.documents)}
+
+
+class _FakeCollection:
+    def __init__(self):
+        self.calls = []
+
+    def query(self, query_embeddings, n_results, where=None):
+        self.calls.append(len(query_embeddings))
+        return {'documents': [[f'doc {i}'] for i in range(len(query_embeddings))],
+                'metadatas': [[{'source': 'test'}] for _ in query_embeddings]}
+
+
+@pytest.fixture
+def service():
+    path = os.path.join(tempfile.mkdtemp(), 'rag.sock')
+    service = RetrievalService(path, rag=_FakeRAG())
+    service.batcher.window = 0.05
+    server = service.create_server()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield service
+    server.shutdown()
+    server.server_close()
+
+
+class TestRetrievalService:
+    def test_client_round_trips_rag_api(self, service):
+        client = RetrievalClient(service.socket_path)
+        assert client.query('flask app', 'code_examples') == 'code_examples:flask app'
+        assert client.add_document('content', 'code_examples', {'source': 'x'}) is True
+        assert client.delete_document('content', 'code_examples') is True
+        assert client.stats()['rag'] == {'documents': 0}
+
+    def test_concurrent_queries_are_batched(self, service):
+        results = {}
+
+        def ask(i):
+            results[i] = RetrievalClient(service.socket_path).query(f'q{i}', 'code_examples')
+
+        threads = [threading.Thread(target=ask, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert results == {i: f'code_examples:q{i}' for i in range(8)}
+        assert len(service.rag.batches) < 8
+
+    def test_unavailable_service_degrades_like_rag_system(self):
+        client = RetrievalClient('/nonexistent/rag.sock')
+        assert client.query('x', 'code_examples') == 'Error retrieving information.'
+        assert client.add_document('x', 'code_examples', {}) is False
+
+
+class TestQueryMany:
+    def test_one_embedding_pass_and_one_search_per_group(self):
+        rag = RAGSystem()
+        rag._redis = False
+        collection = _FakeCollection()
+        rag._collections = {'code_examples': collection}
+        embedded = []
+        rag.embedding_function = lambda texts: embedded.append(list(texts)) or [[0.0]] * len(texts)
+        answers = rag.query_many([('a', 'code_examples', 5, None), ('b', 'code_examples', 5, None),
+                                  ('a', 'code_examples', 5, None), ('c', 'unknown', 5, None)])
+        assert embedded == [['a', 'b']]
+        assert collection.calls == [3]
+        assert answers[0].startswith('Source: test') and answers[3] == 'No relevant information found.'
+
+    def test_collections_searched_separately_in_order(self):
+        rag = RAGSystem()
+        rag._redis = False
+        rag._collections = {name: _FakeCollection() for name in ('code_examples', 'project_structure')}
+        rag.embedding_function = lambda texts: [[0.0]] * len(texts)
+        answers = rag.query_many([('a', 'project_structure', 3, None), ('a', 'code_examples', 5, None),
+                                  ('b', 'code_examples', 5, {'framework': 'flask'})])
+        assert len(answers) == 3 and all(a.startswith('Source: test') for a in answers)
+        assert rag._collections['code_examples'].calls == [1, 1]
+        assert rag._collections['project_structure'].calls == [1]
+
+    def test_client_query_many(self, service):
+        client = RetrievalClient(service.socket_path)
+        assert client.query_many([('a', 'code_examples', 5, None), ('b', 'project_structure', 3, None)]) == \
+            ['code_examples:a', 'project_structure:b']
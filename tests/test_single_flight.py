@@ -0,0 +1,91 @@
+"""Tests for single-flight request coalescing."""
+import json
+import threading
+import time
+
+import pytest
+
+from utils.single_flight import SingleFlight, LOCK_PREFIX, RESULT_PREFIX
+
+
+class TestSingleFlight:
+    def test_concurrent_callers_share_one_call(self):
+        sf = SingleFlight()
+        calls = []
+        gate = threading.Event()
+
+        def slow():
+            calls.append(1)
+            gate.wait(2)
+            return 'result'
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(sf.do('k', slow))) for _ in range(5)]
+        for t in threads:
+            t.start()
+        time.sleep(0.1)
+        gate.set()
+        for t in threads:
+            t.join()
+        assert calls == [1]
+        assert results == ['result'] * 5
+        assert sf.stats()['local_shared'] == 4
+
+    def test_errors_propagate_to_waiters(self):
+        sf = SingleFlight()
+        gate = threading.Event()
+        errors = []
+
+        def boom():
+            gate.wait(2)
+            raise RuntimeError('down')
+
+        def call():
+            try:
+                sf.do('k', boom)
+            except RuntimeError as e:
+                errors.append(str(e))
+
+        threads = [threading.Thread(target=call) for _ in range(3)]
+        for t in threads:
+            t.start()
+        time.sleep(0.1)
+        gate.set()
+        for t in threads:
+            t.join()
+        assert errors == ['down'] * 3
+        assert sf.stats()['in_flight'] == 0
+
+    def test_remote_leader_result_is_shared(self, fake_redis):
+        redis = fake_redis
+        redis.set(f'{LOCK_PREFIX}k', 'other-process')
+        redis.setex(f'{RESULT_PREFIX}k', 60, json.dumps('from leader'))
+        sf = SingleFlight(redis_getter=lambda: redis, poll_interval=0.01)
+        assert sf.do('k', lambda: pytest.fail('should not generate')) == 'from leader'
+        assert sf.stats()['remote_shared'] == 1
+
+    def test_leader_releases_lock(self, fake_redis):
+        redis = fake_redis
+        sf = SingleFlight(redis_getter=lambda: redis)
+        assert sf.do('k', lambda: 'value') == 'value'
+        assert f'{LOCK_PREFIX}k' not in redis
+        assert json.loads(redis[f'{RESULT_PREFIX}k']) == 'value'
+
+    def test_lock_renewed_while_leader_runs(self, fake_redis):
+        redis = fake_redis
+        leader = SingleFlight(redis_getter=lambda: redis, lock_ttl=0.06, poll_interval=0.01)
+        follower = SingleFlight(redis_getter=lambda: redis, lock_ttl=0.06, poll_interval=0.01)
+        calls, results = [], []
+
+        def slow():
+            calls.append(1)
+            time.sleep(0.3)
+            return 'value'
+
+        thread = threading.Thread(target=lambda: results.append(leader.do('k', slow)))
+        thread.start()
+        time.sleep(0.05)
+        results.append(follower.do('k', slow))
+        thread.join()
+        assert calls == [1] and results == ['value', 'value']
+        assert follower.stats()['remote_shared'] == 1
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+"""Process-wide container of shared ModelManager, RAGSystem, FileManager and agents."""
+import os
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROJECTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'projects')
+
+
+class AgentContainer:
+    """Lazily builds and caches the heavy agent dependencies.
+
+    Each component is constructed on first access and reused afterwards.
+    Construction is guarded by a lock so concurrent requests never build a
+    second RAGSystem; a failed construction is not cached and is retried on
+    the next access.
+    """
+
+    def __init__(self, projects_dir=None):
+        self.projects_dir = projects_dir or DEFAULT_PROJECTS_DIR
+        self.pid = os.getpid()
+        self._lock = threading.RLock()
+        self._instances = {}
+
+    def _get(self, name, factory):
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        with self._lock:
+            instance = self._instances.get(name)
+            if instance is None:
+                logger.info(f'Initialising shared {name} (pid {self.pid})')
+                instance = factory()
+                self._instances[name] = instance
+            return instance
+
+    def peek(self, name):
+        """Return component ``name`` if it has been built, without building it."""
+        return self._instances.get(name)
+
+    @property
+    def model_manager(self):
+        from utils.model_manager import ModelManager
+        return self._get('model_manager', ModelManager)
+
+    @property
+    def rag_system(self):
+        socket_path = os.environ.get('RAG_SERVICE_SOCKET')
+        if socket_path:
+            from utils.retrieval_service import RetrievalClient
+            return self._get('rag_system', lambda: RetrievalClient(socket_path))
+        from utils.rag_system import RAGSystem
+        return self._get('rag_system', RAGSystem)
+
+    @property
+    def file_manager(self):
+        from utils.file_manager import FileManager
+        return self._get('file_manager', lambda: FileManager(self.projects_dir))
+
+    @property
+    def requirement_analyzer(self):
+        from agents.requirement_analyzer import RequirementAnalyzer
+        return self._get('requirement_analyzer',
+                         lambda: RequirementAnalyzer(self.model_manager, self.rag_system))
+
+    @property
+    def project_creator(self):
+        from agents.project_creator import ProjectCreator
+        return self._get('project_creator',
+                         lambda: ProjectCreator(self.model_manager, self.rag_system, self.file_manager))
+
+    @property
+    def code_generator(self):
+        from agents.code_generator import CodeGenerator
+        return self._get('code_generator',
+                         lambda: CodeGenerator(self.model_manager, self.rag_system, self.file_manager))
+
+    @property
+    def code_customizer(self):
+        from agents.customizer import CodeCustomizer
+        return self._get('code_customizer',
+                         lambda: CodeCustomizer(self.model_manager, self.rag_system))
+
+    def reset(self):
+        """Drop all cached instances (e.g. after a fork or in tests)."""
+        with self._lock:
+            self._instances.clear()
+            self.pid = os.getpid()
+
+
+_process_container = None
+_process_lock = threading.Lock()
+
+
+def get_process_container(projects_dir=None):
+    """Return the container for the current process, rebuilding it after a fork."""
+    global _process_container
+    container = _process_container
+    if container is not None and container.pid == os.getpid():
+        return container
+    with _process_lock:
+        if _process_container is None or _process_container.pid != os.getpid():
+            _process_container = AgentContainer(
+                projects_dir or os.environ.get('PROJECTS_DIR', DEFAULT_PROJECTS_DIR)
+            )
+        return _process_container
+
+
+def reset_process_container():
+    """Forget the process container so the next access builds a fresh one."""
+    global _process_container
+    with _process_lock:
+        _process_container = None
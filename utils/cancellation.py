@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+"""Cancellation tokens that stop in-flight LLM work when its requester goes away."""
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# A Celery revoke sets this flag; workers poll it for their running tasks.
+CANCEL_PREFIX = 'cancel:llm:'
+CANCEL_TTL = 600
+POLL_INTERVAL = 0.5
+
+
+class GenerationCancelled(RuntimeError):
+    """Raised when an LLM call is abandoned because its token was cancelled."""
+
+
+class CancelToken:
+    """One-shot cancellation flag with callbacks.
+
+    Callbacks registered through ``on_cancel`` run (once, on the cancelling
+    thread) when ``cancel`` is called, e.g. to close an HTTP connection that
+    a generation thread is blocked on.
+    """
+
+    def __init__(self, name=None):
+        self.name = name
+        self.reason = None
+        self._event = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self, reason='cancelled'):
+        with self._lock:
+            if self._event.is_set():
+                return False
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        logger.info(f'Cancelling {self.name or "LLM work"}: {reason}')
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.warning(f'Cancel callback failed: {e}')
+        return True
+
+    @contextmanager
+    def on_cancel(self, callback):
+        """Run ``callback`` if the token is cancelled while the block runs.
+
+        Runs it immediately when the token is already cancelled.
+        """
+        with self._lock:
+            registered = not self._event.is_set()
+            if registered:
+                self._callbacks.append(callback)
+        if not registered:
+            callback()
+        try:
+            yield self
+        finally:
+            with self._lock:
+                if callback in self._callbacks:
+                    self._callbacks.remove(callback)
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise GenerationCancelled(f'{self.name or "Generation"} cancelled: {self.reason}')
+
+    def wait(self, timeout=None):
+        return self._event.wait(timeout)
+
+
+_local = threading.local()
+
+
+def current_token():
+    """Token governing LLM calls made on this thread, or None."""
+    return getattr(_local, 'token', None)
+
+
+@contextmanager
+def cancellation_scope(token):
+    """Make ``token`` govern LLM calls made inside the block (on this thread)."""
+    previous = current_token()
+    _local.token = token
+    try:
+        yield token
+    finally:
+        _local.token = previous
+
+
+class CancellationRegistry:
+    """Live cancel tokens by owner key (a Socket.IO sid or a Celery task id).
+
+    ``cancel`` stops work in this process. ``request_cancel`` also sets a
+    Redis flag that other processes pick up: while they hold tokens, a
+    watcher thread polls the flags every POLL_INTERVAL seconds.
+    """
+
+    def __init__(self, poll_interval=POLL_INTERVAL):
+        self.poll_interval = poll_interval
+        self._tokens = {}
+        self._lock = threading.Lock()
+        self._redis = None
+        self._watcher = None
+        self.cancelled = 0
+
+    @contextmanager
+    def scope(self, key, redis=None):
+        """Register a token for ``key`` and make it current for the block."""
+        token = CancelToken(str(key))
+        with self._lock:
+            self._tokens.setdefault(str(key), []).append(token)
+            if redis is not None:
+                self._redis = redis
+                self._ensure_watcher()
+        try:
+            with cancellation_scope(token):
+                yield token
+        finally:
+            with self._lock:
+                tokens = self._tokens.get(str(key), [])
+                if token in tokens:
+                    tokens.remove(token)
+                if not tokens:
+                    self._tokens.pop(str(key), None)
+
+    def cancel(self, key, reason='cancelled'):
+        """Cancel every live token for ``key`` in this process; returns how many."""
+        with self._lock:
+            tokens = list(self._tokens.get(str(key), []))
+        count = sum(1 for token in tokens if token.cancel(reason))
+        with self._lock:
+            self.cancelled += count
+        return count
+
+    def request_cancel(self, key, redis=None, reason='cancelled'):
+        """Cancel ``key`` here and flag it for every other process via Redis."""
+        if redis is not None:
+            try:
+                redis.setex(f'{CANCEL_PREFIX}{key}', CANCEL_TTL, reason)
+            except Exception as e:
+                logger.warning(f'Could not publish cancellation of {key}: {e}')
+        return self.cancel(key, reason)
+
+    def _ensure_watcher(self):
+        if self._watcher is None or not self._watcher.is_alive():
+            self._watcher = threading.Thread(target=self._watch, name='llm-cancel-watch', daemon=True)
+            self._watcher.start()
+
+    def _watch(self):
+        while True:
+            time.sleep(self.poll_interval)
+            with self._lock:
+                keys = list(self._tokens)
+                redis = self._redis
+            if not keys:
+                continue
+            try:
+                flags = redis.mget([f'{CANCEL_PREFIX}{key}' for key in keys])
+            except Exception as e:
+                logger.debug(f'Cancellation poll failed: {e}')
+                continue
+            for key, reason in zip(keys, flags):
+                if reason:
+                    self.cancel(key, reason if isinstance(reason, str) else 'revoked')
+
+    def stats(self):
+        with self._lock:
+            return {'active': sum(len(t) for t in self._tokens.values()), 'cancelled': self.cancelled}
+
+
+_registry = CancellationRegistry()
+
+
+def get_registry():
+    """Process-wide cancellation registry."""
+    return _registry
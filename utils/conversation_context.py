@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+"""Per user/project/file customization sessions carrying Ollama token context."""
+import os
+import json
+import time
+import difflib
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+SESSION_PREFIX = 'session:customize:'
+SESSION_TTL = int(os.environ.get('CUSTOMIZE_SESSION_TTL', '1800'))
+MAX_SESSIONS = int(os.environ.get('CUSTOMIZE_MAX_SESSIONS', '128'))
+
+
+def session_key(user_id, project_name, file_path):
+    return f'{user_id}:{project_name or "-"}:{file_path or "inline"}'
+
+
+def code_delta(previous, current, max_ratio=0.5):
+    """Unified diff from ``previous`` to ``current``, or None when not worth it.
+
+    Returns '' when the code is unchanged and None when the diff would be
+    more than ``max_ratio`` of the file (a fresh prompt is cheaper then).
+    """
+    if previous == current:
+        return ''
+    diff = '\n'.join(difflib.unified_diff(previous.splitlines(), current.splitlines(),
+                                         'previous', 'current', lineterm=''))
+    return diff if len(diff) <= max_ratio * len(current) else None
+
+
+class ConversationStore:
+    """Two-tier (LRU + Redis) store of customization sessions.
+
+    A session holds the model, the token ``context`` Ollama returned for the
+    last turn, the code as of that turn and prefill accounting: the prompt
+    tokens actually evaluated versus what resending the full prompt would
+    have cost.
+    """
+
+    def __init__(self, redis_getter=None, ttl=SESSION_TTL, max_sessions=MAX_SESSIONS):
+        self._redis_getter = redis_getter
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.totals = {'turns': 0, 'followups': 0, 'prefill_tokens': 0, 'baseline_tokens': 0}
+
+    @property
+    def redis(self):
+        return self._redis_getter() if self._redis_getter else None
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._sessions.get(key)
+            if entry is not None:
+                expires_at, session = entry
+                if expires_at > now:
+                    self._sessions.move_to_end(key)
+                    return session
+                del self._sessions[key]
+        redis = self.redis
+        if redis:
+            try:
+                raw = redis.get(f'{SESSION_PREFIX}{key}')
+                if raw:
+                    session = json.loads(raw)
+                    self._remember(key, session)
+                    return session
+            except Exception:
+                pass
+        return None
+
+    def save(self, key, session):
+        self._remember(key, session)
+        redis = self.redis
+        if redis:
+            try:
+                redis.setex(f'{SESSION_PREFIX}{key}', self.ttl, json.dumps(session))
+            except Exception:
+                pass
+
+    def drop(self, key):
+        with self._lock:
+            self._sessions.pop(key, None)
+        redis = self.redis
+        if redis:
+            try:
+                redis.delete(f'{SESSION_PREFIX}{key}')
+            except Exception:
+                pass
+
+    def _remember(self, key, session):
+        with self._lock:
+            self._sessions[key] = (time.monotonic() + self.ttl, session)
+            self._sessions.move_to_end(key)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def record_turn(self, session, prefill_tokens, baseline_tokens, followup):
+        """Add one turn's prefill accounting to ``session`` and the totals."""
+        session['turns'] = session.get('turns', 0) + 1
+        session['prefill_tokens'] = session.get('prefill_tokens', 0) + prefill_tokens
+        session['baseline_tokens'] = session.get('baseline_tokens', 0) + baseline_tokens
+        with self._lock:
+            self.totals['turns'] += 1
+            self.totals['followups'] += int(followup)
+            self.totals['prefill_tokens'] += prefill_tokens
+            self.totals['baseline_tokens'] += baseline_tokens
+        return self.report(session)
+
+    @staticmethod
+    def report(session):
+        baseline = session.get('baseline_tokens', 0)
+        prefill = session.get('prefill_tokens', 0)
+        return {
+            'turns': session.get('turns', 0),
+            'prefill_tokens': prefill,
+            'baseline_tokens': baseline,
+            'prefill_saved': 1 - prefill / baseline if baseline else 0.0,
+        }
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.totals, sessions=len(self._sessions))
+        baseline = stats['baseline_tokens']
+        stats['prefill_saved'] = 1 - stats['prefill_tokens'] / baseline if baseline else 0.0
+        return stats
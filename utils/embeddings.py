@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+"""Process-wide, lazily loaded sentence-transformer embedding function."""
+import os
+import time
+import struct
+import hashlib
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = os.environ.get('RAG_EMBEDDING_MODEL', 'all-MiniLM-L6-v2')
+# cpu keeps a master-preloaded model shareable with forked children.
+DEVICE = os.environ.get('RAG_EMBEDDING_DEVICE', 'cpu')
+# Content-hash -> vector cache; an empty path keeps it in memory only.
+CACHE_PATH = os.environ.get('RAG_EMBEDDING_CACHE_PATH', os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'embedding_cache.sqlite3'))
+CACHE_SIZE = int(os.environ.get('RAG_EMBEDDING_CACHE_SIZE', '10000'))
+
+
+def _pack(vector):
+    return struct.pack(f'<{len(vector)}e', *vector)
+
+
+def _unpack(blob):
+    return list(struct.unpack(f'<{len(blob) // 2}e', blob))
+
+
+class EmbeddingCache:
+    """Vectors by sha256 of model name and text: an in-memory LRU over a SQLite store.
+
+    Vectors are stored as float16 (half the size of float32; well within
+    the precision cosine search needs). The SQLite file is shared by every
+    process on the host, so a text is embedded once across restarts.
+    """
+
+    def __init__(self, model_name, path=CACHE_PATH, max_entries=CACHE_SIZE):
+        self.model_name = model_name
+        self.path = path
+        self.max_entries = max_entries
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def key(self, text):
+        return hashlib.sha256(f'{self.model_name}\0{text}'.encode()).hexdigest()
+
+    def _db(self):
+        # A connection must not cross fork; reopen it in each process.
+        if self._conn is None or self._conn_pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)')
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    def _remember(self, key, vector):
+        self._lru[key] = vector
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    def get_many(self, keys):
+        """Cached vectors for ``keys``; missing keys are absent from the result."""
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._lru:
+                    self._lru.move_to_end(key)
+                    found[key] = self._lru[key]
+            self.hits += len(found)
+            missing = [key for key in dict.fromkeys(keys) if key not in found]
+            if missing and self.path:
+                try:
+                    db = self._db()
+                    for start in range(0, len(missing), 500):
+                        chunk = missing[start:start + 500]
+                        rows = db.execute(f'SELECT key, vector FROM embeddings WHERE key IN '
+                                          f'({",".join("?" * len(chunk))})', chunk).fetchall()
+                        for key, blob in rows:
+                            found[key] = _unpack(blob)
+                            self._remember(key, found[key])
+                            self.disk_hits += 1
+                except sqlite3.Error as e:
+                    logger.warning(f'Embedding cache read failed: {e}')
+            self.misses += sum(1 for key in missing if key not in found)
+        return found
+
+    def put_many(self, items):
+        """Store ``{key: vector}``; returns the vectors as they will be read back (float16)."""
+        stored = {key: _unpack(_pack(vector)) for key, vector in items.items()}
+        with self._lock:
+            for key, vector in stored.items():
+                self._remember(key, vector)
+            if self.path:
+                try:
+                    with self._db() as db:
+                        db.executemany('INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)',
+                                       [(key, _pack(vector)) for key, vector in stored.items()])
+                except sqlite3.Error as e:
+                    logger.warning(f'Embedding cache write failed: {e}')
+        return stored
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {'entries': len(self._lru), 'max_entries': self.max_entries, 'path': self.path or None,
+                    'hits': self.hits, 'disk_hits': self.disk_hits, 'misses': self.misses,
+                    'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0.0}
+
+
+class LazyEmbeddingFunction:
+    """Chroma embedding function that loads its model on the first call.
+
+    Constructing it is free; the SentenceTransformer (hundreds of MB plus
+    the torch import) is loaded once, under a lock, when the first text
+    needs embedding. Texts found in the embedding cache are not encoded
+    at all, so a warm cache may never load the model.
+    """
+
+    def __init__(self, model_name=MODEL_NAME, device=DEVICE, cache=None):
+        self.model_name = model_name
+        self.device = device
+        self.cache = cache if cache is not None else EmbeddingCache(model_name)
+        self._model = None
+        self._lock = threading.Lock()
+        self.load_seconds = None
+        self.loaded_pid = None
+
+    @property
+    def loaded(self):
+        return self._model is not None
+
+    def load(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    start = time.monotonic()
+                    from sentence_transformers import SentenceTransformer
+                    self._model = SentenceTransformer(self.model_name, device=self.device)
+                    self.load_seconds = time.monotonic() - start
+                    self.loaded_pid = os.getpid()
+                    logger.info(f'Loaded embedding model {self.model_name} on {self.device} '
+                                f'in {self.load_seconds:.1f}s (pid {self.loaded_pid})')
+        return self._model
+
+    def __call__(self, input):
+        texts = list(input)
+        keys = [self.cache.key(text) for text in texts]
+        vectors = self.cache.get_many(keys)
+        missing = {key: text for key, text in zip(keys, texts) if key not in vectors}
+        if missing:
+            encoded = self.load().encode(list(missing.values()), convert_to_numpy=True, normalize_embeddings=False)
+            vectors.update(self.cache.put_many(dict(zip(missing, encoded.tolist()))))
+        return [vectors[key] for key in keys]
+
+    def stats(self):
+        return {'model': self.model_name, 'device': self.device, 'loaded': self.loaded,
+                'load_seconds': self.load_seconds, 'loaded_pid': self.loaded_pid,
+                'inherited': self.loaded and self.loaded_pid != os.getpid(),
+                'cache': self.cache.stats()}
+
+
+_shared = None
+_shared_pid = None
+_lock = threading.Lock()
+
+
+def get_embedding_function():
+    """The embedding function shared by every RAGSystem in this process.
+
+    A model preloaded on the CPU by a parent process (see ``preload``) is
+    kept after fork so its pages are shared copy-on-write; anything else is
+    rebuilt in the child.
+    """
+    global _shared, _shared_pid
+    pid = os.getpid()
+    if _shared is None or (_shared_pid != pid and not (_shared.loaded and _shared.device == 'cpu')):
+        with _lock:
+            if _shared is None or (_shared_pid != pid and not (_shared.loaded and _shared.device == 'cpu')):
+                _shared = LazyEmbeddingFunction()
+                _shared_pid = pid
+    return _shared
+
+
+def preload():
+    """Load the shared model now, e.g. in a gunicorn or Celery master before forking.
+
+    Only the weights are loaded: running inference here would start torch's
+    thread pool, which does not survive fork.
+    """
+    function = get_embedding_function()
+    if function.device != 'cpu':
+        logger.warning(f'Not preloading embeddings on {function.device}; children load their own')
+        return function
+    function.load()
+    return function
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+"""Per-agent Ollama generation options (num_predict, num_ctx, stop, temperature)."""
+import os
+
+DEFAULT_TEMPERATURE = 0.2
+DEFAULT_NUM_PREDICT = 4096
+MAX_NUM_CTX = int(os.environ.get('LLM_MAX_NUM_CTX', '32768'))
+# Ollama >= 0.5 accepts a JSON schema as ``format``; older servers only 'json'.
+USE_JSON_SCHEMA = os.environ.get('LLM_JSON_SCHEMA', 'false').lower() == 'true'
+
+# Ollama reloads the model whenever num_ctx changes, so the context window is
+# rounded up to a few coarse buckets instead of tracking the prompt exactly.
+NUM_CTX_BUCKETS = (4096, 8192, 16384, 32768)
+
+# No stop sequences for code: a bare fence line cannot be told apart from an
+# opening fence after a preface line, and markdown files contain inner fences.
+# Trailing prose after the closing fence is stripped by the agents instead.
+PROFILES = {
+    'requirement_analysis': {'temperature': 0.1, 'num_predict': 1024},
+    'file_structure': {'temperature': 0.1, 'num_predict': 1024},
+    'code_generation': {'temperature': 0.2, 'num_predict': 4096},
+    'customization': {'temperature': 0.2, 'num_predict': 4096},
+}
+
+
+def estimate_tokens(text):
+    """Cheap upper-bound token estimate (code averages ~3-4 chars per token)."""
+    return len(text or '') // 3 + 1
+
+
+def size_num_ctx(prompt, system_prompt=None, num_predict=DEFAULT_NUM_PREDICT, max_ctx=MAX_NUM_CTX,
+                 context_tokens=0):
+    """Smallest bucket holding the prompt, any carried-over context and the output."""
+    needed = estimate_tokens(prompt) + estimate_tokens(system_prompt) + context_tokens + num_predict
+    for bucket in NUM_CTX_BUCKETS:
+        if bucket >= needed and bucket <= max_ctx:
+            return bucket
+    return max_ctx
+
+
+def build_options(profile=None, prompt='', system_prompt=None, temperature=None,
+                  max_tokens=None, stop=None, context_tokens=0):
+    """Resolve the ``options`` object for an Ollama /api/generate payload.
+
+    Explicit arguments win over the profile, which wins over the defaults.
+    """
+    base = PROFILES.get(profile, {})
+    options = {
+        'temperature': temperature if temperature is not None else base.get('temperature', DEFAULT_TEMPERATURE),
+        'num_predict': max_tokens if max_tokens is not None else base.get('num_predict', DEFAULT_NUM_PREDICT),
+    }
+    stop = stop if stop is not None else base.get('stop')
+    if stop:
+        options['stop'] = list(stop)
+    options['num_ctx'] = size_num_ctx(prompt, system_prompt, options['num_predict'],
+                                      context_tokens=context_tokens)
+    return options
+
+
+def json_format(schema=None):
+    """Value for the Ollama ``format`` field: the schema when enabled, else 'json'."""
+    return schema if schema and USE_JSON_SCHEMA else 'json'
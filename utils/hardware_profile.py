@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+"""Per-host hardware profile (RAM, GPU VRAM, CPU throughput), detected once and cached."""
+import os
+import json
+import time
+import socket
+import logging
+import platform
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
+
+PROFILE_TTL = int(os.environ.get('HARDWARE_PROFILE_TTL', '86400'))
+PROFILE_PATH = os.environ.get(
+    'HARDWARE_PROFILE_PATH',
+    os.path.join(tempfile.gettempdir(), f'ai-dev-hardware-{socket.gethostname()}.json'),
+)
+
+# Sustained GFLOPS a CPU-only host needs before a tier is worth running;
+# below these a larger model fits in RAM but generates too slowly.
+CPU_TIER_GFLOPS = [
+    ('qwen2.5-coder:32b', 400.0),
+    ('qwen2.5-coder:14b', 150.0),
+    ('qwen2.5-coder:7b', 50.0),
+]
+
+_profile = None
+_lock = threading.Lock()
+
+
+def detect_ram_gb():
+    try:
+        import psutil
+        return psutil.virtual_memory().total / (1024 ** 3)
+    except ImportError:
+        pass
+    try:
+        if platform.system() == 'Darwin':
+            import subprocess
+            r = subprocess.run(['sysctl', '-n', 'hw.memsize'], capture_output=True, text=True)
+            return int(r.stdout.strip()) / (1024 ** 3)
+        else:
+            with open('/proc/meminfo', 'r') as f:
+                for line in f:
+                    if line.startswith('MemTotal'):
+                        return int(line.split()[1]) / (1024 ** 2)
+    except Exception:
+        pass
+    return 8
+
+
+def detect_gpu_vram_gb(ram_gb=None):
+    try:
+        import subprocess
+        r = subprocess.run(
+            ['nvidia-smi', '--query-gpu=memory.total', '--format=csv,noheader,nounits'],
+            capture_output=True, text=True, timeout=5,
+        )
+        if r.returncode == 0:
+            return int(r.stdout.strip().split('\n')[0]) / 1024
+    except Exception:
+        pass
+    if platform.system() == 'Darwin' and platform.machine() == 'arm64':
+        # Apple silicon shares unified memory with the GPU.
+        return (ram_gb if ram_gb is not None else detect_ram_gb()) * 0.75
+    return 0
+
+
+def cpu_benchmark(duration=0.25):
+    """Rough single-process matrix-multiply throughput in GFLOPS.
+
+    Uses numpy (multi-threaded BLAS, like llama.cpp on CPU) when available and
+    a pure-Python multiply-add loop otherwise, which understates real capacity.
+    """
+    try:
+        import numpy as np
+        n = 256
+        a = np.random.rand(n, n).astype(np.float32)
+        b = np.random.rand(n, n).astype(np.float32)
+        a @ b
+        runs, start = 0, time.perf_counter()
+        while time.perf_counter() - start < duration:
+            a @ b
+            runs += 1
+        return 2 * n ** 3 * runs / (time.perf_counter() - start) / 1e9
+    except ImportError:
+        pass
+    ops, x, start = 0, 1.0, time.perf_counter()
+    while time.perf_counter() - start < duration:
+        for _ in range(10000):
+            x = x * 1.0000001 + 0.0000001
+        ops += 20000
+    return ops / (time.perf_counter() - start) / 1e9
+
+
+def detect_profile():
+    ram_gb = detect_ram_gb()
+    profile = {
+        'hostname': socket.gethostname(),
+        'platform': f'{platform.system()} {platform.machine()}',
+        'cpu_count': os.cpu_count() or 1,
+        'ram_gb': round(ram_gb, 1),
+        'gpu_vram_gb': round(detect_gpu_vram_gb(ram_gb), 1),
+        'cpu_gflops': round(cpu_benchmark(), 1),
+        'detected_at': time.time(),
+    }
+    logger.info(f'Detected hardware profile: {profile}')
+    return profile
+
+
+def _read_cached(path):
+    try:
+        with open(path) as f:
+            profile = json.load(f)
+        if time.time() - profile.get('detected_at', 0) < PROFILE_TTL:
+            return profile
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def get_hardware_profile(refresh=False, path=None):
+    """Hardware profile for this host.
+
+    Kept in memory per process and persisted to a per-host JSON file for
+    PROFILE_TTL seconds, so the nvidia-smi probe and the benchmark run at most
+    once a day per host instead of on every model selection.
+    """
+    global _profile
+    path = path or PROFILE_PATH
+    with _lock:
+        if not refresh:
+            if _profile and time.time() - _profile['detected_at'] < PROFILE_TTL:
+                return _profile
+            cached = _read_cached(path)
+            if cached:
+                _profile = cached
+                return _profile
+        _profile = detect_profile()
+        try:
+            tmp = f'{path}.{os.getpid()}.tmp'
+            with open(tmp, 'w') as f:
+                json.dump(_profile, f)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f'Could not persist hardware profile: {e}')
+        return _profile
+
+
+def recommend_model(profile):
+    """Largest qwen2.5-coder tier the memory and compute of ``profile`` support."""
+    ram_gb, vram_gb = profile.get('ram_gb', 8), profile.get('gpu_vram_gb', 0)
+    if ram_gb >= 32 or vram_gb >= 16:
+        tier = 'qwen2.5-coder:32b'
+    elif ram_gb >= 16 or vram_gb >= 8:
+        tier = 'qwen2.5-coder:14b'
+    elif ram_gb >= 8 or vram_gb >= 4:
+        tier = 'qwen2.5-coder:7b'
+    else:
+        return 'qwen2.5-coder:3b'
+    if vram_gb >= 4:
+        return tier
+    # CPU-only: step down until the measured throughput can sustain the tier.
+    gflops = profile.get('cpu_gflops', 0)
+    tiers = [t for t, _ in CPU_TIER_GFLOPS]
+    for candidate, needed in CPU_TIER_GFLOPS[tiers.index(tier):]:
+        if gflops >= needed:
+            return candidate
+    return 'qwen2.5-coder:3b'
@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+"""Incremental parsing and repair of JSON produced by the LLM."""
+import re
+import json
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+_TRAILING_COMMA = re.compile(r',(\s*[}\]])')
+
+_stats = {'parsed': 0, 'repaired': 0, 'failed': 0}
+_stats_lock = threading.Lock()
+
+
+def _record(outcome):
+    with _stats_lock:
+        _stats[outcome] += 1
+
+
+def json_parse_stats():
+    """Counts of clean parses, repaired parses and failures, plus rates."""
+    with _stats_lock:
+        stats = dict(_stats)
+    total = sum(stats.values())
+    stats['repair_rate'] = stats['repaired'] / total if total else 0.0
+    stats['failure_rate'] = stats['failed'] / total if total else 0.0
+    return stats
+
+
+class IncrementalJSONParser:
+    """Tracks a streamed JSON value and reports when the top-level value closes.
+
+    Text before the first ``{`` or ``[`` (prose, code fences) is ignored.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._length = 0
+        self._start = None
+        self._end = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    @property
+    def complete(self):
+        return self._end is not None
+
+    def feed(self, chunk):
+        """Consume a chunk; returns True once the top-level value is closed."""
+        if self.complete or not chunk:
+            return self.complete
+        offset = self._length
+        self._chunks.append(chunk)
+        self._length += len(chunk)
+        for i, ch in enumerate(chunk):
+            if self._start is None:
+                if ch in '{[':
+                    self._start = offset + i
+                    self._depth = 1
+                continue
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in '{[':
+                self._depth += 1
+            elif ch in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    self._end = offset + i + 1
+                    break
+        return self.complete
+
+    @property
+    def text(self):
+        full = ''.join(self._chunks)
+        if self._start is None:
+            return full
+        return full[self._start:self._end] if self.complete else full[self._start:]
+
+
+def _scan(text):
+    """Return (closers, in_string, comma_positions) for a possibly truncated value."""
+    stack, commas = [], []
+    in_string = escape = False
+    for i, ch in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == '\\':
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in '{[':
+            stack.append('}' if ch == '{' else ']')
+        elif ch in '}]':
+            if stack:
+                stack.pop()
+        elif ch == ',':
+            commas.append(i)
+    return stack, in_string, commas
+
+
+def _close(text):
+    stack, in_string, _ = _scan(text)
+    if in_string:
+        text += '"'
+    text = text.rstrip()
+    while text and text[-1] in ',:':
+        text = text[:-1].rstrip()
+    return text + ''.join(reversed(stack))
+
+
+def repair_json(text, max_attempts=20):
+    """Best-effort repair of truncated or slightly malformed JSON text.
+
+    Closes open strings and brackets, drops trailing commas and, if needed,
+    trims back to earlier element boundaries until the result parses.
+    Raises ValueError when nothing parseable is left.
+    """
+    text = _TRAILING_COMMA.sub(r'\1', text.strip())
+    try:
+        return json.loads(_close(text))
+    except ValueError:
+        pass
+    _, _, commas = _scan(text)
+    for pos in reversed(commas[-max_attempts:]):
+        try:
+            return json.loads(_close(text[:pos]))
+        except ValueError:
+            continue
+    raise ValueError('Unrepairable JSON')
+
+
+def _extract(text):
+    text = text.strip()
+    match = re.search(r'```(?:json)?\s*\n(.*?)(?:\n```|$)', text, re.DOTALL)
+    if match:
+        text = match.group(1)
+    starts = [i for i in (text.find('{'), text.find('[')) if i >= 0]
+    return text[min(starts):] if starts else text
+
+
+def parse_llm_json(text):
+    """Parse LLM output as JSON, repairing it if necessary.
+
+    Updates the parse/repair/failure counters and raises ValueError when the
+    output cannot be salvaged.
+    """
+    if not isinstance(text, str) or not text.strip():
+        _record('failed')
+        raise ValueError('Empty LLM output')
+    candidate = _extract(text)
+    parser = IncrementalJSONParser()
+    parser.feed(candidate)
+    if parser.complete:
+        try:
+            value = json.loads(parser.text)
+            _record('parsed')
+            return value
+        except ValueError:
+            pass
+    try:
+        value = repair_json(candidate)
+    except ValueError:
+        _record('failed')
+        logger.warning(f'Could not parse LLM JSON output ({len(text)} chars)')
+        raise
+    _record('repaired')
+    logger.info('Repaired malformed LLM JSON output')
+    return value
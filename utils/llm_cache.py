@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+"""Content-addressed cache for LLM responses (in-process LRU + Redis tier)."""
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = 'cache:llm:'
+DEFAULT_TTL = int(os.environ.get('LLM_CACHE_TTL', '86400'))
+DEFAULT_MAX_ENTRIES = int(os.environ.get('LLM_CACHE_MAX_ENTRIES', '256'))
+DEFAULT_MAX_VALUE_BYTES = int(os.environ.get('LLM_CACHE_MAX_VALUE_BYTES', str(256 * 1024)))
+
+
+def make_cache_key(model, prompt, system_prompt=None, temperature=None, max_tokens=None,
+                   stop=None, fmt=None):
+    """Stable hash of everything that influences the generated text."""
+    raw = json.dumps([model, system_prompt or '', prompt, temperature, max_tokens, stop or [], fmt],
+                     sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class LLMResponseCache:
+    """Two-tier response cache.
+
+    The first tier is a bounded LRU dict private to the process; the second
+    is Redis, shared by web and Celery processes. Both tiers honour the TTL;
+    Redis size is bounded by its ``maxmemory`` policy and by refusing values
+    larger than ``max_value_bytes``.
+    """
+
+    def __init__(self, redis_getter=None, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES,
+                 max_value_bytes=DEFAULT_MAX_VALUE_BYTES):
+        self._redis_getter = redis_getter
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_value_bytes = max_value_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {'memory_hits': 0, 'redis_hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+    @property
+    def redis(self):
+        return self._redis_getter() if self._redis_getter else None
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.counters['memory_hits'] += 1
+                    return value
+                del self._entries[key]
+        redis = self.redis
+        if redis:
+            try:
+                value = redis.get(f'{CACHE_PREFIX}{key}')
+                if value is not None:
+                    self._remember(key, value)
+                    self._count('redis_hits')
+                    return value
+            except Exception:
+                pass
+        self._count('misses')
+        return None
+
+    def set(self, key, value):
+        if not isinstance(value, str) or not value:
+            return
+        if len(value.encode()) > self.max_value_bytes:
+            logger.debug(f'Not caching oversized LLM response ({len(value)} chars)')
+            return
+        self._remember(key, value)
+        self._count('stores')
+        redis = self.redis
+        if redis:
+            try:
+                redis.setex(f'{CACHE_PREFIX}{key}', self.ttl, value)
+            except Exception:
+                pass
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.counters['evictions'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats['entries'] = len(self._entries)
+        lookups = stats['memory_hits'] + stats['redis_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['memory_hits'] + stats['redis_hits']) / lookups if lookups else 0.0
+        return stats
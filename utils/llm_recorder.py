@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+"""Record Ollama API calls to a compact file and replay them offline."""
+import os
+import json
+import gzip
+import time
+import hashlib
+import logging
+import threading
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+MODES = ('record', 'replay')
+# Payload fields that vary with traffic rather than with the request itself.
+VOLATILE_FIELDS = ('keep_alive',)
+
+
+class ReplayMissError(RuntimeError):
+    """Replay found no recording for a request."""
+
+
+def request_key(endpoint, method, payload):
+    """Stable hash of one API call, ignoring traffic-dependent fields."""
+    payload = {k: v for k, v in (payload or {}).items() if k not in VOLATILE_FIELDS}
+    raw = json.dumps([endpoint, method, payload], sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+
+def _summary(payload):
+    """Request payload as stored: token context replaced by its length."""
+    payload = dict(payload or {})
+    if 'context' in payload:
+        payload['context'] = f'<{len(payload["context"])} tokens>'
+    return payload
+
+
+class LLMRecorder:
+    """Captures or serves back Ollama responses, keyed by request payload.
+
+    Recordings are gzip-compressed JSON lines, one per call, holding the
+    request, the response (or streamed chunks with their arrival offsets)
+    and the elapsed time. In replay, ``speed`` scales the recorded timing:
+    1.0 reproduces the original latency, 0 serves responses immediately.
+    Repeated identical requests are served in recorded order; once exhausted
+    the last recording is reused. Unrecorded requests raise ReplayMissError.
+    """
+
+    def __init__(self, path, mode='record', speed=1.0):
+        if mode not in MODES:
+            raise ValueError(f'Unknown recorder mode: {mode}')
+        self.path = path
+        self.mode = mode
+        self.speed = max(0.0, speed)
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._stats = {'recorded': 0, 'replayed': 0, 'misses': 0}
+        if mode == 'replay':
+            self._load()
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def _load(self):
+        with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries.setdefault(entry['key'], deque()).append(entry)
+        logger.info(f'Loaded {sum(map(len, self._entries.values()))} LLM recordings from {self.path}')
+
+    def _append(self, entry):
+        line = json.dumps(entry, separators=(',', ':')) + '\n'
+        with self._lock:
+            # Each append is its own gzip member; readers see one stream.
+            with gzip.open(self.path, 'at', encoding='utf-8') as f:
+                f.write(line)
+            self._stats['recorded'] += 1
+
+    def _next(self, key, endpoint):
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                self._stats['misses'] += 1
+                raise ReplayMissError(f'No recording for {endpoint} request {key}')
+            self._stats['replayed'] += 1
+            return entries.popleft() if len(entries) > 1 else entries[0]
+
+    def _sleep(self, seconds):
+        if self.speed and seconds > 0:
+            time.sleep(seconds * self.speed)
+
+    def call(self, endpoint, method, payload, send):
+        """Return the response for one call; ``send()`` performs it when recording."""
+        key = request_key(endpoint, method, payload)
+        if self.mode == 'replay':
+            entry = self._next(key, endpoint)
+            self._sleep(entry['elapsed'])
+            return entry['response']
+        start = time.monotonic()
+        response = send()
+        self._append({'key': key, 'endpoint': endpoint, 'request': _summary(payload),
+                      'elapsed': round(time.monotonic() - start, 4), 'response': response})
+        return response
+
+    def stream(self, endpoint, payload, send):
+        """Yield streamed chunks; ``send()`` returns the live iterator when recording.
+
+        A stream closed early by the consumer is recorded up to that point,
+        which is exactly what a replay of the same consumer will read.
+        """
+        key = request_key(endpoint, 'POST', payload)
+        if self.mode == 'replay':
+            entry = self._next(key, endpoint)
+            previous = 0.0
+            for offset, chunk in entry['chunks']:
+                self._sleep(offset - previous)
+                previous = offset
+                yield chunk
+            return
+        start = time.monotonic()
+        chunks = []
+        try:
+            for chunk in send():
+                chunks.append([round(time.monotonic() - start, 4), chunk])
+                yield chunk
+        finally:
+            self._append({'key': key, 'endpoint': endpoint, 'request': _summary(payload),
+                          'elapsed': round(time.monotonic() - start, 4), 'chunks': chunks})
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, mode=self.mode, path=self.path, speed=self.speed,
+                        recordings=sum(map(len, self._entries.values())))
+
+
+def recorder_from_env():
+    """LLMRecorder configured by LLM_RECORD_MODE / LLM_RECORD_PATH, or None."""
+    mode = os.environ.get('LLM_RECORD_MODE', '').lower()
+    if not mode:
+        return None
+    path = os.environ.get('LLM_RECORD_PATH', 'recordings/llm.jsonl.gz')
+    speed = float(os.environ.get('LLM_REPLAY_SPEED', '1.0'))
+    logger.info(f'LLM {mode} mode using {path}')
+    return LLMRecorder(path, mode=mode, speed=speed)
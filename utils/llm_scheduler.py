@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+"""Priority-aware admission control in front of the Ollama backend."""
+import os
+import time
+import heapq
+import itertools
+import logging
+import threading
+from contextlib import contextmanager, nullcontext
+from utils.cancellation import GenerationCancelled
+
+logger = logging.getLogger(__name__)
+
+# Lower value = served first.
+PRIORITIES = {
+    'interactive': 0,   # code customization the user is waiting on
+    'analysis': 1,      # requirement analysis
+    'background': 2,    # project / file generation
+}
+
+# Default time a request may spend queued + running before it is pointless.
+DEFAULT_DEADLINES = {
+    'interactive': float(os.environ.get('LLM_DEADLINE_INTERACTIVE', '90')),
+    'analysis': float(os.environ.get('LLM_DEADLINE_ANALYSIS', '180')),
+    'background': float(os.environ.get('LLM_DEADLINE_BACKGROUND', '540')),
+}
+
+MAX_CONCURRENCY = int(os.environ.get('LLM_MAX_CONCURRENCY', '2'))
+
+
+class LLMBusyError(RuntimeError):
+    """Raised when a request is rejected because its deadline cannot be met."""
+
+
+class _Waiter:
+    __slots__ = ('priority', 'event', 'granted', 'cancelled')
+
+    def __init__(self, priority):
+        self.priority = priority
+        self.event = threading.Event()
+        self.granted = False
+        self.cancelled = False
+
+
+class _ModelQueue:
+    def __init__(self):
+        self.active = 0
+        self.heap = []
+        self.avg_service = None
+        self.admitted = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+
+
+class AdmissionScheduler:
+    """Bounded per-model concurrency with priority ordering and deadlines.
+
+    A freed slot is handed directly to the highest-priority waiter (FIFO
+    within a class). Requests whose estimated queue wait already exceeds
+    their deadline are rejected immediately instead of timing out later.
+    """
+
+    def __init__(self, max_concurrency=MAX_CONCURRENCY):
+        self.max_concurrency = max(1, max_concurrency)
+        self._queues = {}
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+
+    def _queue(self, model):
+        q = self._queues.get(model)
+        if q is None:
+            q = self._queues[model] = _ModelQueue()
+        return q
+
+    def _estimated_wait(self, q, priority):
+        if q.active < self.max_concurrency or not q.avg_service:
+            return 0.0
+        ahead = sum(1 for _, _, w in q.heap if not w.cancelled and w.priority <= priority)
+        return (ahead // self.max_concurrency + 1) * q.avg_service
+
+    def acquire(self, model, priority='background', deadline=None, cancel_token=None):
+        """Block until a slot for ``model`` is free; returns the admit timestamp.
+
+        Cancelling ``cancel_token`` while queued gives up the place in the
+        queue and raises GenerationCancelled.
+        """
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+        level = PRIORITIES.get(priority, PRIORITIES['background'])
+        if deadline is None:
+            deadline = time.monotonic() + DEFAULT_DEADLINES.get(priority, DEFAULT_DEADLINES['background'])
+        start = time.monotonic()
+        with self._lock:
+            q = self._queue(model)
+            # Live waiters only exist while every slot is taken, so a free
+            # slot means anything left in the heap was cancelled.
+            if q.active < self.max_concurrency:
+                q.heap.clear()
+                q.active += 1
+                q.admitted += 1
+                return start
+            if start + self._estimated_wait(q, level) > deadline:
+                q.rejected += 1
+                raise LLMBusyError(f'Model {model} is busy; request cannot be served before its deadline')
+            waiter = _Waiter(level)
+            heapq.heappush(q.heap, (level, next(self._seq), waiter))
+        with cancel_token.on_cancel(waiter.event.set) if cancel_token is not None else nullcontext():
+            waiter.event.wait(max(0.0, deadline - time.monotonic()))
+        with self._lock:
+            if not waiter.granted:
+                waiter.cancelled = True
+                if cancel_token is not None and cancel_token.cancelled:
+                    raise GenerationCancelled(f'Cancelled while waiting for model {model}')
+                q.rejected += 1
+                raise LLMBusyError(f'Timed out waiting for model {model}')
+            q.total_wait += time.monotonic() - start
+        return time.monotonic()
+
+    def release(self, model, admitted_at=None):
+        with self._lock:
+            q = self._queue(model)
+            if admitted_at is not None:
+                elapsed = time.monotonic() - admitted_at
+                q.avg_service = elapsed if q.avg_service is None else 0.8 * q.avg_service + 0.2 * elapsed
+            while q.heap:
+                _, _, waiter = heapq.heappop(q.heap)
+                if waiter.cancelled:
+                    continue
+                waiter.granted = True
+                q.admitted += 1
+                waiter.event.set()
+                return
+            q.active = max(0, q.active - 1)
+
+    @contextmanager
+    def slot(self, model, priority='background', deadline=None, cancel_token=None):
+        admitted_at = self.acquire(model, priority, deadline, cancel_token)
+        try:
+            yield
+        finally:
+            self.release(model, admitted_at)
+
+    def stats(self):
+        with self._lock:
+            result = {}
+            for model, q in self._queues.items():
+                depth = {name: 0 for name in PRIORITIES}
+                for level, _, w in q.heap:
+                    if not w.cancelled:
+                        name = next(n for n, v in PRIORITIES.items() if v == level)
+                        depth[name] += 1
+                result[model] = {
+                    'active': q.active,
+                    'max_concurrency': self.max_concurrency,
+                    'queue_depth': depth,
+                    'admitted': q.admitted,
+                    'rejected': q.rejected,
+                    'avg_service_seconds': q.avg_service,
+                    'total_wait_seconds': q.total_wait,
+                }
+            return result
@@ -0,0 +1,279 @@
+#!/usr/bin/env python
+"""Per-call Ollama timing telemetry aggregated into per-model/agent histograms."""
+import os
+import json
+import time
+import socket
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Recent samples kept per series for percentiles (rolling window).
+WINDOW_SECONDS = int(os.environ.get('LLM_TELEMETRY_WINDOW', '900'))
+WINDOW_SAMPLES = 1000
+# Each process publishes its cumulative counts to Redis for /metrics to sum, and
+# republishes every PUBLISH_INTERVAL seconds (even when idle) so a live process's
+# key never expires and the summed counters never appear to reset.
+PUBLISH_PREFIX = 'telemetry:llm:'
+PUBLISH_TTL = 300
+PUBLISH_INTERVAL = 30
+
+_NS = 1e9
+
+BUCKETS = {
+    'tokens_per_second': (1, 2, 5, 10, 20, 40, 80, 160),
+    'prefill_tokens_per_second': (10, 50, 100, 250, 500, 1000, 2500, 5000),
+    'time_to_first_token_seconds': (0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60),
+    'prefill_seconds': (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30),
+    'load_seconds': (0.1, 0.5, 1, 2, 5, 10, 30, 60),
+    'total_seconds': (0.5, 1, 2, 5, 10, 30, 60, 120, 300),
+}
+
+_local = threading.local()
+
+
+def current_user_tag():
+    return getattr(_local, 'user', None)
+
+
+@contextmanager
+def tagged_user(user_id):
+    """Attribute LLM calls made inside the block (on this thread) to ``user_id``."""
+    previous = current_user_tag()
+    _local.user = user_id
+    try:
+        yield
+    finally:
+        _local.user = previous
+
+
+def set_user_tag(user_id):
+    _local.user = user_id
+
+
+class Histogram:
+    """Cumulative bucket counts (Prometheus style) plus a rolling sample window."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.recent = deque(maxlen=WINDOW_SAMPLES)
+
+    def observe(self, value, now):
+        self.count += 1
+        self.total += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.recent.append((now, value))
+
+    def summary(self, now):
+        values = sorted(v for t, v in self.recent if now - t <= WINDOW_SECONDS)
+        if not values:
+            return {'count': self.count, 'window_count': 0}
+
+        def pct(p):
+            return values[min(len(values) - 1, int(p * len(values)))]
+
+        return {
+            'count': self.count,
+            'window_count': len(values),
+            'mean': sum(values) / len(values),
+            'p50': pct(0.5),
+            'p95': pct(0.95),
+            'max': values[-1],
+        }
+
+
+class LLMTelemetry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = {}
+        self._tokens = {}
+        self._users = {}
+        self._published_at = 0.0
+        self._publish_redis = None
+        self._publisher_pid = None
+
+    def record(self, result, model=None, agent=None, user=None, ttft=None):
+        """Record one finished Ollama response (the final chunk when streaming).
+
+        ``ttft`` is the measured time to first token for streams; otherwise it
+        is estimated as load + prefill time.
+        """
+        model = model or result.get('model') or 'unknown'
+        agent = agent or 'default'
+        user = user if user is not None else current_user_tag()
+        eval_count = result.get('eval_count') or 0
+        eval_ns = result.get('eval_duration') or 0
+        prompt_count = result.get('prompt_eval_count') or 0
+        prompt_ns = result.get('prompt_eval_duration') or 0
+        load_ns = result.get('load_duration') or 0
+        total_ns = result.get('total_duration') or 0
+        observations = {
+            'prefill_seconds': prompt_ns / _NS,
+            'load_seconds': load_ns / _NS,
+            'time_to_first_token_seconds': ttft if ttft is not None else (load_ns + prompt_ns) / _NS,
+        }
+        if total_ns:
+            observations['total_seconds'] = total_ns / _NS
+        if eval_count and eval_ns:
+            observations['tokens_per_second'] = eval_count / (eval_ns / _NS)
+        if prompt_count and prompt_ns:
+            observations['prefill_tokens_per_second'] = prompt_count / (prompt_ns / _NS)
+        now = time.time()
+        key = (model, agent)
+        with self._lock:
+            series = self._series.setdefault(key, {name: Histogram(b) for name, b in BUCKETS.items()})
+            for name, value in observations.items():
+                series[name].observe(value, now)
+            tokens = self._tokens.setdefault(key, {'requests': 0, 'prompt_tokens': 0, 'eval_tokens': 0})
+            tokens['requests'] += 1
+            tokens['prompt_tokens'] += prompt_count
+            tokens['eval_tokens'] += eval_count
+            if user is not None:
+                usage = self._users.setdefault(str(user), {'requests': 0, 'prompt_tokens': 0, 'eval_tokens': 0})
+                usage['requests'] += 1
+                usage['prompt_tokens'] += prompt_count
+                usage['eval_tokens'] += eval_count
+
+    def snapshot(self):
+        """Aggregates as ``{'models': {model: {agent: {...}}}, 'users': {...}}``."""
+        now = time.time()
+        models = {}
+        with self._lock:
+            for (model, agent), series in self._series.items():
+                entry = dict(self._tokens[(model, agent)])
+                entry.update({name: h.summary(now) for name, h in series.items()})
+                models.setdefault(model, {})[agent] = entry
+            users = {u: dict(v) for u, v in self._users.items()}
+        return {'window_seconds': WINDOW_SECONDS, 'models': models, 'users': users}
+
+    def export(self):
+        """Cumulative counts in a JSON-safe, mergeable form (see ``publish``)."""
+        with self._lock:
+            return {
+                f'{model}|{agent}': {
+                    'histograms': {n: [list(h.counts), h.total, h.count] for n, h in series.items()},
+                    'tokens': dict(self._tokens[(model, agent)]),
+                }
+                for (model, agent), series in self._series.items()
+            }
+
+    def publish(self, redis, ttl=PUBLISH_TTL):
+        """Share this process's cumulative counts so /metrics can sum all processes."""
+        try:
+            redis.setex(f'{PUBLISH_PREFIX}{socket.gethostname()}:{os.getpid()}', ttl, json.dumps(self.export()))
+        except Exception as e:
+            logger.debug(f'Telemetry publish failed: {e}')
+
+    def maybe_publish(self, redis, interval=PUBLISH_INTERVAL):
+        """Publish if ``interval`` has passed and keep publishing in the background."""
+        if not redis:
+            return
+        now = time.monotonic()
+        if now - self._published_at >= interval:
+            self._published_at = now
+            self.publish(redis)
+        self._publish_redis = redis
+        self._ensure_publisher(interval)
+
+    def _ensure_publisher(self, interval):
+        # Threads do not survive fork; each process starts its own heartbeat.
+        if self._publisher_pid == os.getpid():
+            return
+        with self._lock:
+            if self._publisher_pid == os.getpid():
+                return
+            self._publisher_pid = os.getpid()
+        threading.Thread(target=self._publish_loop, args=(interval,), name='llm-telemetry-publish',
+                         daemon=True).start()
+
+    def _publish_loop(self, interval):
+        while True:
+            time.sleep(interval)
+            if time.monotonic() - self._published_at >= interval:
+                self._published_at = time.monotonic()
+                self.publish(self._publish_redis)
+
+    @staticmethod
+    def collect(redis, local_export=None):
+        """Merge published exports from every process (plus ``local_export``)."""
+        exports = []
+        if redis:
+            try:
+                keys = list(redis.scan_iter(f'{PUBLISH_PREFIX}*'))
+                if not keys:
+                    raise LookupError('nothing published')
+                own = f'{PUBLISH_PREFIX}{socket.gethostname()}:{os.getpid()}'
+                exports = [json.loads(raw) for key, raw in zip(keys, redis.mget(keys))
+                           if raw and key != own]
+            except Exception as e:
+                logger.debug(f'Telemetry collect failed: {e}')
+        if local_export is not None:
+            exports.append(local_export)
+        merged = {}
+        for export in exports:
+            for key, data in export.items():
+                target = merged.setdefault(key, {'histograms': {}, 'tokens': {}})
+                for name, (counts, total, count) in data['histograms'].items():
+                    current = target['histograms'].setdefault(name, [[0] * len(counts), 0.0, 0])
+                    current[0] = [a + b for a, b in zip(current[0], counts)]
+                    current[1] += total
+                    current[2] += count
+                for field, value in data['tokens'].items():
+                    target['tokens'][field] = target['tokens'].get(field, 0) + value
+        return merged
+
+    def prometheus(self, merged=None):
+        """Prometheus text exposition of cumulative histograms and counters.
+
+        ``merged`` is a ``collect()`` result; defaults to this process only.
+        """
+        merged = merged if merged is not None else self.collect(None, self.export())
+        lines = []
+        for name, buckets in BUCKETS.items():
+            metric = f'llm_{name}'
+            lines.append(f'# TYPE {metric} histogram')
+            for key, data in merged.items():
+                if name not in data['histograms']:
+                    continue
+                model, agent = key.split('|', 1)
+                counts, total, count = data['histograms'][name]
+                labels = f'model="{model}",agent="{agent}"'
+                cumulative = 0
+                for bound, n in zip(buckets, counts):
+                    cumulative += n
+                    lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {count}')
+                lines.append(f'{metric}_sum{{{labels}}} {total}')
+                lines.append(f'{metric}_count{{{labels}}} {count}')
+        for field in ('requests', 'prompt_tokens', 'eval_tokens'):
+            metric = f'llm_{field}_total'
+            lines.append(f'# TYPE {metric} counter')
+            for key, data in merged.items():
+                model, agent = key.split('|', 1)
+                lines.append(f'{metric}{{model="{model}",agent="{agent}"}} {data["tokens"].get(field, 0)}')
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+            self._tokens.clear()
+            self._users.clear()
+
+
+_telemetry = LLMTelemetry()
+
+
+def get_telemetry():
+    """Process-wide telemetry collector."""
+    return _telemetry
@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+"""In-process snapshot of the installed Ollama models, shared through Redis."""
+import os
+import json
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY = 'cache:models'
+# Snapshot is revalidated (from Redis, else Ollama) at most every FRESH_TTL
+# seconds and served while revalidating until it is STALE_TTL seconds old.
+FRESH_TTL = int(os.environ.get('MODEL_CATALOG_TTL', '60'))
+STALE_TTL = int(os.environ.get('MODEL_CATALOG_STALE_TTL', '900'))
+# Outlives the 600 s beat interval so readers never fall through to Ollama.
+REDIS_TTL = 900
+
+
+class ModelCatalog:
+    """Stale-while-revalidate cache of the ``/api/tags`` model list.
+
+    Reads are memory lookups. Every ``fresh_ttl`` seconds the snapshot is
+    returned as is while a single background thread revalidates it from the
+    ``cache:models`` Redis snapshot written by the refresher. Ollama is only
+    asked when Redis has no snapshot younger than ``stale_ttl``. Listeners registered with
+    ``subscribe`` are called with ``(added, removed)`` name sets whenever
+    the installed model set changes. An empty or failed fetch (Ollama down)
+    never replaces a non-empty snapshot.
+    """
+
+    def __init__(self, fetch, redis_getter=None, fresh_ttl=None, stale_ttl=None):
+        self._fetch = fetch
+        self._redis_getter = redis_getter or (lambda: None)
+        self.fresh_ttl = FRESH_TTL if fresh_ttl is None else fresh_ttl
+        self.stale_ttl = STALE_TTL if stale_ttl is None else stale_ttl
+        self._models = None
+        self._fetched_at = 0.0
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._listeners = []
+        self.fetches = 0
+        self.background_refreshes = 0
+
+    def snapshot(self):
+        """Return ``{'models': [...]}``; only blocks when there is no snapshot."""
+        now = time.time()
+        with self._lock:
+            models, age, checked = self._models, now - self._fetched_at, now - self._checked_at
+        if models is None or age >= self.stale_ttl:
+            return {'models': self._load()}
+        if checked >= self.fresh_ttl:
+            self._revalidate_async()
+        return {'models': models}
+
+    def names(self):
+        return [m.get('name', '') for m in self.snapshot()['models']]
+
+    def has(self, name):
+        return name in self.names()
+
+    def subscribe(self, callback):
+        self._listeners.append(callback)
+
+    def invalidate(self):
+        with self._lock:
+            self._fetched_at = self._checked_at = 0.0
+
+    def refresh(self):
+        """Fetch from Ollama now and publish the result to Redis.
+
+        Used by the ``refresh_model_cache`` beat task and after model pulls.
+        """
+        try:
+            models = self._fetch().get('models', [])
+        except Exception as e:
+            logger.warning(f'Model catalog refresh failed: {e}')
+            self._checked_at = time.time()
+            return self._models or []
+        self.fetches += 1
+        if not models and self._models:
+            logger.warning('Ollama reported no models; keeping the previous model snapshot')
+            self._checked_at = time.time()
+            return self._models
+        fetched_at = time.time()
+        redis = self._redis_getter()
+        if redis and models:
+            try:
+                redis.setex(REDIS_KEY, REDIS_TTL, json.dumps({'models': models, 'fetched_at': fetched_at}))
+            except Exception:
+                pass
+        self._apply(models, fetched_at)
+        return models
+
+    def _load(self):
+        """Take the Redis snapshot unless it is missing or stale, else ask Ollama."""
+        models, fetched_at = self._read_redis()
+        if models and time.time() - fetched_at < self.stale_ttl:
+            if fetched_at > self._fetched_at:
+                self._apply(models, fetched_at)
+            self._checked_at = time.time()
+            return self._models
+        return self.refresh()
+
+    def _read_redis(self):
+        redis = self._redis_getter()
+        if not redis:
+            return None, 0.0
+        try:
+            raw = redis.get(REDIS_KEY)
+            if not raw:
+                return None, 0.0
+            data = json.loads(raw)
+            return data.get('models', []), data.get('fetched_at', 0.0)
+        except Exception:
+            return None, 0.0
+
+    def _revalidate_async(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        self.background_refreshes += 1
+
+        def run():
+            try:
+                self._load()
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=run, name='model-catalog-refresh', daemon=True).start()
+
+    def _apply(self, models, fetched_at):
+        with self._lock:
+            previous = self._models
+            self._models = models
+            self._fetched_at = fetched_at
+            self._checked_at = time.time()
+        if previous is None:
+            return
+        old = {m.get('name', '') for m in previous}
+        new = {m.get('name', '') for m in models}
+        if old != new:
+            added, removed = new - old, old - new
+            logger.info(f'Installed models changed: +{sorted(added)} -{sorted(removed)}')
+            for callback in list(self._listeners):
+                try:
+                    callback(added, removed)
+                except Exception as e:
+                    logger.warning(f'Model catalog listener failed: {e}')
+
+    def stats(self):
+        with self._lock:
+            age = time.time() - self._fetched_at if self._models is not None else None
+            count = len(self._models) if self._models is not None else 0
+        return {
+            'models': count,
+            'age_seconds': age,
+            'fetches': self.fetches,
+            'background_refreshes': self.background_refreshes,
+        }
@@ -1,10 +1,29 @@
 #!/usr/bin/env python
 """Enhanced model manager with auto-download and dynamic model selection."""
 import os
+import json
+import time
 import logging
-import platform
+import threading
 import requests
-from typing import Dict, Any, Optional, Union
+from urllib3.exceptions import NewConnectionError
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Union, Iterator
+from utils.ollama_transport import get_session, default_timeout, capture_connections, abort_connections
+from utils.llm_cache import LLMResponseCache, make_cache_key
+from utils.single_flight import SingleFlight
+from utils.llm_scheduler import AdmissionScheduler, LLMBusyError
+from utils.generation_options import build_options
+from utils.model_catalog import ModelCatalog
+from utils.hardware_profile import get_hardware_profile, recommend_model
+from utils.model_warmup import ModelWarmer
+from utils.ollama_pool import BackendPool, backend_urls
+from utils.llm_telemetry import get_telemetry, current_user_tag, tagged_user
+from utils.llm_recorder import recorder_from_env
+from utils.cancellation import GenerationCancelled, cancellation_scope, current_token
+from utils.json_repair import IncrementalJSONParser, parse_llm_json
 
 logger = logging.getLogger(__name__)
 
@@ -16,13 +35,36 @@ PREFERRED_MODELS = [
     'qwen2.5-coder:1.5b',
 ]
 
+# One generate_many outcome: ``response`` on success, ``error`` otherwise.
+BatchResult = namedtuple('BatchResult', ['index', 'response', 'error'])
+
+
+class BatchCancelledError(RuntimeError):
+    """A generate_many item was cancelled before it started."""
+
+
+class LLMStreamError(RuntimeError):
+    """A streamed generation failed or ended before Ollama reported it done."""
+
 
 class ModelManager:
     def __init__(self):
-        self.base_url = os.environ.get('OLLAMA_BASE_URL', 'http://localhost:11434')
+        self.pool = BackendPool(backend_urls(), session_getter=lambda: self.session)
+        # Primary backend, kept for callers that expect a single URL.
+        self.base_url = self.pool.backends[0].url
         self.api_key = os.environ.get('OLLAMA_API_KEY', '')
         self._active_model = None
         self._redis = None
+        self.response_cache = LLMResponseCache(redis_getter=lambda: self.redis)
+        self.single_flight = SingleFlight(redis_getter=lambda: self.redis)
+        self.coalesce_requests = os.environ.get('LLM_COALESCE', 'true').lower() == 'true'
+        self.scheduler = AdmissionScheduler()
+        self._router = None
+        self.catalog = ModelCatalog(fetch=self.fetch_models, redis_getter=lambda: self.redis)
+        self.catalog.subscribe(self._on_models_changed)
+        self.warmer = ModelWarmer(self)
+        # Record/replay of API calls (LLM_RECORD_MODE); None in normal operation.
+        self.recorder = recorder_from_env()
 
     @property
     def redis(self):
@@ -36,6 +78,11 @@ class ModelManager:
                 self._redis = False
         return self._redis if self._redis is not False else None
 
+    @property
+    def session(self):
+        """Shared keep-alive session (connection pool is per process)."""
+        return get_session(self.api_key)
+
     @property
     def active_model(self):
         if self._active_model:
@@ -58,13 +105,41 @@ class ModelManager:
 
     @active_model.setter
     def active_model(self, model_name):
-        self._active_model = model_name
+        previous, self._active_model = self._active_model, model_name
+        if model_name and model_name != previous:
+            # Pay the load now rather than on the next user request.
+            self.warmer.warm_async(model_name)
         if self.redis:
             try:
                 self.redis.setex('active_model', 3600, model_name)
             except Exception:
                 pass
 
+    @property
+    def router(self):
+        if self._router is None:
+            from utils.model_router import ModelRouter
+            self._router = ModelRouter(self)
+        return self._router
+
+    def model_for(self, task=None):
+        """Model to use for ``task`` according to the routing policy."""
+        try:
+            return self.router.route(task)
+        except Exception as e:
+            logger.warning(f'Model routing failed for {task}: {e}')
+            return self.active_model
+
+    def _on_models_changed(self, added, removed):
+        if self._active_model and self._active_model in removed:
+            logger.warning(f'Active model {self._active_model} was removed; reselecting')
+            self._active_model = None
+            if self.redis:
+                try:
+                    self.redis.delete('active_model')
+                except Exception:
+                    pass
+
     def _select_best_model(self):
         try:
             available = self.list_models().get('models', [])
@@ -81,89 +156,402 @@ class ModelManager:
             return 'qwen2.5-coder:7b'
 
     def _get_recommended_model_for_system(self):
-        try:
-            import psutil
-            total_ram_gb = psutil.virtual_memory().total / (1024 ** 3)
-        except ImportError:
-            total_ram_gb = self._detect_ram_fallback()
-        gpu_vram_gb = self._detect_gpu_vram()
-        logger.info(f'System: RAM={total_ram_gb:.1f}GB, GPU={gpu_vram_gb:.1f}GB')
-        if total_ram_gb >= 32 or gpu_vram_gb >= 16:
-            return 'qwen2.5-coder:32b'
-        elif total_ram_gb >= 16 or gpu_vram_gb >= 8:
-            return 'qwen2.5-coder:14b'
-        elif total_ram_gb >= 8 or gpu_vram_gb >= 4:
-            return 'qwen2.5-coder:7b'
-        return 'qwen2.5-coder:3b'
+        profile = get_hardware_profile()
+        logger.info(f'System: RAM={profile["ram_gb"]:.1f}GB, GPU={profile["gpu_vram_gb"]:.1f}GB, '
+                    f'CPU={profile["cpu_gflops"]:.1f} GFLOPS')
+        return recommend_model(profile)
 
-    def _detect_ram_fallback(self):
-        try:
-            if platform.system() == 'Darwin':
-                import subprocess
-                r = subprocess.run(['sysctl', '-n', 'hw.memsize'], capture_output=True, text=True)
-                return int(r.stdout.strip()) / (1024 ** 3)
-            else:
-                with open('/proc/meminfo', 'r') as f:
-                    for line in f:
-                        if line.startswith('MemTotal'):
-                            return int(line.split()[1]) / (1024 ** 2)
-        except Exception:
-            pass
-        return 8
+    def _make_request(self, endpoint, method='POST', payload=None):
+        """Send one API call, through the recorder when one is configured."""
+        if self.recorder is not None:
+            return self.recorder.call(endpoint, method, payload,
+                                      lambda: self._send_request(endpoint, method, payload))
+        return self._send_request(endpoint, method, payload)
 
-    def _detect_gpu_vram(self):
-        try:
-            import subprocess
-            r = subprocess.run(
-                ['nvidia-smi', '--query-gpu=memory.total', '--format=csv,noheader,nounits'],
-                capture_output=True, text=True, timeout=5,
-            )
-            if r.returncode == 0:
-                return int(r.stdout.strip().split('\n')[0]) / 1024
-        except Exception:
-            pass
-        if platform.system() == 'Darwin' and platform.machine() == 'arm64':
-            return self._detect_ram_fallback() * 0.75
-        return 0
+    def _send_request(self, endpoint, method='POST', payload=None):
+        """Send one API call to the least-loaded healthy backend.
 
-    def _make_request(self, endpoint, method='POST', payload=None):
-        headers = {'Authorization': f'Bearer {self.api_key}'} if self.api_key else {}
-        try:
-            url = f'{self.base_url}/api/{endpoint}'
-            resp = requests.request(method, url, headers=headers, json=payload, timeout=300)
-            resp.raise_for_status()
-            return resp.json()
-        except requests.exceptions.RequestException as e:
-            logger.error(f'API request failed: {e}')
-            error_msg = 'Request failed'
+        A connection failure (the request never reached Ollama) is retried
+        once on each other backend; anything else is raised as RuntimeError.
+        Cancelling the thread's cancel token closes the connection and raises
+        GenerationCancelled.
+        """
+        model = (payload or {}).get('model')
+        token = current_token()
+        tried = []
+        while True:
+            if token is not None:
+                token.raise_if_cancelled()
+            with self.pool.lease(model, exclude=tried) as backend, self._abortable(token) as conns:
+                resp = None
+                try:
+                    url = f'{backend.url}/api/{endpoint}'
+                    with capture_connections(conns):
+                        resp = self.session.request(method, url, json=payload, timeout=default_timeout())
+                    resp.raise_for_status()
+                    self.pool.mark_success(backend)
+                    return resp.json()
+                except requests.exceptions.RequestException as e:
+                    if token is not None and token.cancelled:
+                        raise GenerationCancelled(f'Request to {backend.url} cancelled') from e
+                    logger.error(f'API request to {backend.url} failed: {e}')
+                    if self._is_backend_failure(e, resp):
+                        self.pool.mark_failure(backend, str(e))
+                    tried.append(backend)
+                    if self._is_connect_failure(e) and len(tried) < len(self.pool):
+                        continue
+                    error_msg = 'Request failed'
+                    try:
+                        error_msg = resp.json().get('error', error_msg)
+                    except Exception:
+                        pass
+                    raise RuntimeError(f'{error_msg}. Ensure Ollama server is running.')
+
+    @staticmethod
+    @contextmanager
+    def _abortable(token):
+        """Yield a list for capture_connections; those connections are shut
+        down if ``token`` is cancelled before the block exits."""
+        conns = []
+        if token is None:
+            yield conns
+            return
+        with token.on_cancel(lambda: abort_connections(conns)):
+            yield conns
+
+    @staticmethod
+    def _is_connect_failure(exc):
+        """True only if the request never reached Ollama, so replaying it elsewhere is safe.
+
+        A reset or dropped connection after the request was sent (ProtocolError)
+        may already be generating on the node and is not retried.
+        """
+        if isinstance(exc, requests.exceptions.ConnectTimeout):
+            return True
+        if not isinstance(exc, requests.exceptions.ConnectionError):
+            return False
+        reason = exc.args[0] if exc.args else None
+        # urllib3 wraps the cause in MaxRetryError once its retries are used up.
+        reason = getattr(reason, 'reason', reason)
+        return isinstance(reason, NewConnectionError)
+
+    @staticmethod
+    def _is_backend_failure(exc, resp=None):
+        """Failures that count against a node's health (not bad requests)."""
+        if resp is not None:
+            return resp.status_code >= 500
+        return isinstance(exc, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+    def _stream_request(self, endpoint, payload=None, cancel_token=None):
+        """Stream one API call, through the recorder when one is configured."""
+        if self.recorder is not None:
+            return self.recorder.stream(endpoint, payload,
+                                        lambda: self._send_stream(endpoint, payload, cancel_token))
+        return self._send_stream(endpoint, payload, cancel_token)
+
+    def _send_stream(self, endpoint, payload=None, cancel_token=None):
+        """POST to a streaming endpoint and yield each NDJSON object as it arrives.
+
+        Cancelling ``cancel_token`` closes the connection, even while waiting
+        for the first chunk, and raises GenerationCancelled.
+        """
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+        with self.pool.lease((payload or {}).get('model')) as backend, self._abortable(cancel_token) as conns:
+            url = f'{backend.url}/api/{endpoint}'
+            resp = None
             try:
-                error_msg = resp.json().get('error', error_msg)
-            except Exception:
-                pass
-            raise RuntimeError(f'{error_msg}. Ensure Ollama server is running.')
+                with capture_connections(conns):
+                    resp = self.session.post(url, json=payload, stream=True, timeout=default_timeout())
+                with resp:
+                    resp.raise_for_status()
+                    self.pool.mark_success(backend)
+                    for line in resp.iter_lines():
+                        if cancel_token is not None:
+                            cancel_token.raise_if_cancelled()
+                        if not line:
+                            continue
+                        data = json.loads(line)
+                        if data.get('error'):
+                            raise RuntimeError(data['error'])
+                        yield data
+            except requests.exceptions.RequestException as e:
+                if cancel_token is not None and cancel_token.cancelled:
+                    raise GenerationCancelled(f'Stream from {backend.url} cancelled') from e
+                logger.error(f'Streaming request to {backend.url} failed: {e}')
+                if self._is_backend_failure(e, resp):
+                    self.pool.mark_failure(backend, str(e))
+                raise RuntimeError('Streaming request failed. Ensure Ollama server is running.')
 
     def generate(self, prompt='', model=None, system_prompt=None,
-                 temperature=0.2, max_tokens=4096):
-        """Generate a response. Handles both keyword and legacy positional calls."""
+                 temperature=None, max_tokens=None, cache=False, coalesce=None,
+                 priority='background', deadline=None, profile=None, stop=None, format=None,
+                 fallback=True, context=None, meta=None, cancel_token=None):
+        """Generate a response. Handles both keyword and legacy positional calls.
+
+        ``profile`` selects per-agent Ollama options (see utils.generation_options);
+        ``temperature``, ``max_tokens`` and ``stop`` override the profile.
+        ``format`` is passed through to Ollama ('json' or a JSON schema).
+
+        With ``cache=True`` identical requests are served from the response cache.
+        Identical concurrent requests share one generation unless ``coalesce``
+        is False (defaults to ``self.coalesce_requests``). ``priority`` and
+        ``deadline`` (a ``time.monotonic()`` value) drive admission control;
+        LLMBusyError is raised when the request cannot be admitted in time.
+        With ``fallback=False`` other failures raise instead of returning the
+        canned fallback response.
+
+        ``context`` continues from the token context of an earlier response,
+        so only the new prompt is prefilled. If ``meta`` is a dict it receives
+        the returned ``context``, ``prompt_eval_count`` and ``eval_count``;
+        such per-caller calls bypass the cache and coalescing.
+
+        ``cancel_token`` (default: the thread's current token) abandons the
+        call when cancelled: queued requests leave the queue, running ones
+        have their connection closed, and GenerationCancelled is raised. A
+        coalesced generation is only abandoned once all its callers cancel.
+        """
+        token = cancel_token or current_token()
+        if token is not None:
+            token.raise_if_cancelled()
         if model is None:
             model = self.active_model
         if not prompt:
+            if not fallback:
+                raise ValueError('Empty prompt')
             return self._get_fallback_response()
-        logger.info(f'Generating with model {model}')
-        payload = {
-            'model': model, 'prompt': prompt,
-            'temperature': temperature, 'max_tokens': max_tokens, 'stream': False,
-        }
+        if context or meta is not None:
+            cache, coalesce = False, False
+        options = build_options(profile, prompt, system_prompt, temperature, max_tokens, stop,
+                                context_tokens=len(context or ()))
+        key = self._cache_key(model, prompt, system_prompt, options, format)
+        if cache:
+            cached = self.response_cache.get(key)
+            if cached is not None:
+                logger.info(f'LLM cache hit for model {model}')
+                return cached
+        payload = {'model': model, 'prompt': prompt, 'stream': False, 'options': options,
+                   'keep_alive': self.warmer.keep_alive_for(model)}
         if system_prompt:
             payload['system'] = system_prompt
+        if format:
+            payload['format'] = format
+        if context:
+            payload['context'] = list(context)
+        if coalesce is None:
+            coalesce = self.coalesce_requests
+
+        def run():
+            # Inside single_flight the current token is the shared one.
+            with self.scheduler.slot(model, priority, deadline, current_token()):
+                return self._generate_once(payload, meta, agent=profile)
+
         try:
-            result = self._make_request('generate', payload=payload)
-            if 'response' in result:
-                return result['response']
-            return self._get_fallback_response()
+            if coalesce:
+                response = self.single_flight.do(key, run, cancel_token=token)
+            else:
+                with cancellation_scope(token):
+                    response = run()
+        except (LLMBusyError, GenerationCancelled):
+            raise
         except Exception as e:
             logger.error(f'Generation failed: {e}')
+            if not fallback:
+                raise
             return self._get_fallback_response()
+        if cache:
+            self.response_cache.set(key, response)
+        return response
+
+    def generate_many(self, prompts, concurrency=None, ordered=False, cancel_event=None, **kwargs):
+        """Run independent prompts concurrently, yielding BatchResult items.
+
+        ``prompts`` holds prompt strings or dicts of per-item ``generate``
+        keyword arguments; ``kwargs`` apply to every item. Results are yielded
+        as they complete (``ordered=False``) or in input order, and always
+        carry the input ``index``. A failing item yields its exception in
+        ``error`` without affecting the others. Setting ``cancel_event`` or
+        closing the generator cancels every item that has not started; a
+        ``cancel_token`` (default: the current one) also stops running items.
+        ``concurrency`` defaults to the scheduler's per-model slot count, so
+        fan-out matches Ollama's parallel request slots.
+        """
+        items = [p if isinstance(p, dict) else {'prompt': p} for p in prompts]
+        if not items:
+            return
+        workers = max(1, min(concurrency or self.scheduler.max_concurrency, len(items)))
+        cancel_event = cancel_event or threading.Event()
+        user = current_user_tag()
+        token = kwargs.pop('cancel_token', None) or current_token()
+
+        def run(index, item):
+            if cancel_event.is_set() or (token is not None and token.cancelled):
+                raise BatchCancelledError(f'Item {index} cancelled')
+            with tagged_user(user), cancellation_scope(token):
+                return self.generate(**{**kwargs, **item, 'fallback': False})
+
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='llm-batch')
+        try:
+            futures = {executor.submit(run, i, item): i for i, item in enumerate(items)}
+            pending, next_index = {}, 0
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    result = BatchResult(index, future.result(), None)
+                except Exception as e:
+                    result = BatchResult(index, None, e)
+                if not ordered:
+                    yield result
+                    continue
+                pending[index] = result
+                while next_index in pending:
+                    yield pending.pop(next_index)
+                    next_index += 1
+        finally:
+            cancel_event.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def _cache_key(model, prompt, system_prompt, options, fmt=None):
+        return make_cache_key(model, prompt, system_prompt, options['temperature'],
+                              options['num_predict'], options.get('stop'), fmt)
+
+    def _generate_once(self, payload, meta=None, agent=None):
+        logger.info(f'Generating with model {payload["model"]}')
+        result = self._make_request('generate', payload=payload)
+        if 'response' not in result:
+            raise RuntimeError('Ollama returned no response')
+        self.warmer.record(result)
+        get_telemetry().record(result, model=payload['model'], agent=agent)
+        get_telemetry().maybe_publish(self.redis)
+        if meta is not None:
+            meta.update({k: result.get(k) for k in ('context', 'prompt_eval_count', 'eval_count')})
+        return result['response']
+
+    def generate_stream(self, prompt='', model=None, system_prompt=None,
+                        temperature=None, max_tokens=None, stats=None, cache=False,
+                        priority='interactive', deadline=None, profile=None, stop=None,
+                        format=None, context=None, cancel_token=None) -> Iterator[str]:
+        """Yield response chunks as Ollama produces them.
+
+        If ``stats`` is a dict it is filled with ``queue_wait``,
+        ``time_to_first_token``, ``total_time`` and ``chunks`` (seconds / count)
+        once available, plus ``context``, ``prompt_eval_count`` and
+        ``eval_count`` from the final chunk. ``context`` works as in generate().
+        A cache hit is yielded as a single chunk; a completed stream is stored.
+        The scheduler slot is held until the stream ends or is closed.
+        Cancelling ``cancel_token`` (default: the current one) closes the
+        stream and raises GenerationCancelled. Transport or Ollama errors, and
+        a stream that ends without a final ``done`` chunk, raise
+        LLMStreamError after whatever chunks already arrived.
+        """
+        token = cancel_token or current_token()
+        if model is None:
+            model = self.active_model
+        if not prompt:
+            return
+        if context:
+            cache = False
+        options = build_options(profile, prompt, system_prompt, temperature, max_tokens, stop,
+                                context_tokens=len(context or ()))
+        cache_key = None
+        if cache:
+            cache_key = self._cache_key(model, prompt, system_prompt, options, format)
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                if stats is not None:
+                    stats.update({'time_to_first_token': 0.0, 'total_time': 0.0, 'chunks': 1})
+                yield cached
+                return
+        logger.info(f'Streaming with model {model}')
+        payload = {'model': model, 'prompt': prompt, 'stream': True, 'options': options,
+                   'keep_alive': self.warmer.keep_alive_for(model)}
+        if system_prompt:
+            payload['system'] = system_prompt
+        if format:
+            payload['format'] = format
+        if context:
+            payload['context'] = list(context)
+        stats = stats if stats is not None else {}
+        stats.update({'time_to_first_token': None, 'total_time': None, 'chunks': 0})
+        start = time.monotonic()
+        admitted_at = self.scheduler.acquire(model, priority, deadline, token)
+        stats['queue_wait'] = admitted_at - start
+        parts = []
+        done = False
+        try:
+            for data in self._stream_request('generate', payload=payload, cancel_token=token):
+                chunk = data.get('response', '')
+                if chunk:
+                    if stats['time_to_first_token'] is None:
+                        stats['time_to_first_token'] = time.monotonic() - start
+                        logger.info(f'First token from {model} after {stats["time_to_first_token"]:.2f}s')
+                    stats['chunks'] += 1
+                    parts.append(chunk)
+                    yield chunk
+                if data.get('done'):
+                    self.warmer.record(data)
+                    get_telemetry().record(data, model=model, agent=profile,
+                                           ttft=stats['time_to_first_token'])
+                    get_telemetry().maybe_publish(self.redis)
+                    stats.update({k: data.get(k) for k in ('context', 'prompt_eval_count', 'eval_count')})
+                    if cache_key:
+                        self.response_cache.set(cache_key, ''.join(parts))
+                    done = True
+                    break
+        except GenerationCancelled:
+            logger.info(f'Streaming generation with {model} cancelled')
+            raise
+        except Exception as e:
+            logger.error(f'Streaming generation failed: {e}')
+            raise LLMStreamError(f'Streaming generation with {model} failed: {e}') from e
+        finally:
+            self.scheduler.release(model, admitted_at)
+            stats['total_time'] = time.monotonic() - start
+        if not done:
+            raise LLMStreamError(f'Stream from {model} ended before completion')
+
+    def generate_json(self, prompt='', on_chunk=None, format='json', coalesce=None, cancel_token=None, **kwargs):
+        """Generate JSON and return the parsed value.
+
+        Uses Ollama's JSON mode (``format`` may also be a JSON schema on
+        servers that support it), streams the output through an incremental
+        parser and closes the stream as soon as the top-level value is
+        complete. Truncated or malformed output is repaired where possible;
+        ValueError is raised when it cannot be parsed. ``cancel_token`` works
+        as in generate().
+        """
+        token = cancel_token or current_token()
+        model = kwargs.pop('model', None) or self.active_model
+        cache = kwargs.pop('cache', False)
+        if coalesce is None:
+            coalesce = self.coalesce_requests
+        system_prompt = kwargs.get('system_prompt')
+        options = build_options(kwargs.get('profile'), prompt, system_prompt, kwargs.get('temperature'),
+                                kwargs.get('max_tokens'), kwargs.get('stop'))
+        key = self._cache_key(model, prompt, system_prompt, options, format)
+
+        def run():
+            parser = IncrementalJSONParser()
+            stream = self.generate_stream(prompt=prompt, model=model, format=format, cache=cache, **kwargs)
+            try:
+                for chunk in stream:
+                    if on_chunk:
+                        on_chunk(chunk)
+                    if parser.feed(chunk):
+                        break
+            finally:
+                stream.close()
+            if parser.complete and cache:
+                self.response_cache.set(key, parser.text)
+            return parser.text
+
+        if coalesce and on_chunk is None:
+            text = self.single_flight.do(key, run, cancel_token=token)
+        else:
+            with cancellation_scope(token):
+                text = run()
+        return parse_llm_json(text)
 
     def _get_fallback_response(self):
         return {
@@ -184,8 +572,18 @@ class ModelManager:
         }
 
     def list_models(self):
+        """Installed models from the catalog snapshot (no Ollama round trip)."""
+        return self.catalog.snapshot()
+
+    def fetch_models(self):
+        """Query /api/tags on every backend; used by the catalog refresher.
+
+        Returns the union of the models installed on healthy backends.
+        """
         try:
-            return self._make_request('tags', method='GET')
+            if self.recorder is not None:
+                return self.recorder.call('tags', 'GET', None, lambda: {'models': self.pool.inventory()})
+            return {'models': self.pool.inventory()}
         except Exception:
             return {'models': []}
 
@@ -194,6 +592,7 @@ class ModelManager:
             logger.info(f'Pulling model {model}...')
             self._make_request('pull', payload={'name': model})
             logger.info(f'Model {model} pulled successfully')
+            self.catalog.refresh()
             return True
         except Exception as e:
             logger.error(f'Error pulling model {model}: {e}')
@@ -202,9 +601,7 @@ class ModelManager:
     def ensure_model_available(self, model_name=None):
         model = model_name or self.active_model
         try:
-            available = self.list_models().get('models', [])
-            names = [m.get('name', '') for m in available]
-            if model not in names:
+            if not self.catalog.has(model):
                 logger.info(f'Model {model} not found. Pulling...')
                 return self.pull_model(model)
             return True
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+"""Task-based routing of agent prompts across the qwen2.5-coder size ladder."""
+import os
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Preferred model per task. None means "use the active (hardware-selected) model".
+DEFAULT_ROUTES = {
+    'requirement_analysis': 'qwen2.5-coder:3b',
+    'file_structure': 'qwen2.5-coder:3b',
+    'code_generation': None,
+    'customization': None,
+}
+
+
+def _load_overrides():
+    """Read LLM_MODEL_ROUTES, a JSON object mapping task -> model name."""
+    raw = os.environ.get('LLM_MODEL_ROUTES', '')
+    if not raw:
+        return {}
+    try:
+        overrides = json.loads(raw)
+        return {k: v for k, v in overrides.items() if isinstance(v, str) and v}
+    except (ValueError, AttributeError):
+        logger.warning('Ignoring invalid LLM_MODEL_ROUTES value')
+        return {}
+
+
+class ModelRouter:
+    """Picks the smallest adequate model for a task.
+
+    A cheap task starts at its preferred tier and walks up the ladder to the
+    first installed model, never going beyond the active model that the
+    hardware was sized for. Config overrides win outright.
+    """
+
+    def __init__(self, model_manager, routes=None, overrides=None):
+        from utils.model_manager import PREFERRED_MODELS
+        self.model_manager = model_manager
+        self.ladder = PREFERRED_MODELS
+        self.routes = dict(DEFAULT_ROUTES, **(routes or {}))
+        self.overrides = overrides if overrides is not None else _load_overrides()
+
+    def available_models(self):
+        # Served from the model catalog snapshot, so this is a memory read.
+        models = self.model_manager.list_models().get('models', [])
+        return {m.get('name', '') for m in models}
+
+    def route(self, task=None):
+        active = self.model_manager.active_model
+        if task in self.overrides:
+            return self.overrides[task]
+        preferred = self.routes.get(task)
+        if not preferred or preferred == active or preferred not in self.ladder:
+            return active
+        start = self.ladder.index(preferred)
+        stop = self.ladder.index(active) if active in self.ladder else 0
+        if stop > start:
+            # Preferred tier is larger than what this host runs.
+            return active
+        available = self.available_models()
+        for model in reversed(self.ladder[stop:start + 1]):
+            if model in available:
+                if model != preferred:
+                    logger.debug(f'Route {task}: {preferred} missing, using {model}')
+                return model
+        return active
+
+    def routes_table(self):
+        """Resolved model for every known task (for diagnostics)."""
+        return {task: self.route(task) for task in self.routes}
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+"""Model preloading, traffic-aware keep_alive hints and cold/warm latency tracking."""
+import os
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# keep_alive (seconds) is twice the typical gap between requests to a model,
+# clamped to this range, so a model stays resident across the next request
+# while traffic lasts and is unloaded soon after it stops.
+KEEP_ALIVE_MIN = int(os.environ.get('LLM_KEEP_ALIVE_MIN', '300'))
+KEEP_ALIVE_MAX = int(os.environ.get('LLM_KEEP_ALIVE_MAX', '3600'))
+# Models kept loaded together regardless of traffic, e.g. a small routing
+# model next to the large code model (needs OLLAMA_MAX_LOADED_MODELS >= 2).
+RESIDENT_MODELS = [m.strip() for m in os.environ.get('LLM_RESIDENT_MODELS', '').split(',') if m.strip()]
+WARMUP_ON_START = os.environ.get('LLM_WARMUP_ON_START', 'true').lower() == 'true'
+# A load_duration above this means the request paid for loading the model.
+COLD_LOAD_SECONDS = 0.5
+
+_NS = 1e9
+
+
+class ModelWarmer:
+    """Preloads models and picks ``keep_alive`` values for ModelManager requests."""
+
+    def __init__(self, model_manager, resident_models=None):
+        self.model_manager = model_manager
+        self.resident_models = list(RESIDENT_MODELS if resident_models is None else resident_models)
+        self._lock = threading.Lock()
+        self._last_request = {}
+        self._avg_gap = {}
+        self._latency = {'cold': [0, 0.0], 'warm': [0, 0.0]}
+        self.warmups = 0
+
+    def keep_alive_for(self, model):
+        """Record a request to ``model`` and return the keep_alive to send with it."""
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_request.get(model)
+            self._last_request[model] = now
+            if last is not None:
+                gap = now - last
+                avg = self._avg_gap.get(model)
+                self._avg_gap[model] = gap if avg is None else 0.8 * avg + 0.2 * gap
+            return self._keep_alive(model)
+
+    def _keep_alive(self, model):
+        if model in self.resident_models:
+            return KEEP_ALIVE_MAX
+        avg = self._avg_gap.get(model)
+        if avg is None:
+            return KEEP_ALIVE_MIN
+        return int(min(KEEP_ALIVE_MAX, max(KEEP_ALIVE_MIN, 2 * avg)))
+
+    def record(self, result):
+        """Classify a finished Ollama response as a cold or warm start."""
+        total = result.get('total_duration')
+        if not total:
+            return
+        kind = 'cold' if result.get('load_duration', 0) / _NS >= COLD_LOAD_SECONDS else 'warm'
+        with self._lock:
+            self._latency[kind][0] += 1
+            self._latency[kind][1] += total / _NS
+        if kind == 'cold':
+            logger.info(f'Cold start for {result.get("model")}: '
+                        f'load {result.get("load_duration", 0) / _NS:.1f}s of {total / _NS:.1f}s')
+
+    def warm(self, model=None):
+        """Load ``model`` (default: the active model) with an empty prompt."""
+        model = model or self.model_manager.active_model
+        if not model:
+            return False
+        with self._lock:
+            keep_alive = self._keep_alive(model)
+        start = time.monotonic()
+        try:
+            result = self.model_manager._make_request(
+                'generate', payload={'model': model, 'prompt': '', 'keep_alive': keep_alive},
+            )
+        except Exception as e:
+            logger.warning(f'Warm-up of {model} failed: {e}')
+            return False
+        self.warmups += 1
+        logger.info(f'Warmed {model} in {time.monotonic() - start:.1f}s '
+                    f'(load {result.get("load_duration", 0) / _NS:.1f}s, keep_alive {keep_alive}s)')
+        return True
+
+    def warm_all(self):
+        """Warm the active model plus the resident set; returns {model: ok}."""
+        models = [self.model_manager.active_model] + self.resident_models
+        return {model: self.warm(model) for model in dict.fromkeys(m for m in models if m)}
+
+    def warm_async(self, model=None):
+        target = self.warm if model else self.warm_all
+        args = (model,) if model else ()
+        threading.Thread(target=target, args=args, name='model-warmup', daemon=True).start()
+
+    def keep_warm(self):
+        """Periodic ping: refresh resident models and any model seen recently."""
+        now = time.monotonic()
+        with self._lock:
+            recent = [m for m, t in self._last_request.items() if now - t < self._keep_alive(m)]
+        return {model: self.warm(model) for model in dict.fromkeys(self.resident_models + recent)}
+
+    def stats(self):
+        with self._lock:
+            latency = {
+                kind: {'requests': n, 'avg_seconds': total / n if n else 0.0}
+                for kind, (n, total) in self._latency.items()
+            }
+            keep_alive = {m: self._keep_alive(m) for m in self._last_request}
+        return {
+            'warmups': self.warmups,
+            'resident_models': self.resident_models,
+            'keep_alive_seconds': keep_alive,
+            'cold_start': latency['cold'],
+            'warm': latency['warm'],
+        }
@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+"""Pool of Ollama backends with health checks and least-outstanding-requests routing."""
+import os
+import time
+import random
+import logging
+import threading
+from contextlib import contextmanager
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+HEALTH_INTERVAL = float(os.environ.get('OLLAMA_HEALTH_INTERVAL', '15'))
+HEALTH_TIMEOUT = float(os.environ.get('OLLAMA_HEALTH_TIMEOUT', '3'))
+# Consecutive failures before a node is ejected, and the first ejection
+# period (doubled on each repeated ejection, up to EJECT_MAX_SECONDS).
+EJECT_AFTER = int(os.environ.get('OLLAMA_EJECT_AFTER', '3'))
+EJECT_SECONDS = float(os.environ.get('OLLAMA_EJECT_SECONDS', '30'))
+EJECT_MAX_SECONDS = 600.0
+# A node that has not been ejected for this long starts over at EJECT_SECONDS.
+EJECT_RESET_SECONDS = float(os.environ.get('OLLAMA_EJECT_RESET_SECONDS', '3600'))
+
+
+def backend_urls():
+    """OLLAMA_BASE_URLS (comma separated) or the single OLLAMA_BASE_URL."""
+    raw = os.environ.get('OLLAMA_BASE_URLS', '')
+    urls = [u.strip().rstrip('/') for u in raw.split(',') if u.strip()]
+    return urls or [os.environ.get('OLLAMA_BASE_URL', 'http://localhost:11434').rstrip('/')]
+
+
+class NoBackendAvailableError(RuntimeError):
+    """No Ollama backend could take the request."""
+
+
+class Backend:
+    def __init__(self, url):
+        self.url = url
+        self.outstanding = 0
+        self.models = set()
+        self.model_details = []
+        self.failures = 0
+        self.ejections = 0
+        self.ejected_until = 0.0
+        self.last_ejected_at = 0.0
+        self.requests = 0
+        self.errors = 0
+        self.last_check = 0.0
+
+    @property
+    def ejected(self):
+        return self.ejected_until > time.monotonic()
+
+    def to_dict(self):
+        return {
+            'url': self.url,
+            'healthy': not self.ejected,
+            'outstanding': self.outstanding,
+            'models': sorted(self.models),
+            'requests': self.requests,
+            'errors': self.errors,
+            'consecutive_failures': self.failures,
+            'ejections': self.ejections,
+        }
+
+
+class BackendPool:
+    """Routes Ollama requests across several nodes.
+
+    Each request goes to the healthy node with the fewest in-flight requests,
+    preferring nodes whose ``/api/tags`` inventory has the requested model.
+    EJECT_AFTER consecutive failures eject a node for a backoff period; a
+    successful health check or request after that readmits it. The backoff
+    doubles on repeated ejections and starts over once a node has gone
+    EJECT_RESET_SECONDS without one. If every node
+    is ejected the pool fails open to the one due back first.
+    """
+
+    def __init__(self, urls=None, session_getter=None, health_interval=HEALTH_INTERVAL,
+                 eject_after=EJECT_AFTER, eject_seconds=EJECT_SECONDS):
+        self.backends = [Backend(u) for u in (urls or backend_urls())]
+        self._session_getter = session_getter or requests.Session
+        self.health_interval = health_interval
+        self.eject_after = eject_after
+        self.eject_seconds = eject_seconds
+        self._lock = threading.Lock()
+        self._health_thread = None
+
+    def __len__(self):
+        return len(self.backends)
+
+    @property
+    def session(self):
+        return self._session_getter()
+
+    def healthy(self):
+        return [b for b in self.backends if not b.ejected]
+
+    def _pick(self, model=None, exclude=()):
+        candidates = [b for b in self.healthy() if b not in exclude]
+        if not candidates:
+            remaining = [b for b in self.backends if b not in exclude]
+            if not remaining:
+                raise NoBackendAvailableError('No Ollama backend available')
+            return min(remaining, key=lambda b: b.ejected_until)
+        if model:
+            with_model = [b for b in candidates if model in b.models]
+            candidates = with_model or candidates
+        least = min(b.outstanding for b in candidates)
+        return random.choice([b for b in candidates if b.outstanding == least])
+
+    @contextmanager
+    def lease(self, model=None, exclude=()):
+        """Reserve the best backend for one request; yields the Backend."""
+        self._ensure_health_thread()
+        with self._lock:
+            backend = self._pick(model, exclude)
+            backend.outstanding += 1
+            backend.requests += 1
+        try:
+            yield backend
+        finally:
+            with self._lock:
+                backend.outstanding -= 1
+
+    def mark_success(self, backend):
+        with self._lock:
+            if backend.failures or backend.ejected_until:
+                logger.info(f'Ollama backend {backend.url} readmitted')
+            backend.failures = 0
+            backend.ejected_until = 0.0
+
+    def mark_failure(self, backend, reason=''):
+        with self._lock:
+            backend.failures += 1
+            backend.errors += 1
+            if backend.failures >= self.eject_after and not backend.ejected:
+                now = time.monotonic()
+                if backend.ejections and now - backend.last_ejected_at >= EJECT_RESET_SECONDS:
+                    backend.ejections = 0
+                backend.ejections += 1
+                backend.last_ejected_at = now
+                period = min(EJECT_MAX_SECONDS, self.eject_seconds * 2 ** (backend.ejections - 1))
+                backend.ejected_until = now + period
+                logger.warning(f'Ejecting Ollama backend {backend.url} for {period:.0f}s: {reason}')
+
+    def check(self, backend):
+        """Health-check one node via /api/tags and refresh its model inventory."""
+        backend.last_check = time.monotonic()
+        try:
+            resp = self.session.get(f'{backend.url}/api/tags', timeout=HEALTH_TIMEOUT)
+            resp.raise_for_status()
+            models = resp.json().get('models', [])
+        except (requests.exceptions.RequestException, ValueError) as e:
+            self.mark_failure(backend, f'health check failed: {e}')
+            return False
+        backend.model_details = models
+        backend.models = {m.get('name', '') for m in models}
+        self.mark_success(backend)
+        return True
+
+    def check_all(self):
+        return {b.url: self.check(b) for b in self.backends}
+
+    def inventory(self):
+        """Union of the models installed on healthy nodes (``/api/tags`` shape)."""
+        self.check_all()
+        merged = {}
+        for backend in self.healthy():
+            for m in backend.model_details:
+                merged.setdefault(m.get('name', ''), m)
+        return list(merged.values())
+
+    def _ensure_health_thread(self):
+        if self._health_thread is not None or self.health_interval <= 0 or len(self.backends) < 2:
+            return
+        with self._lock:
+            if self._health_thread is not None:
+                return
+            self._health_thread = threading.Thread(target=self._health_loop, name='ollama-health', daemon=True)
+            self._health_thread.start()
+
+    def _health_loop(self):
+        while True:
+            for backend in self.backends:
+                try:
+                    self.check(backend)
+                except Exception as e:
+                    logger.warning(f'Health check of {backend.url} crashed: {e}')
+            time.sleep(self.health_interval)
+
+    def stats(self):
+        with self._lock:
+            return {'backends': [b.to_dict() for b in self.backends]}
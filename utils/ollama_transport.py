@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+"""Shared, connection-pooled HTTP transport for Ollama calls."""
+import os
+import json
+import socket
+import logging
+import threading
+from contextlib import contextmanager
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+POOL_SIZE = int(os.environ.get('OLLAMA_POOL_SIZE', '16'))
+MAX_RETRIES = int(os.environ.get('OLLAMA_MAX_RETRIES', '3'))
+CONNECT_TIMEOUT = float(os.environ.get('OLLAMA_CONNECT_TIMEOUT', '5'))
+READ_TIMEOUT = float(os.environ.get('OLLAMA_READ_TIMEOUT', '300'))
+
+_sessions = {}
+_lock = threading.Lock()
+_capture = threading.local()
+
+
+class _TrackingMixin:
+    """Reports each connection a request is sent on to ``capture_connections``."""
+
+    def request(self, *args, **kwargs):
+        sink = getattr(_capture, 'sink', None)
+        if sink is not None:
+            sink.append(self)
+        return super().request(*args, **kwargs)
+
+
+class _TrackedHTTPConnection(_TrackingMixin, HTTPConnection):
+    pass
+
+
+class _TrackedHTTPSConnection(_TrackingMixin, HTTPSConnection):
+    pass
+
+
+class _TrackedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TrackedHTTPConnection
+
+
+class _TrackedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TrackedHTTPSConnection
+
+
+class _TrackingAdapter(HTTPAdapter):
+    """HTTPAdapter whose connections can be captured by ``capture_connections``."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _TrackedHTTPConnectionPool,
+            'https': _TrackedHTTPSConnectionPool,
+        }
+
+
+@contextmanager
+def capture_connections(sink):
+    """Append each connection a request in the block is sent on to ``sink``."""
+    previous = getattr(_capture, 'sink', None)
+    _capture.sink = sink
+    try:
+        yield sink
+    finally:
+        _capture.sink = previous
+
+
+def abort_connections(connections):
+    """Shut down the sockets of ``connections`` from any thread.
+
+    A thread blocked reading one of them (waiting for headers or the next
+    streamed chunk) fails immediately, and the server sees the disconnect.
+    """
+    for conn in list(connections):
+        sock = getattr(conn, 'sock', None)
+        if sock is None:
+            continue
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+def build_session(pool_size=POOL_SIZE, max_retries=MAX_RETRIES, api_key=''):
+    """Create a keep-alive session that retries only on connection errors.
+
+    Read and status errors are not retried: a generate call that already
+    reached Ollama must not be replayed.
+    """
+    retry = Retry(total=max_retries, connect=max_retries, read=0, status=0,
+                  redirect=0, backoff_factor=0.5, raise_on_status=False)
+    adapter = _TrackingAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    if api_key:
+        session.headers['Authorization'] = f'Bearer {api_key}'
+    return session
+
+
+def get_session(api_key=''):
+    """Return the process-wide session for ``api_key`` (rebuilt after fork)."""
+    key = (os.getpid(), api_key)
+    session = _sessions.get(key)
+    if session is None:
+        with _lock:
+            session = _sessions.get(key)
+            if session is None:
+                session = build_session(api_key=api_key)
+                _sessions[key] = session
+    return session
+
+
+def default_timeout(read_timeout=None):
+    """(connect, read) timeout tuple for requests."""
+    return (CONNECT_TIMEOUT, read_timeout if read_timeout is not None else READ_TIMEOUT)
+
+
+class AsyncOllamaClient:
+    """Minimal asyncio client for Ollama backed by httpx (optional dependency).
+
+    Lets asyncio code await generations without tying up a worker thread on
+    a long socket read.
+    """
+
+    def __init__(self, base_url=None, api_key=None, pool_size=POOL_SIZE,
+                 connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT):
+        try:
+            import httpx
+        except ImportError:
+            raise RuntimeError('AsyncOllamaClient requires httpx (pip install httpx)')
+        self.base_url = base_url or os.environ.get('OLLAMA_BASE_URL', 'http://localhost:11434')
+        api_key = api_key if api_key is not None else os.environ.get('OLLAMA_API_KEY', '')
+        headers = {'Authorization': f'Bearer {api_key}'} if api_key else {}
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=headers,
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            transport=httpx.AsyncHTTPTransport(retries=MAX_RETRIES),
+        )
+
+    async def request(self, endpoint, method='POST', payload=None):
+        resp = await self._client.request(method, f'/api/{endpoint}', json=payload)
+        resp.raise_for_status()
+        return resp.json()
+
+    async def generate(self, payload):
+        payload = dict(payload, stream=False)
+        result = await self.request('generate', payload=payload)
+        return result.get('response', '')
+
+    async def generate_stream(self, payload):
+        """Async iterator over response chunks."""
+        payload = dict(payload, stream=True)
+        async with self._client.stream('POST', '/api/generate', json=payload) as resp:
+            resp.raise_for_status()
+            async for line in resp.aiter_lines():
+                if not line:
+                    continue
+                data = json.loads(line)
+                if data.get('error'):
+                    raise RuntimeError(data['error'])
+                if data.get('response'):
+                    yield data['response']
+                if data.get('done'):
+                    break
+
+    async def list_models(self):
+        return await self.request('tags', method='GET')
+
+    async def aclose(self):
+        await self._client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
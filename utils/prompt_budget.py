@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+"""Token budgeting for agent prompts so they fit the model context window."""
+import os
+import logging
+import threading
+from collections import namedtuple
+
+from utils.generation_options import PROFILES, DEFAULT_NUM_PREDICT, MAX_NUM_CTX
+
+logger = logging.getLogger(__name__)
+
+PROMPT_WINDOW = int(os.environ.get('LLM_PROMPT_WINDOW', '16384'))
+# Tokens kept free for the fixed wording of each prompt template.
+TEMPLATE_OVERHEAD = 256
+
+Section = namedtuple('Section', ['name', 'text', 'weight', 'required'])
+Section.__new__.__defaults__ = (1, False)
+
+_encoder = None
+_encoder_lock = threading.Lock()
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def _get_encoder():
+    """tiktoken's cl100k encoder if installed and loadable, else None."""
+    global _encoder
+    if _encoder is None:
+        with _encoder_lock:
+            if _encoder is None:
+                try:
+                    import tiktoken
+                    _encoder = tiktoken.get_encoding('cl100k_base')
+                except Exception:
+                    _encoder = False
+    return _encoder or None
+
+
+def count_tokens(text):
+    if not text:
+        return 0
+    encoder = _get_encoder()
+    if encoder:
+        return len(encoder.encode(text, disallowed_special=()))
+    return len(text) // 3 + 1
+
+
+def trim_to_tokens(text, max_tokens):
+    """Keep whole leading lines of ``text`` within ``max_tokens``."""
+    if max_tokens <= 0:
+        return ''
+    if count_tokens(text) <= max_tokens:
+        return text
+    lines = text.split('\n')
+    kept, used = [], 0
+    for line in lines:
+        cost = count_tokens(line) + 1
+        if used + cost > max_tokens:
+            break
+        kept.append(line)
+        used += cost
+    omitted = len(lines) - len(kept)
+    return '\n'.join(kept + [f'... ({omitted} more lines omitted)'])
+
+
+def record_prompt_tokens(task, total):
+    with _stats_lock:
+        s = _stats.setdefault(task or 'default', {'prompts': 0, 'total_tokens': 0, 'max_tokens': 0, 'trimmed': 0})
+        s['prompts'] += 1
+        s['total_tokens'] += total
+        s['max_tokens'] = max(s['max_tokens'], total)
+
+
+def prompt_token_stats():
+    with _stats_lock:
+        return {task: dict(s, avg_tokens=s['total_tokens'] / s['prompts'] if s['prompts'] else 0)
+                for task, s in _stats.items()}
+
+
+class PromptBudgeter:
+    """Shares a token window between prompt sections by priority weight.
+
+    Required sections are always kept whole. The remaining window (minus the
+    output reserve and template overhead) is water-filled across the other
+    sections: sections smaller than their weighted share keep everything and
+    the surplus is redistributed, larger ones are trimmed to their share.
+    """
+
+    def __init__(self, task=None, window=None, reserve=None):
+        self.task = task
+        self.window = min(window or PROMPT_WINDOW, MAX_NUM_CTX)
+        if reserve is None:
+            reserve = PROFILES.get(task, {}).get('num_predict', DEFAULT_NUM_PREDICT)
+        self.reserve = reserve
+
+    def fit(self, sections):
+        """Return ({name: text}, report) with every section within budget."""
+        tokens = {s.name: count_tokens(s.text) for s in sections}
+        available = self.window - self.reserve - TEMPLATE_OVERHEAD
+        available -= sum(tokens[s.name] for s in sections if s.required)
+        allot = {s.name: tokens[s.name] for s in sections if s.required}
+        pending = [s for s in sections if not s.required]
+        remaining = max(0, available)
+        while pending:
+            total_weight = sum(max(s.weight, 0.01) for s in pending) or 1
+            fits = [s for s in pending if tokens[s.name] <= remaining * max(s.weight, 0.01) / total_weight]
+            if not fits:
+                for s in pending:
+                    allot[s.name] = int(remaining * max(s.weight, 0.01) / total_weight)
+                break
+            for s in fits:
+                allot[s.name] = tokens[s.name]
+                remaining -= tokens[s.name]
+            pending = [s for s in pending if s not in fits]
+
+        texts, trimmed = {}, []
+        for s in sections:
+            if allot[s.name] < tokens[s.name]:
+                texts[s.name] = trim_to_tokens(s.text, allot[s.name])
+                trimmed.append(s.name)
+            else:
+                texts[s.name] = s.text
+        used = {name: count_tokens(text) for name, text in texts.items()}
+        report = {
+            'task': self.task,
+            'window': self.window,
+            'sections': used,
+            'total': sum(used.values()) + TEMPLATE_OVERHEAD,
+            'trimmed': trimmed,
+        }
+        if available < 0:
+            logger.warning(f'{self.task}: required prompt sections exceed the window by {-available} tokens')
+        record_prompt_tokens(self.task, report['total'])
+        if trimmed:
+            with _stats_lock:
+                _stats[self.task or 'default']['trimmed'] += 1
+            logger.info(f'{self.task}: trimmed {", ".join(trimmed)} to fit {self.window}-token window')
+        return texts, report
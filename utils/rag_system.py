@@ -3,28 +3,58 @@
 import os
 import logging
 import json
+import uuid
 import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, Optional
 
-import chromadb
-from chromadb.utils import embedding_functions
+from utils.embeddings import get_embedding_function
 
 logger = logging.getLogger(__name__)
 
+COLLECTIONS = ('code_examples', 'project_requirements', 'project_structure')
+MAX_SEARCH_WORKERS = len(COLLECTIONS)
+# Cached answers are keyed by a per-collection generation token that every mutation
+# replaces, so they never go stale and can be kept for a long time. Tokens are random,
+# so a token lost to eviction is never reissued and old answers stay unreachable.
+CACHE_TTL = int(os.environ.get('RAG_CACHE_TTL', '86400'))
+GENERATION_PREFIX = 'rag:generation:'
+
 
 class RAGSystem:
+    """Chroma-backed retrieval with a Redis result cache.
+
+    Construction is cheap: the Chroma client, the collections (seeded on
+    first use when empty) and the shared embedding model are all set up
+    lazily, when the first query or document needs them.
+    """
+
     def __init__(self):
         self.data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
         os.makedirs(self.data_dir, exist_ok=True)
-        self.client = chromadb.PersistentClient(path=os.path.join(self.data_dir, 'chroma'))
-        self.embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction()
-        self.collections = {
-            'code_examples': self._get_or_create_collection('code_examples'),
-            'project_requirements': self._get_or_create_collection('project_requirements'),
-            'project_structure': self._get_or_create_collection('project_structure'),
-        }
+        self.embedding_function = get_embedding_function()
+        self._client = None
+        self._collections = None
+        self._init_lock = threading.Lock()
         self._redis = None
-        self._check_and_populate_collections()
+
+    @property
+    def client(self):
+        if self._client is None:
+            import chromadb
+            self._client = chromadb.PersistentClient(path=os.path.join(self.data_dir, 'chroma'))
+        return self._client
+
+    @property
+    def collections(self):
+        if self._collections is None:
+            with self._init_lock:
+                if self._collections is None:
+                    collections = {name: self._get_or_create_collection(name) for name in COLLECTIONS}
+                    self._check_and_populate_collections(collections)
+                    self._collections = collections
+        return self._collections
 
     @property
     def redis(self):
@@ -44,7 +74,7 @@ class RAGSystem:
         except Exception:
             return self.client.create_collection(name=name, embedding_function=self.embedding_function)
 
-    def _check_and_populate_collections(self):
+    def _check_and_populate_collections(self, collections):
         mapping = [
             ('code_examples', 'initial_code_examples.json', ['framework', 'category']),
             ('project_requirements', 'initial_project_requirements.json', ['project_type', 'framework']),
@@ -52,13 +82,13 @@ class RAGSystem:
         ]
         for coll_name, filename, keys in mapping:
             try:
-                if self.collections[coll_name].count() == 0:
+                if collections[coll_name].count() == 0:
                     logger.info(f'Populating {coll_name}')
-                    self._load_initial_data(filename, coll_name, keys)
+                    self._load_initial_data(filename, collections[coll_name], keys)
             except Exception as e:
                 logger.error(f'Error checking {coll_name}: {e}')
 
-    def _load_initial_data(self, filename, collection_name, meta_keys):
+    def _load_initial_data(self, filename, collection, meta_keys):
         path = os.path.join(self.data_dir, filename)
         if not os.path.exists(path):
             return
@@ -72,43 +102,131 @@ class RAGSystem:
                 meta['source'] = item.get('source', 'local')
                 metadatas.append(meta)
                 ids.append(hashlib.md5(item['content'].encode()).hexdigest())
-            self.collections[collection_name].add(documents=documents, metadatas=metadatas, ids=ids)
-            logger.info(f'Added {len(documents)} items to {collection_name}')
+            collection.add(documents=documents, metadatas=metadatas, ids=ids)
+            self._bump_generation(collection.name)
+            logger.info(f'Added {len(documents)} items to {collection.name}')
         except Exception as e:
             logger.error(f'Error loading {filename}: {e}')
 
     def query(self, query_text, collection_name, n_results=5, filter_metadata=None):
-        if collection_name not in self.collections:
-            return 'No relevant information found.'
-        cache_key = f'cache:rag:{hashlib.md5(f"{query_text}:{collection_name}".encode()).hexdigest()}'
+        return self.query_many([(query_text, collection_name, n_results, filter_metadata)])[0]
+
+    def query_many(self, queries):
+        """Answer ``(text, collection, n_results, filter)`` queries with one embedding pass.
+
+        Cached answers are served first; the remaining distinct texts are
+        embedded in a single call, and queries sharing a collection, result
+        count and filter go to Chroma together, with the groups searched
+        concurrently. Returns answers in the order of ``queries``.
+        """
+        answers = [None] * len(queries)
+        keys = {}
+        generations = self._generations({q[1] for q in queries if q[1] in COLLECTIONS})
+        for i, (text, collection_name, n_results, filter_metadata) in enumerate(queries):
+            if collection_name not in COLLECTIONS:
+                answers[i] = 'No relevant information found.'
+                continue
+            generation = generations[collection_name]
+            keys[i] = self._cache_key(text, collection_name, generation, n_results, filter_metadata) \
+                if generation else None
+            answers[i] = self._cache_get(keys[i])
+        pending = [i for i in keys if not answers[i]]
+        if not pending:
+            return answers
+        try:
+            texts = list(dict.fromkeys(queries[i][0] for i in pending))
+            vectors = dict(zip(texts, self.embedding_function(texts)))
+            collections = self.collections
+        except Exception as e:
+            logger.error(f'Error embedding RAG queries: {e}')
+            for i in pending:
+                answers[i] = 'Error retrieving information.'
+            return answers
+        groups = {}
+        for i in pending:
+            _, collection_name, n_results, filter_metadata = queries[i]
+            group = (collection_name, n_results, json.dumps(filter_metadata, sort_keys=True))
+            groups.setdefault(group, []).append(i)
+
+        def search(indexes):
+            collection_name, n_results, filter_metadata = queries[indexes[0]][1:]
+            try:
+                results = collections[collection_name].query(
+                    query_embeddings=[vectors[queries[i][0]] for i in indexes],
+                    n_results=n_results, where=filter_metadata,
+                )
+                for row, i in enumerate(indexes):
+                    answers[i] = self._format(queries[i][0], collection_name, results['documents'][row],
+                                              results['metadatas'][row])
+                    self._cache_set(keys[i], answers[i])
+            except Exception as e:
+                logger.error(f'Error querying {collection_name}: {e}')
+                for i in indexes:
+                    answers[i] = 'Error retrieving information.'
+
+        if len(groups) == 1:
+            search(next(iter(groups.values())))
+        else:
+            with ThreadPoolExecutor(max_workers=min(len(groups), MAX_SEARCH_WORKERS)) as executor:
+                list(executor.map(search, groups.values()))
+        return answers
+
+    @staticmethod
+    def _cache_key(query_text, collection_name, generation, n_results=5, filter_metadata=None):
+        digest = hashlib.md5(f'{query_text}:{n_results}:{json.dumps(filter_metadata, sort_keys=True)}'.encode())
+        return f'cache:rag:{collection_name}:{generation}:{digest.hexdigest()}'
+
+    def _generations(self, collection_names):
+        """Current generation token of each collection; None disables caching for it."""
+        names = sorted(collection_names)
+        generations = dict.fromkeys(names)
+        if self.redis and names:
+            try:
+                keys = [f'{GENERATION_PREFIX}{name}' for name in names]
+                for name, key, value in zip(names, keys, self.redis.mget(keys)):
+                    if not value:
+                        # New or evicted: start a fresh token (NX so concurrent readers agree).
+                        self.redis.set(key, uuid.uuid4().hex, nx=True)
+                        value = self.redis.get(key)
+                    generations[name] = value
+            except Exception:
+                pass
+        return generations
+
+    def _bump_generation(self, collection_name):
+        """Invalidate every cached answer for ``collection_name``."""
         if self.redis:
             try:
-                cached = self.redis.get(cache_key)
-                if cached:
-                    return cached
+                self.redis.set(f'{GENERATION_PREFIX}{collection_name}', uuid.uuid4().hex)
+            except Exception as e:
+                logger.warning(f'Could not invalidate RAG cache for {collection_name}: {e}')
+
+    def _cache_get(self, key):
+        if key and self.redis:
+            try:
+                return self.redis.get(key)
             except Exception:
                 pass
-        try:
-            results = self.collections[collection_name].query(
-                query_texts=[query_text], n_results=n_results, where=filter_metadata,
-            )
-            if not results['documents'] or not results['documents'][0]:
-                result = self._fetch_from_external_sources(query_text, collection_name)
-            else:
-                formatted = []
-                for i, doc in enumerate(results['documents'][0]):
-                    source = results['metadatas'][0][i].get('source', 'unknown')
-                    formatted.append(f'Source: {source}\n{doc}\n')
-                result = '\n'.join(formatted)
-            if self.redis:
-                try:
-                    self.redis.setex(cache_key, 600, result)
-                except Exception:
-                    pass
-            return result
-        except Exception as e:
-            logger.error(f'Error querying {collection_name}: {e}')
-            return 'Error retrieving information.'
+        return None
+
+    def _cache_set(self, key, result):
+        if key and self.redis:
+            try:
+                self.redis.setex(key, CACHE_TTL, result)
+            except Exception:
+                pass
+
+    def _format(self, query_text, collection_name, documents, metadatas):
+        if not documents:
+            return self._fetch_from_external_sources(query_text, collection_name)
+        formatted = []
+        for doc, meta in zip(documents, metadatas):
+            formatted.append(f'Source: {(meta or {}).get("source", "unknown")}\n{doc}\n')
+        return '\n'.join(formatted)
+
+    def stats(self):
+        return {'initialised': self._collections is not None,
+                'embedding': self.embedding_function.stats()}
 
     def _fetch_from_external_sources(self, query_text, collection_name):
         results = []
@@ -117,21 +235,23 @@ class RAGSystem:
         return '\n'.join(results) if results else 'No relevant information found.'
 
     def add_document(self, content, collection_name, metadata):
-        if collection_name not in self.collections:
+        if collection_name not in COLLECTIONS:
             return False
         try:
             doc_id = hashlib.md5(content.encode()).hexdigest()
             self.collections[collection_name].add(documents=[content], metadatas=[metadata], ids=[doc_id])
+            self._bump_generation(collection_name)
             return True
         except Exception as e:
             logger.error(f'Error adding document: {e}')
             return False
 
     def delete_document(self, doc_id, collection_name):
-        if collection_name not in self.collections:
+        if collection_name not in COLLECTIONS:
             return False
         try:
             self.collections[collection_name].delete(ids=[doc_id])
+            self._bump_generation(collection_name)
             return True
         except Exception as e:
             logger.error(f'Error deleting document: {e}')
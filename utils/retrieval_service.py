@@ -0,0 +1,248 @@
+#!/usr/bin/env python
+"""Local retrieval sidecar: one process owns the embedding model and Chroma handle.
+
+Web and Celery processes talk to it over a unix socket via RetrievalClient,
+which has the same query/query_many/add_document/delete_document API as
+RAGSystem.
+The protocol is one JSON object per line in each direction:
+``{"op": "query", "args": {...}}`` -> ``{"ok": true, "result": ...}``.
+
+Usage: python -m utils.retrieval_service --socket /tmp/llm-rag.sock
+"""
+import os
+import json
+import time
+import socket
+import logging
+import argparse
+import threading
+import socketserver
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOCKET = os.environ.get('RAG_SERVICE_SOCKET', '')
+BATCH_WINDOW = float(os.environ.get('RAG_SERVICE_BATCH_WINDOW', '0.005'))
+MAX_BATCH = int(os.environ.get('RAG_SERVICE_MAX_BATCH', '32'))
+CLIENT_TIMEOUT = float(os.environ.get('RAG_SERVICE_TIMEOUT', '30'))
+
+
+class QueryBatcher:
+    """Collects queries arriving within ``window`` seconds into one batch.
+
+    Each batch is answered by ``RAGSystem.query_many``: one embedding
+    pass for all distinct texts and one Chroma search per collection.
+    """
+
+    def __init__(self, rag, window=BATCH_WINDOW, max_batch=MAX_BATCH):
+        self.rag = rag
+        self.window = window
+        self.max_batch = max_batch
+        self._pending = []
+        self._cond = threading.Condition()
+        self.batches = 0
+        self.queries = 0
+        threading.Thread(target=self._run, name='rag-batcher', daemon=True).start()
+
+    def submit(self, query_text, collection_name, n_results=5, filter_metadata=None):
+        future = Future()
+        with self._cond:
+            self._pending.append(((query_text, collection_name, n_results, filter_metadata), future))
+            self._cond.notify()
+        return future
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                deadline = time.monotonic() + self.window
+                while len(self._pending) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+            try:
+                answers = self.rag.query_many([query for query, _ in batch])
+                for (_, future), answer in zip(batch, answers):
+                    future.set_result(answer)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+            self.batches += 1
+            self.queries += len(batch)
+
+    def stats(self):
+        return {'batches': self.batches, 'queries': self.queries,
+                'mean_batch': self.queries / self.batches if self.batches else 0.0}
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        service = self.server.service
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                result = service.dispatch(request.get('op'), request.get('args') or {})
+                response = {'ok': True, 'result': result}
+            except Exception as e:
+                logger.error(f'Retrieval request failed: {e}')
+                response = {'ok': False, 'error': str(e)}
+            self.wfile.write((json.dumps(response) + '\n').encode())
+            self.wfile.flush()
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class RetrievalService:
+    """Serves one RAGSystem to every process on the host."""
+
+    def __init__(self, socket_path, rag=None):
+        from utils.rag_system import RAGSystem
+        self.socket_path = socket_path
+        self.rag = rag if rag is not None else RAGSystem()
+        self.batcher = QueryBatcher(self.rag)
+        self.requests = 0
+
+    def dispatch(self, op, args):
+        self.requests += 1
+        if op == 'query':
+            return self.batcher.submit(**args).result()
+        if op == 'query_many':
+            futures = [self.batcher.submit(*query) for query in args['queries']]
+            return [future.result() for future in futures]
+        if op == 'add_document':
+            return self.rag.add_document(**args)
+        if op == 'delete_document':
+            return self.rag.delete_document(**args)
+        if op == 'stats':
+            return self.stats()
+        if op == 'ping':
+            return 'pong'
+        raise ValueError(f'Unknown operation: {op}')
+
+    def stats(self):
+        return {'requests': self.requests, 'batcher': self.batcher.stats(), 'rag': self.rag.stats()}
+
+    def serve_forever(self):
+        server = self.create_server()
+        logger.info(f'Retrieval service listening on {self.socket_path}')
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+            os.unlink(self.socket_path)
+
+    def create_server(self):
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        server = _Server(self.socket_path, _Handler)
+        server.service = self
+        os.chmod(self.socket_path, 0o660)
+        return server
+
+
+class RetrievalClient:
+    """RAGSystem-compatible client for RetrievalService.
+
+    Connections are kept per thread and reopened once if the service was
+    restarted. Failures degrade like RAGSystem does: queries return an
+    error string, mutations return False.
+    """
+
+    def __init__(self, socket_path=DEFAULT_SOCKET, timeout=CLIENT_TIMEOUT):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            conn = self._local.conn = (sock, sock.makefile('rb'))
+        return conn
+
+    def _close(self):
+        conn = getattr(self._local, 'conn', None)
+        self._local.conn = None
+        if conn is not None:
+            try:
+                conn[1].close()
+                conn[0].close()
+            except OSError:
+                pass
+
+    def _call(self, op, **args):
+        data = (json.dumps({'op': op, 'args': args}) + '\n').encode()
+        for attempt in (1, 2):
+            try:
+                sock, reader = self._connection()
+                sock.sendall(data)
+                line = reader.readline()
+                if not line:
+                    raise ConnectionError('retrieval service closed the connection')
+                break
+            except OSError as e:
+                self._close()
+                if attempt == 2:
+                    raise ConnectionError(f'Retrieval service unavailable at {self.socket_path}: {e}')
+        response = json.loads(line)
+        if not response.get('ok'):
+            raise RuntimeError(response.get('error', 'retrieval request failed'))
+        return response['result']
+
+    def query(self, query_text, collection_name, n_results=5, filter_metadata=None):
+        try:
+            return self._call('query', query_text=query_text, collection_name=collection_name,
+                              n_results=n_results, filter_metadata=filter_metadata)
+        except Exception as e:
+            logger.error(f'Error querying {collection_name} via retrieval service: {e}')
+            return 'Error retrieving information.'
+
+    def query_many(self, queries):
+        try:
+            return self._call('query_many', queries=[list(query) for query in queries])
+        except Exception as e:
+            logger.error(f'Error in batched query via retrieval service: {e}')
+            return ['Error retrieving information.'] * len(queries)
+
+    def add_document(self, content, collection_name, metadata):
+        try:
+            return self._call('add_document', content=content, collection_name=collection_name, metadata=metadata)
+        except Exception as e:
+            logger.error(f'Error adding document via retrieval service: {e}')
+            return False
+
+    def delete_document(self, doc_id, collection_name):
+        try:
+            return self._call('delete_document', doc_id=doc_id, collection_name=collection_name)
+        except Exception as e:
+            logger.error(f'Error deleting document via retrieval service: {e}')
+            return False
+
+    def stats(self):
+        return self._call('stats')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve RAG retrieval over a unix socket.')
+    parser.add_argument('--socket', default=DEFAULT_SOCKET or '/tmp/llm-rag.sock')
+    parser.add_argument('--preload', action='store_true', help='load the embedding model before serving')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    os.environ.setdefault('TOKENIZERS_PARALLELISM', 'false')
+    service = RetrievalService(args.socket)
+    if args.preload:
+        service.rag.embedding_function.load()
+    service.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+"""Single-flight coalescing of identical concurrent calls, in-process and via Redis."""
+import json
+import time
+import uuid
+import logging
+import threading
+from contextlib import nullcontext
+from utils.cancellation import CancelToken, GenerationCancelled, cancellation_scope
+
+logger = logging.getLogger(__name__)
+
+LOCK_PREFIX = 'lock:llm:'
+RESULT_PREFIX = 'inflight:llm:'
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+        # Cancelled once every participant has cancelled its own token.
+        self.token = CancelToken('shared generation')
+        self.live = 0
+
+
+class SingleFlight:
+    """Run ``fn`` once per key while a call for that key is in flight.
+
+    Callers in the same process wait on the leader's result. Across processes
+    the leader holds a Redis lock and publishes its result under a short-lived
+    key that other processes poll. The leader renews the lock every
+    ``lock_ttl / 3`` seconds for as long as ``fn`` runs (queueing plus
+    generation can take many minutes), so waiters keep waiting while it is
+    held; if the lock disappears without a result (leader crashed) the waiter
+    runs ``fn`` itself.
+    """
+
+    def __init__(self, redis_getter=None, lock_ttl=60, result_ttl=60, poll_interval=0.25):
+        self._redis_getter = redis_getter
+        self.lock_ttl = lock_ttl
+        self.result_ttl = result_ttl
+        self.poll_interval = poll_interval
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.counters = {'leaders': 0, 'local_shared': 0, 'remote_shared': 0}
+
+    @property
+    def redis(self):
+        return self._redis_getter() if self._redis_getter else None
+
+    def do(self, key, fn, cancel_token=None):
+        """Return ``fn()``, sharing one execution among concurrent callers of ``key``.
+
+        ``fn`` runs under a shared cancel token that is cancelled only when
+        every caller's ``cancel_token`` is; a cancelled waiter stops waiting
+        right away with GenerationCancelled.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.counters['leaders'] += 1
+            else:
+                call.waiters += 1
+                self.counters['local_shared'] += 1
+            call.live += 1
+
+        def leave():
+            with self._lock:
+                call.live -= 1
+                abandoned = call.live == 0
+            if abandoned:
+                call.token.cancel('every caller cancelled')
+
+        with cancel_token.on_cancel(leave) if cancel_token is not None else nullcontext():
+            if not leader:
+                while not call.event.wait(0.1 if cancel_token is not None else None):
+                    cancel_token.raise_if_cancelled()
+                if call.error is not None:
+                    raise call.error
+                return call.result
+            try:
+                with cancellation_scope(call.token):
+                    call.result = self._do_distributed(key, fn, call.token)
+            except Exception as e:
+                call.error = e
+                raise
+            finally:
+                with self._lock:
+                    self._calls.pop(key, None)
+                call.event.set()
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+        return call.result
+
+    def _do_distributed(self, key, fn, cancel_token=None):
+        redis = self.redis
+        if not redis:
+            return fn()
+        lock_key, result_key = f'{LOCK_PREFIX}{key}', f'{RESULT_PREFIX}{key}'
+        token = uuid.uuid4().hex
+        try:
+            acquired = redis.set(lock_key, token, nx=True, ex=self.lock_ttl)
+        except Exception:
+            return fn()
+        if not acquired:
+            shared = self._wait_for_remote(redis, lock_key, result_key, cancel_token)
+            if shared is not None:
+                with self._lock:
+                    self.counters['remote_shared'] += 1
+                return shared
+            return fn()
+        stop = threading.Event()
+        threading.Thread(target=self._renew_lock, args=(redis, lock_key, token, stop),
+                         name='single-flight-renew', daemon=True).start()
+        try:
+            result = fn()
+            try:
+                redis.setex(result_key, self.result_ttl, json.dumps(result))
+            except Exception:
+                pass
+            return result
+        finally:
+            stop.set()
+            try:
+                if redis.get(lock_key) == token:
+                    redis.delete(lock_key)
+            except Exception:
+                pass
+
+    def _renew_lock(self, redis, lock_key, token, stop):
+        while not stop.wait(self.lock_ttl / 3):
+            try:
+                if redis.get(lock_key) != token:
+                    return
+                redis.expire(lock_key, self.lock_ttl)
+            except Exception as e:
+                logger.warning(f'Could not renew single-flight lock {lock_key}: {e}')
+
+    def _wait_for_remote(self, redis, lock_key, result_key, cancel_token=None):
+        """Poll for the leader's result while its lock is held.
+
+        Returns None when the lock is gone without a result.
+        """
+        while True:
+            if cancel_token is not None and cancel_token.cancelled:
+                raise GenerationCancelled('Cancelled while waiting for a shared generation')
+            try:
+                raw = redis.get(result_key)
+                if raw is not None:
+                    return json.loads(raw)
+                if not redis.exists(lock_key):
+                    raw = redis.get(result_key)
+                    return json.loads(raw) if raw is not None else None
+            except Exception:
+                return None
+            time.sleep(self.poll_interval)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats['in_flight'] = len(self._calls)
+        return stats